@@ -0,0 +1,140 @@
+# Checkpoints of the second phase, saved in a SQLite file next to the
+# database file, so an interrupted run can be resumed.
+#
+# Pages are returned from the worker processes in the order they are read
+# from the database, so the processed pages are always the first pages of
+# the database iteration, and the checkpoint only needs to record how many
+# pages have been written and the output file size at that point.
+
+import os
+import sqlite3
+from pathlib import Path
+from typing import TextIO
+
+from .wxr_logging import logger
+
+
+class Checkpoint:
+    def __init__(self, path: Path, interval: int = 1000):
+        self.path = path
+        self.interval = interval  # pages between saved checkpoints
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS progress (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            total_pages INTEGER,
+            processed_pages INTEGER,
+            output_size INTEGER
+            );
+
+            -- Words written to the output, used to find the words that
+            -- only occur in the thesaurus
+            CREATE TABLE IF NOT EXISTS emitted (
+            word TEXT,
+            lang_code TEXT,
+            pos TEXT,
+            PRIMARY KEY(word, lang_code, pos)
+            );
+
+            PRAGMA journal_mode = WAL;
+            """
+        )
+        self.total_pages = 0
+        self.processed_pages = 0
+        self.output_size = 0
+        for total_pages, processed_pages, output_size in self.conn.execute(
+            "SELECT total_pages, processed_pages, output_size FROM progress"
+        ):
+            self.total_pages = total_pages
+            self.processed_pages = processed_pages
+            self.output_size = output_size
+        self.saved_pages = self.processed_pages
+        self.new_emitted: list[tuple[str, str, str]] = []
+
+    def restore_output(self, out_f: TextIO) -> None:
+        """Removes the output written after the last saved checkpoint from
+        the output file, which must be opened in append mode."""
+        out_f.flush()
+        size = out_f.seek(0, os.SEEK_END)
+        if size < self.output_size:
+            raise RuntimeError(
+                f"Output file is smaller ({size} bytes) than in the checkpoint "
+                f"{self.path} ({self.output_size} bytes), can't resume"
+            )
+        out_f.truncate(self.output_size)
+        out_f.seek(0, os.SEEK_END)
+
+    def emitted(self) -> set[tuple[str, str, str]]:
+        return set(
+            self.conn.execute("SELECT word, lang_code, pos FROM emitted")
+        )
+
+    def resume(self, total_pages: int) -> int:
+        """Returns the number of pages processed before the last saved
+        checkpoint, which should be skipped.  `total_pages` is the number of
+        pages to process, it must be the same as when the checkpoint was
+        saved."""
+        if self.processed_pages > 0:
+            if total_pages != self.total_pages:
+                raise RuntimeError(
+                    f"The database has {total_pages} pages to process but "
+                    f"the checkpoint {self.path} was saved with "
+                    f"{self.total_pages} pages, can't resume"
+                )
+            logger.info(
+                f"Resuming from checkpoint {self.path}, skipping "
+                f"{self.processed_pages} processed pages"
+            )
+        self.total_pages = total_pages
+        return self.processed_pages
+
+    def page_done(
+        self, emitted: list[tuple[str, str, str]], out_f: TextIO
+    ) -> None:
+        """Called after the data of a page has been written to the output,
+        saves a checkpoint every `interval` pages."""
+        self.processed_pages += 1
+        self.new_emitted.extend(emitted)
+        if self.processed_pages - self.saved_pages >= self.interval:
+            self.save(out_f)
+
+    def save(self, out_f: TextIO) -> None:
+        # The output must be on disk before the checkpoint that refers to it
+        out_f.flush()
+        os.fsync(out_f.fileno())
+        self.output_size = out_f.tell()
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO emitted (word, lang_code, pos) "
+            "VALUES(?, ?, ?)",
+            self.new_emitted,
+        )
+        self.conn.execute(
+            "INSERT OR REPLACE INTO progress "
+            "(id, total_pages, processed_pages, output_size) "
+            "VALUES(0, ?, ?, ?)",
+            (self.total_pages, self.processed_pages, self.output_size),
+        )
+        self.conn.commit()
+        self.new_emitted.clear()
+        self.saved_pages = self.processed_pages
+
+    def remove(self) -> None:
+        """Removes the checkpoint file after the second phase is done."""
+        self.conn.close()
+        for path in (
+            self.path,
+            self.path.with_name(self.path.name + "-wal"),
+            self.path.with_name(self.path.name + "-shm"),
+        ):
+            path.unlink(missing_ok=True)
+
+
+def checkpoint_path(
+    db_path: Path, shard: tuple[int, int] | None = None
+) -> Path:
+    if shard is not None:
+        return db_path.with_stem(
+            f"{db_path.stem}_checkpoint_{shard[0] + 1}of{shard[1]}"
+        )
+    return db_path.with_stem(f"{db_path.stem}_checkpoint")
@@ -1336,6 +1336,129 @@ URL_STARTS_RE = re.compile(
 )
 
 IMAGE_LINK_RE: Optional[re.Pattern] = None
+# Category link patterns by edition, see `category_link_re()`
+CATEGORY_LINK_RES: dict[str, re.Pattern] = {}
+
+# Strings without any of these characters have no markup for `clean_value()`
+# to remove, only whitespace to normalize
+MARKUP_RE = re.compile(r"[<\[{'&]")
+
+NOWIKI_RE = re.compile(r"<nowiki\s*/>")
+TABLE_RE = re.compile(r"\{\|((?!\{\|)(?!\|\}).)*\|\}", re.DOTALL)
+REF_NAME_RE = re.compile(r"<ref\s+name=\"[^\"]+\"\s*/>")
+REF_RE = re.compile(r"(?is)<ref\b\s*[^>/]*?>\s*.*?</ref\s*>")
+SPAN_RE = re.compile(r"(?is)<span\b\s*[^>]*?>(.*?)\s*</span\s*>")
+WHITESPACE_RE = re.compile(r"\s+")
+BR_RE = re.compile(r"(?si)\s*<br\s*/?>\n*")
+FLOATRIGHT_DIV_RE = re.compile(
+    r'(?si)<div\b[^>]*?\bclass="[^"]*?\bfloatright\b[^>]*?>'
+    r"((<div\b(<div\b.*?</div\s*>|.)*?</div>)|.)*?"
+    r"</div\s*>"
+)
+FLOAT_DIV_RE = re.compile(
+    r'(?si)<div\b[^>]*?\bstyle="[^"]*?\bfloat:[^>]*?>'
+    r"((<div\b(<div\b.*?</div\s*>|.)*?</div>)|.)*?"
+    r"</div\s*>"
+)
+PREVIEWONLY_SUP_RE = re.compile(
+    r'(?si)<sup\b[^>]*?\bclass="[^"<>]*?'
+    r"\bpreviewonly\b[^>]*?>"
+    r".+?</sup\s*>"
+)
+ERROR_STRONG_RE = re.compile(
+    r'(?si)<strong\b[^>]*?\bclass="[^"]*?\berror\b[^>]*?>'
+    r".+?</strong\s*>"
+)
+BLOCK_TAG_RE = re.compile(r"(?si)</?(div|tr|li|table|dl|ul|ol)\b[^>]*>")
+DD_DT_TAG_RE = re.compile(r"(?i)</?d[dt]\s*>")
+CELL_TAG_RE = re.compile(r"(?si)</?(td|th)\b[^>]*>")
+EMPTY_SUP_RE = re.compile(r"(?si)<sup\b[^>]*>\s*</sup\s*>")
+SUP_RE = re.compile(r"(?si)<sup\b[^>]*>(.*?)</sup\s*>")
+EMPTY_SUB_RE = re.compile(r"(?si)<sub\b[^>]*>\s*</sub\s*>")
+SUB_RE = re.compile(r"(?si)<sub\b[^>]*>(.*?)</sub\s*>")
+CHEM_RE = re.compile(r"(?si)<chem\b[^>]*>(.*?)</chem\s*>")
+MATH_RE = re.compile(r"(?si)<math\b[^>]*>(.*?)</math\s*>")
+SYNTAXHIGHLIGHT_RE = re.compile(
+    r"(?si)<syntaxhighlight\b[^>]*>(.*?)" r"</syntaxhighlight\s*>"
+)
+HTML_TAG_RE = re.compile(r"(?s)<[/!a-zA-Z][^>]*>")
+HTML_END_TAG_RE = re.compile(r"(?s)</[^>]+>")
+NOINCLUDE_RE = re.compile(r"(?si)<noinclude\s*/\s*>")
+ELLIPSIS_RE = re.compile(r"(?s)\[\s*\.\.\.\s*\]")
+SUP_URL_RE = re.compile(r"\^\(\[?(https?:)?//[^]()]+\]?\)")
+EDIT_LINK_RE = re.compile(r"\[//[^]\s]+\s+edit\s*\]")
+LINK_RE = re.compile(r"(?s)\[\[\s*:?([^]|#<>:]+?)\s*(#[^][|<>]*?)?\]\]")
+PREFIXED_LINK_RE = re.compile(
+    r"(?s)\[\[\s*(([\w\d]+)\s*:)?\s*([^][#|<>]+?)"
+    r"\s*(#[^][|]*?)?\|?\]\]"
+)
+LINK_BARS_RE = re.compile(
+    r"(?s)\[\[\s*([^][|<>]+?)\s*\|"
+    r"\s*(([^][|]|\[[^]]*\])+?)"
+    r"(\s*\|\s*(([^][|]|\[[^]]*\])+?))*\s*\|*\]\]"
+)
+IMAGE_ALT_RE = re.compile(r"\|\s*alt\s*=([^]|]+)(\||\]\])")
+EXTURL_RE = re.compile(r"\[\s*((https?:|mailto:)?//([^][]+?))\s*\]")
+# Left-to-right and right-to-left marks, zero-width characters
+INVISIBLE_CHARS_RE = re.compile(r"[\u200e\u200f\u200b\u200d\u200c\ufeff]")
+SPACES_RE = re.compile(r"[ \t\r]+")
+NEWLINES_RE = re.compile(r" *\n+")
+BRACKETED_ELLIPSIS_RE = re.compile(r"\[\s*…\s*\]")
+
+
+def category_link_re(wxr: WiktextractContext) -> re.Pattern:
+    """Returns the pattern of category links of the edition, compiled once
+    for each edition."""
+    lang_code = wxr.wtp.lang_code
+    pattern = CATEGORY_LINK_RES.get(lang_code)
+    if pattern is None:
+        category_ns_data: NamespaceDataEntry
+        # XXX "Category" -> config variable for portability
+        category_ns_data = wxr.wtp.NAMESPACE_DATA.get("Category", {})  # type: ignore[typeddict-item]
+        # Fail if we received empty dict from .get()
+        category_ns_names = {"Category", category_ns_data["name"]} | set(
+            category_ns_data["aliases"]
+        )
+        category_names_pattern = rf"(?:{'|'.join(category_ns_names)})"
+        pattern = re.compile(
+            rf"(?si)\s*\[\[\s*{category_names_pattern}\s*:\s*([^]]+?)\s*\]\]"
+        )
+        CATEGORY_LINK_RES[lang_code] = pattern
+    return pattern
+
+
+def clean_plain_value(title: str, no_strip=False) -> str:
+    """The last steps of `clean_value()`: normalizes the whitespace and the
+    Unicode form of a string that has no markup left."""
+    if not title.isascii():
+        title = title.replace("\xa0", " ")  # nbsp
+        title = INVISIBLE_CHARS_RE.sub("", title)
+    # Replace whitespace sequences by a single space.
+    title = SPACES_RE.sub(" ", title)
+    title = NEWLINES_RE.sub("\n", title)
+    # Eliminate spaces around ellipsis in brackets
+    if "[" in title and "…" in title:
+        title = BRACKETED_ELLIPSIS_RE.sub("[…]", title)
+
+    # This unicode quote seems to be used instead of apostrophe quite randomly
+    # (about 4% of apostrophes in English entries, some in Finnish entries).
+    # title = re.sub("\u2019", "'", title)  # Note: no r"..." here!
+    # Replace strange unicode quotes with normal quotes
+    # title = re.sub(r"”", '"', title)
+    # Replace unicode long dash by normal dash
+    # title = re.sub(r"–", "-", title)
+
+    # Remove whitespace before periods and commas etc
+    # XXX we might re-enable this, now trying without as it is removing some
+    # instances where we would want to leave the space
+    # title = re.sub(r" ([.,;:!?)])", repl_1, title)
+    # Strip surrounding whitespace.
+    if not no_strip:
+        title = title.strip()
+    # Normalize different ways of writing accents into the NFC canonical form
+    if not title.isascii():
+        title = unicodedata.normalize("NFC", title)
+    return title
 
 
 def clean_value(
@@ -1348,6 +1471,14 @@ def clean_value(
     assert isinstance(wxr, WiktextractContext)
     assert isinstance(title, str)
 
+    # Most values are plain text.  Each group of steps below only runs if
+    # the string has the character that all of its patterns start with,
+    # none of the steps adds it otherwise.
+    if MARKUP_RE.search(title) is None:
+        if "^(" in title:
+            title = SUP_URL_RE.sub("", title)
+        return clean_plain_value(title, no_strip)
+
     global IMAGE_LINK_RE
     if IMAGE_LINK_RE is None:
         image_link_prefixes = wxr.wtp.namespace_prefixes(
@@ -1361,7 +1492,7 @@ def clean_value(
         return clean_value(wxr, m.group(1), no_strip=True)
 
     def repl_exturl(m: re.Match) -> str:
-        args = re.split(r"\s+", m.group(1))
+        args = WHITESPACE_RE.split(m.group(1))
         i = 0
         while i < len(args) - 1:
             if not URL_STARTS_RE.match(args[i]):
@@ -1392,7 +1523,7 @@ def clean_value(
                 0
             ):
                 # This image should be inline, so let's print its alt text
-                alt_m = re.search(r"\|\s*alt\s*=([^]|]+)(\||\]\])", m.group(0))
+                alt_m = IMAGE_ALT_RE.search(m.group(0))
                 if alt_m is not None:
                     return "[Alt: " + alt_m.group(1) + "]"
             return ""
@@ -1418,180 +1549,106 @@ def clean_value(
         # Content is preformatted
         return "\n" + m.group(1).strip() + "\n"
 
-    # remove nowiki tag returned from `Wtp.node_to_html()`
-    title = re.sub(r"<nowiki\s*/>", "", title)
+    if "<" in title:
+        # remove nowiki tag returned from `Wtp.node_to_html()`
+        title = NOWIKI_RE.sub("", title)
 
     # Remove any remaining templates
     # title = re.sub(r"\{\{[^}]+\}\}", "", title)
 
     # Remove tables, which can contain other tables
-    prev = ""
-    while title != prev:
-        prev = title
-        title = re.sub(
-            r"\{\|((?!\{\|)(?!\|\}).)*\|\}",
-            "\n",
-            title,
-            flags=re.DOTALL,
-        )
+    if "{|" in title:
+        prev = ""
+        while title != prev:
+            prev = title
+            title = TABLE_RE.sub("\n", title)
     # title = re.sub(r"(?s)\{\|.*?\|\}", "\n", title)
-    # Remove second reference tags (<ref name="ref_name"/>)
-    title = re.sub(r"<ref\s+name=\"[^\"]+\"\s*/>", "", title)
-    # Remove references (<ref>...</ref>).
-    title = re.sub(r"(?is)<ref\b\s*[^>/]*?>\s*.*?</ref\s*>", "", title)
-    # Replace <span>...</span> by stripped content without newlines
-    title = re.sub(
-        r"(?is)<span\b\s*[^>]*?>(.*?)\s*</span\s*>",
-        lambda m: re.sub(r"\s+", " ", m.group(1)),
-        title,
-    )
-    # Replace <br/> by comma space (it is used to express alternatives in some
-    # declensions)
-    title = re.sub(r"(?si)\s*<br\s*/?>\n*", "\n", title)
-    # Remove divs with floatright class (generated e.g. by {{ja-kanji|...}})
-    title = re.sub(
-        r'(?si)<div\b[^>]*?\bclass="[^"]*?\bfloatright\b[^>]*?>'
-        r"((<div\b(<div\b.*?</div\s*>|.)*?</div>)|.)*?"
-        r"</div\s*>",
-        "",
-        title,
-    )
-    # Remove divs with float: attribute
-    title = re.sub(
-        r'(?si)<div\b[^>]*?\bstyle="[^"]*?\bfloat:[^>]*?>'
-        r"((<div\b(<div\b.*?</div\s*>|.)*?</div>)|.)*?"
-        r"</div\s*>",
-        "",
-        title,
-    )
-    # Remove <sup> with previewonly class (generated e.g. by {{taxlink|...}})
-    title = re.sub(
-        r'(?si)<sup\b[^>]*?\bclass="[^"<>]*?'
-        r"\bpreviewonly\b[^>]*?>"
-        r".+?</sup\s*>",
-        "",
-        title,
-    )
-    # Remove <strong class="error">...</strong>
-    title = re.sub(
-        r'(?si)<strong\b[^>]*?\bclass="[^"]*?\berror\b[^>]*?>'
-        r".+?</strong\s*>",
-        "",
-        title,
-    )
-    # Change <div> and </div> to newlines.  Ditto for tr, li, table, dl, ul, ol
-    title = re.sub(r"(?si)</?(div|tr|li|table|dl|ul|ol)\b[^>]*>", "\n", title)
-    # Change <dt>, <dd>, </dt> and </dd> into newlines;
-    # these generate new rows/lines.
-    title = re.sub(r"(?i)</?d[dt]\s*>", "\n", title)
-    # Change <td> </td> to spaces.  Ditto for th.
-    title = re.sub(r"(?si)</?(td|th)\b[^>]*>", " ", title)
-    # Change <sup> ... </sup> to ^
-    title = re.sub(r"(?si)<sup\b[^>]*>\s*</sup\s*>", "", title)
-    title = re.sub(r"(?si)<sup\b[^>]*>(.*?)</sup\s*>", repl_1_sup, title)
-    # Change <sub> ... </sub> to _
-    title = re.sub(r"(?si)<sub\b[^>]*>\s*</sub\s*>", "", title)
-    title = re.sub(r"(?si)<sub\b[^>]*>(.*?)</sub\s*>", repl_1_sub, title)
-    # Change <chem> ... </chem> using subscripts for digits
-    title = re.sub(r"(?si)<chem\b[^>]*>(.*?)</chem\s*>", repl_1_chem, title)
-    # Change <math> ... </math> using special formatting.
-    title = re.sub(r"(?si)<math\b[^>]*>(.*?)</math\s*>", repl_1_math, title)
-    # Change <syntaxhighlight> ... </syntaxhighlight> using special formatting.
-    title = re.sub(
-        r"(?si)<syntaxhighlight\b[^>]*>(.*?)" r"</syntaxhighlight\s*>",
-        repl_1_syntaxhighlight,
-        title,
-    )
-    # Remove any remaining HTML tags.
-    if not no_html_strip:
-        title = re.sub(r"(?s)<[/!a-zA-Z][^>]*>", "", title)
-        title = re.sub(r"(?s)</[^>]+>", "", title)
-    else:
-        # Strip <noinclude/> anyway
-        title = re.sub(r"(?si)<noinclude\s*/\s*>", "", title)
-    # Replace [...]
-    title = re.sub(r"(?s)\[\s*\.\.\.\s*\]", "…", title)
-    # Remove http links in superscript
-    title = re.sub(r"\^\(\[?(https?:)?//[^]()]+\]?\)", "", title)
-    # Remove any edit links to local pages
-    title = re.sub(r"\[//[^]\s]+\s+edit\s*\]", "", title)
-    # Replace links by their text
-
-    category_ns_data: NamespaceDataEntry
-    # XXX "Category" -> config variable for portability
-    category_ns_data = wxr.wtp.NAMESPACE_DATA.get("Category", {})  # type: ignore[typeddict-item]
-    # Fail if we received empty dict from .get()
-    category_ns_names = {"Category", category_ns_data["name"]} | set(
-        category_ns_data["aliases"]
-    )
-    category_names_pattern = rf"(?:{'|'.join(category_ns_names)})"
-    while True:
-        # Links may be nested, so keep replacing until there is no more change.
-        orig = title
-        title = re.sub(
-            rf"(?si)\s*\[\[\s*{category_names_pattern}\s*:\s*([^]]+?)\s*\]\]",
-            "",
-            title,
-        )
-        title = re.sub(
-            r"(?s)\[\[\s*:?([^]|#<>:]+?)\s*(#[^][|<>]*?)?\]\]", repl_1, title
-        )
-        title = re.sub(
-            r"(?s)\[\[\s*(([\w\d]+)\s*:)?\s*([^][#|<>]+?)"
-            r"\s*(#[^][|]*?)?\|?\]\]",
-            repl_link,
-            title,
+    if "<" in title:
+        # Remove second reference tags (<ref name="ref_name"/>)
+        title = REF_NAME_RE.sub("", title)
+        # Remove references (<ref>...</ref>).
+        title = REF_RE.sub("", title)
+        # Replace <span>...</span> by stripped content without newlines
+        title = SPAN_RE.sub(
+            lambda m: WHITESPACE_RE.sub(" ", m.group(1)), title
         )
-        title = re.sub(
-            r"(?s)\[\[\s*([^][|<>]+?)\s*\|"
-            r"\s*(([^][|]|\[[^]]*\])+?)"
-            r"(\s*\|\s*(([^][|]|\[[^]]*\])+?))*\s*\|*\]\]",
-            repl_link_bars,
-            title,
-        )
-        if title == orig:
-            break
-    # Replace remaining HTML links by the URL.
-    while True:
-        orig = title
-        title = re.sub(
-            r"\[\s*((https?:|mailto:)?//([^][]+?))\s*\]", repl_exturl, title
-        )
-        if title == orig:
-            break
+        # Replace <br/> by comma space (it is used to express alternatives
+        # in some declensions)
+        title = BR_RE.sub("\n", title)
+        # Remove divs with floatright class (generated e.g. by
+        # {{ja-kanji|...}})
+        title = FLOATRIGHT_DIV_RE.sub("", title)
+        # Remove divs with float: attribute
+        title = FLOAT_DIV_RE.sub("", title)
+        # Remove <sup> with previewonly class (generated e.g. by
+        # {{taxlink|...}})
+        title = PREVIEWONLY_SUP_RE.sub("", title)
+        # Remove <strong class="error">...</strong>
+        title = ERROR_STRONG_RE.sub("", title)
+        # Change <div> and </div> to newlines.  Ditto for tr, li, table, dl,
+        # ul, ol
+        title = BLOCK_TAG_RE.sub("\n", title)
+        # Change <dt>, <dd>, </dt> and </dd> into newlines;
+        # these generate new rows/lines.
+        title = DD_DT_TAG_RE.sub("\n", title)
+        # Change <td> </td> to spaces.  Ditto for th.
+        title = CELL_TAG_RE.sub(" ", title)
+        # Change <sup> ... </sup> to ^
+        title = EMPTY_SUP_RE.sub("", title)
+        title = SUP_RE.sub(repl_1_sup, title)
+        # Change <sub> ... </sub> to _
+        title = EMPTY_SUB_RE.sub("", title)
+        title = SUB_RE.sub(repl_1_sub, title)
+        # Change <chem> ... </chem> using subscripts for digits
+        title = CHEM_RE.sub(repl_1_chem, title)
+        # Change <math> ... </math> using special formatting.
+        title = MATH_RE.sub(repl_1_math, title)
+        # Change <syntaxhighlight> ... </syntaxhighlight> using special
+        # formatting.
+        title = SYNTAXHIGHLIGHT_RE.sub(repl_1_syntaxhighlight, title)
+        # Remove any remaining HTML tags.
+        if not no_html_strip:
+            title = HTML_TAG_RE.sub("", title)
+            title = HTML_END_TAG_RE.sub("", title)
+        else:
+            # Strip <noinclude/> anyway
+            title = NOINCLUDE_RE.sub("", title)
+    if "[" in title:
+        # Replace [...]
+        title = ELLIPSIS_RE.sub("…", title)
+    if "^(" in title:
+        # Remove http links in superscript
+        title = SUP_URL_RE.sub("", title)
+    if "[" in title:
+        # Remove any edit links to local pages
+        title = EDIT_LINK_RE.sub("", title)
+        # Replace links by their text
+        category_link_pattern = category_link_re(wxr)
+        while True:
+            # Links may be nested, so keep replacing until there is no more
+            # change.
+            orig = title
+            title = category_link_pattern.sub("", title)
+            title = LINK_RE.sub(repl_1, title)
+            title = PREFIXED_LINK_RE.sub(repl_link, title)
+            title = LINK_BARS_RE.sub(repl_link_bars, title)
+            if title == orig:
+                break
+        # Replace remaining HTML links by the URL.
+        while True:
+            orig = title
+            title = EXTURL_RE.sub(repl_exturl, title)
+            if title == orig:
+                break
 
     # Remove italic and bold
-    title = remove_italic_and_bold(title)
+    if "'" in title:
+        title = remove_italic_and_bold(title)
 
     # Replace HTML entities
-    title = html.unescape(title)
-    title = title.replace("\xa0", " ")  # nbsp
-    # Remove left-to-right and right-to-left, zero-with characters
-    title = re.sub(r"[\u200e\u200f\u200b\u200d\u200c\ufeff]", "", title)
-    # Replace whitespace sequences by a single space.
-    title = re.sub(r"[ \t\r]+", " ", title)
-    title = re.sub(r" *\n+", "\n", title)
-    # Eliminate spaces around ellipsis in brackets
-    title = re.sub(r"\[\s*…\s*\]", "[…]", title)
-
-    # This unicode quote seems to be used instead of apostrophe quite randomly
-    # (about 4% of apostrophes in English entries, some in Finnish entries).
-    # title = re.sub("\u2019", "'", title)  # Note: no r"..." here!
-    # Replace strange unicode quotes with normal quotes
-    # title = re.sub(r"”", '"', title)
-    # Replace unicode long dash by normal dash
-    # title = re.sub(r"–", "-", title)
-
-    # Remove whitespace before periods and commas etc
-    # XXX we might re-enable this, now trying without as it is removing some
-    # instances where we would want to leave the space
-    # title = re.sub(r" ([.,;:!?)])", repl_1, title)
-    # Strip surrounding whitespace.
-    if not no_strip:
-        title = title.strip()
-    # Normalize different ways of writing accents into the NFC canonical form
-    title = unicodedata.normalize("NFC", title)
-    return title
+    if "&" in title:
+        title = html.unescape(title)
+    return clean_plain_value(title, no_strip)
 
 
 def clean_template_args(
@@ -0,0 +1,234 @@
+# Writing the output entries to a Parquet file.  The Arrow schema is
+# derived from the `WordEntry` pydantic model in the `models.py` file of the
+# edition extractor (the same models `tools/generate_schema.py` uses), or
+# from the `WordData` TypedDict of the English extractor.  Top-level scalar
+# fields become columns, lists of models (senses, forms, translations...)
+# become lists of structs.  Fields that can't be represented with a fixed
+# type, like free-form dicts of template arguments, are left out.  The
+# "title" and "redirect" keys of hard redirect entries are added as columns.
+#
+# The JSON lines encoded in the worker processes are collected into batches
+# that are parsed with the Arrow JSON reader and written as row groups, so
+# the memory used doesn't depend on the size of the output.  When a batch
+# has entries that don't match the schema, its lines are parsed one at a
+# time and those entries are logged and left out.
+
+import collections.abc
+import io
+import json
+import types
+from typing import (
+    Literal,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+    is_typeddict,
+)
+
+from pydantic import BaseModel
+
+from .import_utils import import_extractor_module
+from .wxr_logging import logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.json as pa_json
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None  # type: ignore[assignment]
+
+PARQUET_SUFFIX = ".parquet"
+REDIRECT_FIELDS = ("title", "redirect", "pos")
+
+
+def arrow_schema(lang_code: str) -> "pa.Schema":
+    """Returns the Arrow schema of the entries of an edition."""
+    models = import_extractor_module(lang_code, "models")
+    if models is not None:
+        word_type = models.WordEntry
+    elif lang_code == "en":
+        from .extractor.en.type_utils import WordData
+
+        word_type = WordData
+    else:
+        raise RuntimeError(f"No data model for {lang_code} edition")
+    struct_type = arrow_type(word_type, set())
+    assert isinstance(struct_type, pa.StructType)
+    fields = list(struct_type)
+    # Hard redirect pages are written as entries with only the "title",
+    # "redirect" and "pos" keys, most models don't have the first two
+    names = {field.name for field in fields}
+    for name in REDIRECT_FIELDS:
+        if name not in names:
+            fields.append(pa.field(name, pa.string()))
+    return pa.schema(fields)
+
+
+def arrow_type(  # type: ignore[no-untyped-def]
+    annotation, parents: set[type]
+) -> "pa.DataType | None":
+    """Returns the Arrow type of a type annotation, or None if the type
+    can't be converted.  `parents` are the models containing the
+    annotation, recursive models can't be converted."""
+    if annotation is str:
+        return pa.string()
+    if annotation is bool:
+        return pa.bool_()
+    if annotation is int:
+        return pa.int64()
+    if annotation is float:
+        return pa.float64()
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+    if origin is Literal:
+        return arrow_type(type(args[0]), parents)
+    if origin in (Union, types.UnionType):
+        return same_arrow_type(
+            [arg for arg in args if arg is not type(None)], parents
+        )
+    if origin in (
+        list,
+        tuple,
+        set,
+        frozenset,
+        collections.abc.Sequence,
+        collections.abc.Set,
+    ):
+        item_type = same_arrow_type(
+            [arg for arg in args if arg is not Ellipsis], parents
+        )
+        return pa.list_(item_type) if item_type is not None else None
+    if annotation in parents:
+        return None
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        fields = {
+            name: field.annotation
+            for name, field in annotation.model_fields.items()
+            if not field.exclude
+        }
+    elif is_typeddict(annotation):
+        fields = get_type_hints(annotation)
+    else:
+        return None  # dict, Any...
+    struct_fields = []
+    for name, field_annotation in fields.items():
+        field_type = arrow_type(field_annotation, parents | {annotation})
+        if field_type is not None:
+            struct_fields.append(pa.field(name, field_type))
+    return pa.struct(struct_fields) if len(struct_fields) > 0 else None
+
+
+def same_arrow_type(
+    annotations: list, parents: set[type]
+) -> "pa.DataType | None":
+    """Returns the Arrow type of the annotations if they all have the same
+    type."""
+    arrow_types = [arrow_type(a, parents) for a in annotations]
+    if len(arrow_types) == 0 or arrow_types[0] is None:
+        return None
+    if any(t != arrow_types[0] for t in arrow_types[1:]):
+        return None
+    return arrow_types[0]
+
+
+class ColumnarWriter(io.BufferedIOBase):
+    """Binary file object that writes the JSON lines written to it to a
+    Parquet file, in row groups of about `batch_size` bytes of JSON."""
+
+    def __init__(
+        self,
+        path: str,
+        schema: "pa.Schema",
+        batch_size: int = 64 * 1024 * 1024,
+    ):
+        self.schema = schema
+        self.batch_size = batch_size
+        self.pending = bytearray()
+        self.writer = pq.ParquetWriter(path, schema, compression="zstd")
+        self.parse_options = pa_json.ParseOptions(
+            explicit_schema=schema, unexpected_field_behavior="ignore"
+        )
+        # An entry must fit in a block
+        self.read_options = pa_json.ReadOptions(block_size=16 * 1024 * 1024)
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:  # type: ignore[no-untyped-def]
+        self.pending += data
+        if len(self.pending) >= self.batch_size:
+            end = self.pending.rfind(b"\n") + 1
+            self.write_batch(self.pending[:end])
+            del self.pending[:end]
+        return len(data)
+
+    def write_batch(self, data: bytearray) -> None:
+        if len(data) == 0:
+            return
+        try:
+            table = self.read_table(data)
+        except pa.ArrowInvalid:
+            table = self.read_valid_lines(data)
+        self.writer.write_table(table)
+
+    def read_table(self, data: bytes | bytearray) -> "pa.Table":
+        return pa_json.read_json(
+            io.BytesIO(data),
+            read_options=self.read_options,
+            parse_options=self.parse_options,
+        )
+
+    def read_valid_lines(self, data: bytearray) -> "pa.Table":
+        """Parses the lines of a batch one by one, and drops the entries
+        that don't match the schema."""
+        valid_lines = []
+        for line in data.splitlines(keepends=True):
+            if line.strip() == b"":
+                continue
+            try:
+                self.read_table(line)
+            except pa.ArrowInvalid as e:
+                logger.error(
+                    f"Entry {entry_name(line)} doesn't match the Parquet "
+                    f"schema, skipping it: {e}"
+                )
+                continue
+            valid_lines.append(line)
+        if len(valid_lines) == 0:
+            return self.schema.empty_table()
+        return self.read_table(b"".join(valid_lines))
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            self.write_batch(self.pending)
+            self.pending.clear()
+        finally:
+            try:
+                # Writes the footer of the entries written so far
+                self.writer.close()
+            finally:
+                super().close()
+
+
+def entry_name(line: bytes) -> str:
+    try:
+        data = json.loads(line)
+    except ValueError:
+        return repr(line[:50])
+    if not isinstance(data, dict):
+        return repr(line[:50])
+    return repr(data.get("word") or data.get("title") or "")
+
+
+def open_columnar_output(path: str, lang_code: str) -> io.TextIOWrapper:
+    """Opens a Parquet output file for the entries of an edition, the
+    entries must be written as JSON lines."""
+    if pa is None:
+        raise RuntimeError("Install pyarrow to write Parquet files")
+    return io.TextIOWrapper(
+        ColumnarWriter(path, arrow_schema(lang_code)),  # type: ignore[arg-type]
+        encoding="utf-8",
+    )
@@ -0,0 +1,148 @@
+# Compressing the output file while it is written.  The output is
+# compressed on a separate thread, so the compression runs in parallel with
+# the extraction (the compression modules release the GIL).
+
+import bz2
+import gzip
+import io
+import lzma
+import queue
+import threading
+from pathlib import Path
+from typing import BinaryIO, TextIO
+
+COMPRESSED_SUFFIXES = (".gz", ".xz", ".bz2", ".zst")
+
+
+def compressed_suffix(path: str) -> str | None:
+    """Returns the compression suffix of `path` or None if the file is not
+    compressed."""
+    suffix = Path(path).suffix
+    if suffix in COMPRESSED_SUFFIXES:
+        return suffix
+    return None
+
+
+def import_zstandard():  # type: ignore[no-untyped-def]
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("Install the zstandard package to use .zst files")
+    return zstandard
+
+
+def compressor(suffix: str, raw_f: BinaryIO) -> BinaryIO:
+    """Returns a file object that compresses the data written to it to
+    `raw_f`, closing it doesn't close `raw_f`."""
+    if suffix == ".gz":
+        return gzip.GzipFile(fileobj=raw_f, mode="wb")  # type: ignore[return-value]
+    if suffix == ".xz":
+        return lzma.LZMAFile(raw_f, "wb")  # type: ignore[return-value]
+    if suffix == ".bz2":
+        return bz2.BZ2File(raw_f, "wb")  # type: ignore[return-value]
+    if suffix == ".zst":
+        zstandard = import_zstandard()
+        return zstandard.ZstdCompressor().stream_writer(raw_f, closefd=False)
+    raise ValueError(f"Unknown compression suffix {suffix!r}")
+
+
+class CompressedWriter(io.BufferedIOBase):
+    """Binary file object that collects the written data in chunks of
+    `chunk_size` bytes and compresses them to `raw_f` on a writer thread.
+    At most `queue_size` chunks are waiting to be compressed, writing blocks
+    when the queue is full.  Errors on the writer thread are raised by the
+    next `write()` or `close()`."""
+
+    def __init__(
+        self,
+        raw_f: BinaryIO,
+        suffix: str,
+        chunk_size: int = 1024 * 1024,
+        queue_size: int = 64,
+    ):
+        self.raw_f = raw_f
+        self.compress_f = compressor(suffix, raw_f)
+        self.chunk_size = chunk_size
+        self.pending = bytearray()
+        self.queue: queue.Queue[bytes | None] = queue.Queue(queue_size)
+        self.error: BaseException | None = None
+        self.thread = threading.Thread(
+            target=self.compress_chunks, name="compressed-output", daemon=True
+        )
+        self.thread.start()
+
+    def compress_chunks(self) -> None:
+        while (chunk := self.queue.get()) is not None:
+            # After an error the chunks are only taken from the queue, so
+            # `put()` doesn't block
+            if self.error is None:
+                try:
+                    self.compress_f.write(chunk)
+                except BaseException as e:
+                    self.error = e
+        try:
+            self.compress_f.close()
+        except BaseException as e:
+            self.error = self.error or e
+
+    def check_error(self) -> None:
+        if self.error is not None:
+            raise OSError("Compressing the output failed") from self.error
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:  # type: ignore[no-untyped-def]
+        self.check_error()
+        self.pending += data
+        if len(self.pending) >= self.chunk_size:
+            self.queue.put(bytes(self.pending))
+            self.pending.clear()
+        return len(data)
+
+    def flush(self) -> None:
+        # Only passes the data to the writer thread, a compressed file can
+        # not be resumed from a flushed position anyway
+        if len(self.pending) > 0 and not self.closed:
+            self.queue.put(bytes(self.pending))
+            self.pending.clear()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            self.flush()
+            self.queue.put(None)
+            self.thread.join()
+            self.raw_f.close()
+            self.check_error()
+        finally:
+            super().close()
+
+
+def open_output(path: str, suffix: str | None, mode: str = "w") -> TextIO:
+    """Opens the output file `path` for writing text in UTF-8.  The data is
+    compressed if `suffix` (from `compressed_suffix()` of the final output
+    path) is not None."""
+    if suffix is None:
+        return open(path, mode, buffering=1024 * 1024, encoding="utf-8")
+    raw_f = open(path, mode + "b")
+    return io.TextIOWrapper(
+        CompressedWriter(raw_f, suffix),  # type: ignore[arg-type]
+        encoding="utf-8",
+    )
+
+
+def open_input(path: str) -> TextIO:
+    """Opens a text file that may be compressed for reading."""
+    suffix = compressed_suffix(path)
+    if suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    if suffix == ".xz":
+        return lzma.open(path, "rt", encoding="utf-8")
+    if suffix == ".bz2":
+        return bz2.open(path, "rt", encoding="utf-8")
+    if suffix == ".zst":
+        zstandard = import_zstandard()
+        return zstandard.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
@@ -65,6 +65,8 @@ class WiktionaryConfig:
         "extract_ns_names",
         "allowed_html_tags",
         "parser_function_aliases",
+        "counters",
+        "trusted_models",
     )
 
     def __init__(
@@ -82,6 +84,7 @@ class WiktionaryConfig:
         capture_descendants=True,
         verbose=False,
         expand_tables=False,
+        trusted_models=False,
     ):
         if capture_language_codes is not None:
             assert isinstance(capture_language_codes, (list, tuple, set))
@@ -96,6 +99,7 @@ class WiktionaryConfig:
         assert capture_compounds in (True, False)
         assert capture_redirects in (True, False)
         assert capture_etymologies in (True, False)
+        assert trusted_models in (True, False)
         self.dump_file_lang_code = dump_file_lang_code
         self.capture_language_codes = capture_language_codes
         self.capture_translations = capture_translations
@@ -109,11 +113,18 @@ class WiktionaryConfig:
         self.capture_descendants = capture_descendants
         self.verbose = verbose
         self.expand_tables = expand_tables
+        # Don't validate the assignments of the pydantic models, see
+        # trusted_models.py
+        self.trusted_models = trusted_models
         # Some fields for statistics
         self.num_pages = 0
         self.language_counts: dict[str, int] = collections.defaultdict(int)
         self.pos_counts: dict[str, int] = collections.defaultdict(int)
         self.section_counts: dict[str, int] = collections.defaultdict(int)
+        # Counters updated by extractors in worker processes, sent to the
+        # parent process with the page return data and added up in
+        # `merge_return()`
+        self.counters: dict[str, int] = collections.Counter()
         # Some fields related to errors
         # The word currently being processed.
         self.word: Optional[str] = None
@@ -145,6 +156,8 @@ class WiktionaryConfig:
         #         self.pos_counts[k] += v
         #     for k, v in ret["section_counts"].items():
         #         self.section_counts[k] += v
+        for k, v in ret.get("counters", {}).items():  # type: ignore[attr-defined]
+            self.counters[k] += v
         if "errors" in ret and len(self.errors) < 100_000:
             self.errors.extend(ret.get("errors", []))
         if "warnings" in ret and len(self.warnings) < 100_000:
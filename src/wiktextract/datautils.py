@@ -5,6 +5,8 @@ import re
 from collections import defaultdict
 from typing import Any, Iterable, Optional
 
+from .title_index import page_exists
+
 # Keys in ``data`` that can only have string values (a list of them)
 STR_KEYS = frozenset({"tags", "glosses"})
 # Keys in ``data`` that can only have dict values (a list of them)
@@ -122,7 +124,7 @@ def split_slashes(wxr, text):
     split is to be interpreted, trying to prefer longer forms that can be
     found in the dictionary."""
     text = text.strip()
-    if wxr.wtp.page_exists(text):
+    if page_exists(wxr, text):
         return [text]
 
     text = text.replace("／", "/")
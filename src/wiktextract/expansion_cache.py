@@ -0,0 +1,385 @@
+# Cache of template expansions shared by the pages of a worker process.
+# Many pages call the same templates with the same arguments, for example
+# `{{m|en|...}}` or headword templates, and expanding them again with the
+# Lua modules they use is a large part of the second phase.
+#
+# `Wtp.expand()` is wrapped to look up each template call in an LRU cache
+# keyed by the template title and its expanded arguments.  The templates and
+# modules a template depends on are found from their bodies like in
+# `incremental.py`:
+#
+# - templates that read the page title or the time (`{{PAGENAME}}`,
+#   `mw.title.getCurrentTitle()`, `os.time()`...) are cached per page
+# - templates that read other pages (`#ifexist`, `.exists`,
+#   `:getContent()`) are only cached in memory, for the current run
+# - other templates are pure and are also saved in the optional on-disk
+#   cache shared by the workers and by later runs; their key includes a
+#   digest of the bodies of all the templates and modules they depend on
+#
+# Calls with a caller `template_fn` or `post_template_fn` aren't cached, the
+# callers may need to see the templates called by the expansion.  Messages
+# that an expansion would have logged are only logged the first time.
+
+import hashlib
+import heapq
+import json
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from functools import wraps
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import NamedTuple
+
+from wikitextprocessor import Wtp
+from wikitextprocessor.common import MAGIC_FIRST, MAGIC_LAST
+
+from .incremental import TemplateCalls, hash_text
+from .wxr_logging import logger
+
+# Default number of cached expansions with `--expansion-cache`
+DEFAULT_CACHE_ENTRIES = 100_000
+DISK_CACHE_FILE = "expansions.sqlite"
+
+PAGE_DEPENDENT_RE = re.compile(
+    r"\{\{\s*(?:[A-Z]*PAGENAMEE?|NAMESPACE|CURRENT|LOCAL|REVISION)"
+    r"|getCurrentTitle|\bos\.(?:time|date|clock)\b|\bmath\.random\b"
+)
+DATABASE_DEPENDENT_RE = re.compile(
+    r"#ifexist|\.exists\b|getContent|redirectTarget|PAGESIN"
+)
+# Magic cookies refer to the text saved for the current page
+MAGIC_RE = re.compile(f"[{chr(MAGIC_FIRST)}-{chr(MAGIC_LAST)}]")
+
+# Template title, arguments, and the page title for page dependent
+# templates
+CacheKey = tuple[str, tuple[tuple[str, str], ...], str | None]
+# Hits, misses and the expansion time saved by the hits in seconds
+TemplateStats = list
+
+
+class TemplateInfo(NamedTuple):
+    # The expansion depends on the page title or the time
+    page_dependent: bool
+    # The expansion only depends on the template and module bodies
+    pure: bool
+    # Digest of the template and everything it depends on
+    digest: bytes
+
+
+class ExpansionCache:
+    """LRU cache of at most `max_entries` template expansions, with an
+    optional on-disk cache of the pure templates in `cache_dir`."""
+
+    def __init__(
+        self, wtp: Wtp, max_entries: int, cache_dir: str | None = None
+    ) -> None:
+        self.wtp = wtp
+        self.calls = TemplateCalls(wtp)
+        self.max_entries = max_entries
+        # Expansions and the seconds they took
+        self.entries: OrderedDict[CacheKey, tuple[str, float]] = (
+            OrderedDict()
+        )
+        self.templates: dict[str, TemplateInfo] = {}
+        self.stats: dict[str, TemplateStats] = {}
+        # Template calls being expanded: arguments id, key, start time
+        self.started: list[tuple[int, CacheKey, float]] = []
+        self.disk = (
+            DiskCache(cache_dir, wtp.lang_code)
+            if cache_dir is not None
+            else None
+        )
+
+    def wrap_functions(
+        self,
+        template_fn: Callable | None,
+        post_template_fn: Callable | None,
+    ) -> tuple[Callable | None, Callable | None]:
+        """Returns the functions passed to `Wtp.expand()` to look up and
+        save the expansions."""
+        if template_fn is not None or post_template_fn is not None:
+            return template_fn, post_template_fn
+        return self.cached_template_fn, self.save_expansion_fn
+
+    def cached_template_fn(self, name: str, ht: dict) -> str | None:
+        key = self.cache_key(name, ht)
+        if key is None:
+            return None
+        cached = self.entries.get(key)
+        if cached is not None:
+            self.entries.move_to_end(key)
+        elif self.disk is not None and key[2] is None:
+            info = self.templates[key[0]]
+            if info.pure:
+                cached = self.disk.get(key, info.digest)
+                if cached is not None:
+                    self.add(key, *cached)
+        if cached is None:
+            self.started.append((id(ht), key, time.perf_counter()))
+            return None
+        stats = self.template_stats(key[0])
+        stats[0] += 1
+        stats[2] += cached[1]
+        return cached[0]
+
+    def save_expansion_fn(
+        self, name: str, ht: dict, expansion: str
+    ) -> str | None:
+        ht_id = id(ht)
+        for i in range(len(self.started) - 1, -1, -1):
+            if self.started[i][0] == ht_id:
+                _, key, start = self.started.pop(i)
+                break
+        else:
+            return None
+        self.template_stats(key[0])[1] += 1
+        if MAGIC_RE.search(expansion) is not None:
+            return None
+        seconds = time.perf_counter() - start
+        self.add(key, expansion, seconds)
+        info = self.templates[key[0]]
+        if self.disk is not None and info.pure and key[2] is None:
+            self.disk.add(key, info.digest, expansion, seconds)
+        return None
+
+    def cache_key(self, name: str, ht: dict) -> CacheKey | None:
+        title = self.calls.template_title(name)
+        if title is None or title.startswith(self.calls.module_prefix):
+            return None
+        args = []
+        for k, v in ht.items():
+            if not isinstance(v, str) or MAGIC_RE.search(v) is not None:
+                return None
+            args.append((str(k), v))
+        args.sort()
+        info = self.template_info(title)
+        return (
+            title,
+            tuple(args),
+            self.wtp.title if info.page_dependent else None,
+        )
+
+    def add(self, key: CacheKey, expansion: str, seconds: float) -> None:
+        self.entries[key] = (expansion, seconds)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def template_stats(self, title: str) -> TemplateStats:
+        stats = self.stats.get(title)
+        if stats is None:
+            stats = self.stats[title] = [0, 0, 0.0]
+        return stats
+
+    def template_info(self, title: str) -> TemplateInfo:
+        info = self.templates.get(title)
+        if info is None:
+            info = self.analyze_template(title, set())
+        return info
+
+    def analyze_template(
+        self, title: str, in_progress: set[str]
+    ) -> TemplateInfo:
+        """Finds if a template or module depends on the page or on other
+        pages from its body and the bodies of the templates and modules it
+        calls."""
+        info = self.templates.get(title)
+        if info is not None:
+            return info
+        if title in in_progress:
+            # The templates of a call cycle are analyzed before the whole
+            # cycle is known, so they aren't cached across pages
+            return TemplateInfo(True, False, hash_text("cycle", title))
+        page = self.wtp.get_page(
+            title,
+            self.calls.module_ns_id
+            if title.startswith(self.calls.module_prefix)
+            else self.calls.template_ns_id,
+        )
+        if page is None:
+            info = TemplateInfo(False, True, hash_text("missing", title))
+            self.templates[title] = info
+            return info
+        in_progress.add(title)
+        body = page.body or ""
+        page_dependent = PAGE_DEPENDENT_RE.search(body) is not None
+        pure = not page_dependent and DATABASE_DEPENDENT_RE.search(body) is None
+        h = hashlib.blake2b(hash_text(title, body, page.redirect_to))
+        for callee in sorted(self.calls.page_calls(page)):
+            callee_info = self.analyze_template(callee, in_progress)
+            page_dependent = page_dependent or callee_info.page_dependent
+            pure = pure and callee_info.pure
+            h.update(callee_info.digest)
+        in_progress.discard(title)
+        info = TemplateInfo(page_dependent, pure, h.digest())
+        self.templates[title] = info
+        return info
+
+    def start_page(self) -> None:
+        # Expansions interrupted by an exception
+        self.started.clear()
+
+    def take_stats(self) -> dict[str, TemplateStats]:
+        """Returns the statistics since the last call, to be sent to the
+        parent process with the page data."""
+        stats = self.stats
+        self.stats = {}
+        return stats
+
+    def flush(self) -> None:
+        if self.disk is not None:
+            self.disk.flush()
+
+
+class DiskCache:
+    """Expansions of pure templates in an SQLite database shared by the
+    worker processes.  The database should be removed after changing the
+    code of wikitextprocessor or of the template overrides without
+    changing the package versions."""
+
+    def __init__(self, cache_dir: str, lang_code: str) -> None:
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(Path(cache_dir) / DISK_CACHE_FILE)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA busy_timeout = 60000")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS expansions "
+            "(key BLOB PRIMARY KEY, expansion TEXT, seconds REAL) "
+            "WITHOUT ROWID"
+        )
+        self.conn.commit()
+        versions = []
+        for package in ("wikitextprocessor", "wiktextract"):
+            try:
+                versions.append(version(package))
+            except PackageNotFoundError:
+                versions.append("")
+        # Template overrides are part of wiktextract
+        self.version = hash_text(*versions, lang_code)
+        self.pending: list[tuple[bytes, str, float]] = []
+
+    def key_digest(self, key: CacheKey, digest: bytes) -> bytes:
+        h = hashlib.blake2b(self.version + digest, digest_size=20)
+        h.update(json.dumps(key[1], ensure_ascii=False).encode("utf-8"))
+        return h.digest()
+
+    def get(self, key: CacheKey, digest: bytes) -> tuple[str, float] | None:
+        row = self.conn.execute(
+            "SELECT expansion, seconds FROM expansions WHERE key = ?",
+            (self.key_digest(key, digest),),
+        ).fetchone()
+        return row
+
+    def add(
+        self, key: CacheKey, digest: bytes, expansion: str, seconds: float
+    ) -> None:
+        self.pending.append((self.key_digest(key, digest), expansion, seconds))
+
+    def flush(self) -> None:
+        if len(self.pending) == 0:
+            return
+        try:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO expansions VALUES(?, ?, ?)",
+                    self.pending,
+                )
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Can't save template expansions: {e}")
+        self.pending.clear()
+
+
+def install_expansion_cache(wtp: Wtp, cache: ExpansionCache | None) -> None:
+    """Sets the cache used by `Wtp.expand()` in this process, None disables
+    it."""
+    global active_cache
+    active_cache = cache
+    wtp_class = type(wtp)
+    if not getattr(wtp_class.expand, "caches_expansions", False):
+        wtp_class.expand = cached_expand(wtp_class.expand)  # type: ignore[method-assign]
+
+
+active_cache: ExpansionCache | None = None
+# Keyword arguments of `Wtp.expand()` that don't change the expansion
+CACHED_EXPAND_ARGS = {"template_fn", "post_template_fn", "quiet", "timeout"}
+
+
+def cached_expand(expand: Callable) -> Callable:
+    @wraps(expand)
+    def wrapper(self, text, *args, **kwargs):
+        if (
+            active_cache is None
+            or len(args) > 0
+            or not CACHED_EXPAND_ARGS.issuperset(kwargs)
+        ):
+            return expand(self, text, *args, **kwargs)
+        kwargs["template_fn"], kwargs["post_template_fn"] = (
+            active_cache.wrap_functions(
+                kwargs.get("template_fn"), kwargs.get("post_template_fn")
+            )
+        )
+        return expand(self, text, **kwargs)
+
+    wrapper.caches_expansions = True  # type: ignore[attr-defined]
+    return wrapper
+
+
+class ExpansionCacheStats:
+    """Sums the cache statistics of the workers, logs the templates with
+    the most time saved and optionally writes all the statistics to a JSON
+    file."""
+
+    def __init__(self, path: str | None = None, top_n: int = 20) -> None:
+        self.path = path
+        self.top_n = top_n
+        self.stats: dict[str, TemplateStats] = {}
+
+    def add(self, page_stats: dict[str, TemplateStats]) -> None:
+        for title, (hits, misses, saved) in page_stats.items():
+            stats = self.stats.get(title)
+            if stats is None:
+                self.stats[title] = [hits, misses, saved]
+            else:
+                stats[0] += hits
+                stats[1] += misses
+                stats[2] += saved
+
+    def close(self) -> None:
+        if self.path is not None:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        title: {
+                            "hits": hits,
+                            "misses": misses,
+                            "saved": round(saved, 4),
+                        }
+                        for title, (hits, misses, saved) in sorted(
+                            self.stats.items()
+                        )
+                    },
+                    f,
+                    ensure_ascii=False,
+                    indent=2,
+                )
+        self.log_summary()
+
+    def log_summary(self) -> None:
+        hits = sum(stats[0] for stats in self.stats.values())
+        misses = sum(stats[1] for stats in self.stats.values())
+        if hits + misses == 0:
+            return
+        saved = sum(stats[2] for stats in self.stats.values())
+        logger.info(
+            f"Template expansion cache: {hits} hits, {misses} misses "
+            f"({hits / (hits + misses):.1%} hit rate), {saved:.1f}s saved"
+        )
+        for title, (hits, misses, saved) in heapq.nlargest(
+            self.top_n, self.stats.items(), key=lambda item: item[1][2]
+        ):
+            logger.info(
+                f"  {saved:.2f}s  {hits / (hits + misses):.1%} of "
+                f"{hits + misses}  {title}"
+            )
@@ -6,6 +6,7 @@ from wikitextprocessor.parser import LevelNode, NodeKind, TemplateNode, WikiNode
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from ...wxr_logging import logger
+from ..share import deep_copy_data
 from .etymology import extract_etymology
 from .example import extract_examples
 from .form import extracrt_form_section
@@ -164,7 +165,7 @@ def process_pos_section(
 
     if len(pos_data_list) == 0:
         return
-    page_data.append(base_data.model_copy(deep=True))
+    page_data.append(deep_copy_data(base_data))
     for pos_index, pos_data in enumerate(pos_data_list):
         pos = pos_data["pos"]
         for tag in pos_data.get("tags", []):
@@ -259,7 +260,7 @@ def process_umschrift_template(
 ) -> None:
     # https://de.wiktionary.org/wiki/Vorlage:Ähnlichkeiten_Umschrift
     # soft-redirect template, similar to en edition's "zh-see"
-    data = base_data.model_copy(deep=True)
+    data = deep_copy_data(base_data)
     data.pos = "soft-redirect"
     for key, value in template_node.template_parameters.items():
         if isinstance(key, int):
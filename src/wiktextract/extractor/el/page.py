@@ -8,6 +8,7 @@ from mediawiki_langcodes import code_to_name, name_to_code
 from wikitextprocessor.parser import LEVEL_KIND_FLAGS, NodeKind, WikiNode
 
 # Clean node takes a WikiNode+strings node or tree and gives you a cleanish text
+from wiktextract.extractor.share import deep_copy_data
 from wiktextract.page import clean_node, clean_value
 
 # The main context object to more easily share state of parsing between
@@ -235,7 +236,7 @@ def parse_page(
                     pos_ret := process_pos(
                         wxr,
                         pos_section,
-                        pos_base_data.model_copy(deep=True),
+                        deep_copy_data(pos_base_data),
                         prev_data,
                         pos,  # heading_name is the English pos
                         title,
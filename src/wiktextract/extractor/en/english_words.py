@@ -9,14 +9,10 @@
 import nltk  # type: ignore[import-untyped]
 from nltk.corpus import brown  # type: ignore[import-untyped]
 
+from ...table_cache import cached_table
+from . import form_descriptions_known_firsts
 from .form_descriptions_known_firsts import known_firsts  # w/ our additions
 
-# Download Brown corpus if not already downloaded
-try:
-    nltk.data.find("corpora/brown.zip")
-except LookupError:
-    nltk.download("brown", quiet=True)
-
 # English words added to the default set from Brown corpus.  Multi-word
 # expressions separated by spaces can also be added but must match the whole
 # text (they can be used when we don't want to add the components).
@@ -1941,14 +1937,30 @@ potentially_english_words = set(
 
 not_english_words = not_english_words_1 | potentially_english_words
 
+
+def build_english_words() -> set[str]:
+    # Download Brown corpus if not already downloaded
+    try:
+        nltk.data.find("corpora/brown.zip")
+    except LookupError:
+        nltk.download("brown", quiet=True)
+
+    return (
+        set(brown.words())
+        | known_firsts
+        |
+        # XXX the second words of species names add too much garbage
+        # now that we accept "english" more loosely.
+        # set(x for name in known_species for x in name.split()) |
+        additional_words
+    ) - not_english_words
+
+
 # Construct a set of (most) English words.  Multi-word expressions where we
 # do not want to include the components can also be put here space-separated.
-english_words = (
-    set(brown.words())
-    | known_firsts
-    |
-    # XXX the second words of species names add too much garbage
-    # now that we accept "english" more loosely.
-    # set(x for name in known_species for x in name.split()) |
-    additional_words
-) - not_english_words
+# Reading the Brown corpus is slow, the set is cached.
+english_words: set[str] = cached_table(
+    "english_words",
+    [__file__, form_descriptions_known_firsts.__file__],
+    build_english_words,
+)
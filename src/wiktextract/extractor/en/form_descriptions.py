@@ -18,7 +18,10 @@ from typing import (
 import Levenshtein
 from nltk import TweetTokenizer  # type:ignore[import-untyped]
 
+from ... import tags as tags_module
+from ... import topics as topics_module
 from ...datautils import data_append, data_extend, split_at_comma_semi
+from ...table_cache import cached_table
 from ...tags import (
     alt_of_tags,
     form_of_tags,
@@ -35,6 +38,7 @@ from ...tags import (
     xlat_head_map,
     xlat_tags_map,
 )
+from ...title_index import page_exists
 from ...topics import topic_generalize_map, valid_topics
 from ...wxr_context import WiktextractContext
 from .english_words import (
@@ -744,14 +748,14 @@ def add_to_valid_tree1(
     assert v is None or isinstance(v, (list, tuple, str))
     assert isinstance(valid_values, (set, dict))
     if not v:
-        add_to_valid_tree(valid_sequences, k, None)
+        add_to_valid_tree(tree, k, None)
         return []
     elif isinstance(v, str):
         v = [v]
     q = []
     for vv in v:
         assert isinstance(vv, str)
-        add_to_valid_tree(valid_sequences, k, vv)
+        add_to_valid_tree(tree, k, vv)
         vvs = vv.split()
         for x in vvs:
             q.append(x)
@@ -790,58 +794,130 @@ def add_to_valid_tree_mapping(
                 q.extend(qq)
 
 
-# Tree of sequences considered to be tags (includes sequences that are
-# mapped to something that becomes one or more valid tags)
-valid_sequences = ValidNode()
-sequences_with_slashes: set[str] = set()
-for tag in valid_tags:
-    # The basic tags used in our tag system; some are a bit weird, but easier
-    # to implement this with 'false' positives than filter out stuff no one else
-    # uses.
-    if "/" in tag:
-        sequences_with_slashes.add(tag)
-    add_to_valid_tree(valid_sequences, tag, tag)
-for tag in uppercase_tags:
-    hyphenated = re.sub(r"\s+", "-", tag)
-    if hyphenated in valid_tags:
-        print(
-            "DUPLICATE TAG: {} (from uppercase tag {!r})".format(
-                hyphenated, tag
+def build_valid_sequences() -> tuple[
+    ValidNode, set[str], dict[str, str], set[str]
+]:
+    """Builds the tree of valid tag and topic sequences.  Returns the tree,
+    the sequences that contain slashes and the tags and topics added to
+    `valid_tags` and `valid_topics`."""
+    valid_sequences = ValidNode()
+    old_tags = set(valid_tags)
+    old_topics = set(valid_topics)
+    sequences_with_slashes: set[str] = set()
+    for tag in valid_tags:
+        # The basic tags used in our tag system; some are a bit weird, but
+        # easier to implement this with 'false' positives than filter out
+        # stuff no one else uses.
+        if "/" in tag:
+            sequences_with_slashes.add(tag)
+        add_to_valid_tree(valid_sequences, tag, tag)
+    for tag in uppercase_tags:
+        hyphenated = re.sub(r"\s+", "-", tag)
+        if hyphenated in valid_tags:
+            print(
+                "DUPLICATE TAG: {} (from uppercase tag {!r})".format(
+                    hyphenated, tag
+                )
             )
+        assert hyphenated not in valid_tags
+        # Might as well, while we're here: Add hyphenated location tag.
+        valid_tags[hyphenated] = "dialect"
+        add_to_valid_tree(valid_sequences, hyphenated, hyphenated)
+    for tag in uppercase_tags:
+        hyphenated = re.sub(r"\s+", "-", tag)
+        # XXX Move to above loop? Or is this here for readability?
+        if "/" in tag:
+            sequences_with_slashes.add(tag)
+        add_to_valid_tree(valid_sequences, tag, hyphenated)
+    # xlat_tags_map!
+    add_to_valid_tree_mapping(
+        valid_sequences, xlat_tags_map, valid_tags, False
+    )
+    for k in xlat_tags_map:
+        if "/" in k:
+            sequences_with_slashes.add(k)
+    # Add topics to the same table, with all generalized topics also added
+    for topic in valid_topics:
+        assert " " not in topic
+        if "/" in topic:
+            sequences_with_slashes.add(topic)
+        add_to_valid_tree(valid_sequences, topic, topic)
+    # Let each original topic value stand alone.  These are not generally on
+    # valid_topics.  We add the original topics with spaces replaced by
+    # hyphens.
+    for topic in topic_generalize_map.keys():
+        hyphenated = topic.replace(" ", "-")
+        valid_topics.add(hyphenated)
+        if "/" in topic:
+            sequences_with_slashes.add(tag)
+        add_to_valid_tree(valid_sequences, topic, hyphenated)
+    # Add canonicalized/generalized topic values
+    add_to_valid_tree_mapping(
+        valid_sequences, topic_generalize_map, valid_topics, True
+    )
+    added_tags = {
+        tag: valid_tags[tag] for tag in valid_tags if tag not in old_tags
+    }
+    return (
+        valid_sequences,
+        sequences_with_slashes,
+        added_tags,
+        valid_topics - old_topics,
+    )
+
+
+def valid_node_to_tuple(node: ValidNode) -> tuple:
+    return (
+        node.end,
+        node.tags,
+        node.topics,
+        {w: valid_node_to_tuple(child) for w, child in node.children.items()},
+    )
+
+
+def valid_node_from_tuple(data: tuple) -> ValidNode:
+    end, tags, topics, children = data
+    return ValidNode(
+        end,
+        tags,
+        topics,
+        {w: valid_node_from_tuple(child) for w, child in children.items()},
+    )
+
+
+def build_valid_sequences_table() -> tuple:
+    valid_sequences, sequences_with_slashes, added_tags, added_topics = (
+        build_valid_sequences()
+    )
+    return (
+        valid_node_to_tuple(valid_sequences),
+        sequences_with_slashes,
+        added_tags,
+        added_topics,
+    )
+
+
+def load_valid_sequences() -> tuple[ValidNode, set[str]]:
+    """Returns the tree of valid sequences and the sequences that contain
+    slashes from the table cache, or builds them if the tag or topic
+    tables have changed."""
+    tree_data, sequences_with_slashes, added_tags, added_topics = (
+        cached_table(
+            "valid_sequences",
+            [__file__, tags_module.__file__, topics_module.__file__],
+            build_valid_sequences_table,
         )
-    assert hyphenated not in valid_tags
-    # Might as well, while we're here: Add hyphenated location tag.
-    valid_tags[hyphenated] = "dialect"
-    add_to_valid_tree(valid_sequences, hyphenated, hyphenated)
-for tag in uppercase_tags:
-    hyphenated = re.sub(r"\s+", "-", tag)
-    # XXX Move to above loop? Or is this here for readability?
-    if "/" in tag:
-        sequences_with_slashes.add(tag)
-    add_to_valid_tree(valid_sequences, tag, hyphenated)
-# xlat_tags_map!
-add_to_valid_tree_mapping(valid_sequences, xlat_tags_map, valid_tags, False)
-for k in xlat_tags_map:
-    if "/" in k:
-        sequences_with_slashes.add(k)
-# Add topics to the same table, with all generalized topics also added
-for topic in valid_topics:
-    assert " " not in topic
-    if "/" in topic:
-        sequences_with_slashes.add(topic)
-    add_to_valid_tree(valid_sequences, topic, topic)
-# Let each original topic value stand alone.  These are not generally on
-# valid_topics.  We add the original topics with spaces replaced by hyphens.
-for topic in topic_generalize_map.keys():
-    hyphenated = topic.replace(" ", "-")
-    valid_topics.add(hyphenated)
-    if "/" in topic:
-        sequences_with_slashes.add(tag)
-    add_to_valid_tree(valid_sequences, topic, hyphenated)
-# Add canonicalized/generalized topic values
-add_to_valid_tree_mapping(
-    valid_sequences, topic_generalize_map, valid_topics, True
-)
+    )
+    # Building the tree adds these, they are also needed when the tree is
+    # loaded from the cache
+    valid_tags.update(added_tags)
+    valid_topics.update(added_topics)
+    return valid_node_from_tuple(tree_data), sequences_with_slashes
+
+
+# Tree of sequences considered to be tags (includes sequences that are
+# mapped to something that becomes one or more valid tags)
+valid_sequences, sequences_with_slashes = load_valid_sequences()
 
 # Regex used to divide a decode candidate into parts that shouldn't
 # have their slashes turned into spaces
@@ -3214,7 +3290,7 @@ def parse_alt_or_inflection_of1(
         base = base[:-1].strip()
     while (
         base.endswith(".")
-        and not wxr.wtp.page_exists(base)
+        and not page_exists(wxr, base)
         and base not in gloss_template_args
     ):
         base = base[:-1].strip()
@@ -3223,7 +3299,7 @@ def parse_alt_or_inflection_of1(
         tags.append("conjecture")
     while (
         base.endswith(".")
-        and not wxr.wtp.page_exists(base)
+        and not page_exists(wxr, base)
         and base not in gloss_template_args
     ):
         base = base[:-1].strip()
@@ -3272,7 +3348,7 @@ def parse_alt_or_inflection_of1(
     for p in parts:
         # Check for some suspicious base forms
         m = re.search(r"[.,] |[{}()]", p)
-        if m and not wxr.wtp.page_exists(p):
+        if m and not page_exists(wxr, p):
             wxr.wtp.debug(
                 "suspicious alt_of/form_of with {!r}: {}".format(m.group(0), p),
                 sortid="form_descriptions/2278",
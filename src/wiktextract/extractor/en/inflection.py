@@ -9,7 +9,7 @@ import html
 import itertools
 import re
 import unicodedata
-from typing import Optional, Union
+from typing import NamedTuple, Optional, Union
 
 from wikitextprocessor import MAGIC_FIRST, NodeKind, WikiNode
 
@@ -766,6 +766,313 @@ def parse_title(
     return global_tags, table_tags, extra_forms
 
 
+class HeaderPart(NamedTuple):
+    """A part of a header text and its infl_map or infl_start_map value,
+    or its tagset if the part is ignored or unrecognized."""
+
+    text: str
+    value: object
+    tagset: Optional[TagSets]
+
+
+class InflValueInputs(NamedTuple):
+    """The inputs that the conditional expressions of an infl_map value
+    depend on, besides the language and the part-of-speech."""
+
+    if_tags: frozenset[str]
+    uses_depth: bool
+    uses_template: bool
+
+
+class InflValue(NamedTuple):
+    """The evaluated value of an infl_map value for some inputs.
+    ``messages`` are the debug messages of the evaluation, emitted again
+    with the word and the base tags of each call."""
+
+    tagset: TagSets
+    # or_tagsets() of the tagset alone, the result of a one-part header
+    merged: TagSets
+    messages: tuple[tuple, ...]
+
+
+class InflMapCache:
+    """Resolved header parts and evaluated values of an inflection map.
+    The conditional expressions of a value only test the language, the
+    part-of-speech, the nesting depth, the template name and the tags
+    listed in their "if" conditions, so the evaluations are memoized with
+    these inputs as the key."""
+
+    def __init__(self, i_map: dict) -> None:
+        self.infl_map = i_map
+        # Cleaned header text -> (part, value, tagset) for each part
+        self.parts: dict[str, tuple[HeaderPart, ...]] = {}
+        # id(value) -> (value, inputs), the value keeps the id valid
+        self.inputs: dict[int, tuple[object, InflValueInputs]] = {}
+        self.values: dict[tuple, InflValue] = {}
+
+    def header_parts(self, text: str) -> tuple[HeaderPart, ...]:
+        """Looks up the parts of a cleaned header text in the inflection
+        map."""
+        parts = self.parts.get(text)
+        if parts is not None:
+            return parts
+        if len(self.parts) >= 65536:
+            self.parts.clear()
+        resolved: list[HeaderPart] = []
+        for part in split_at_comma_semi(text, separators=[";"]):
+            if not part:
+                continue
+            v: object
+            if part in self.infl_map:
+                v = self.infl_map[part]  # list or string
+            else:
+                m = re.match(infl_start_re, part)
+                if m is not None:
+                    v = infl_start_map[m.group(1)]
+                    # print("INFL_START {} -> {}".format(part, v))
+                elif re.match(r"Notes", part):
+                    # Ignored header, this just adds dummy-skip-this
+                    resolved.append(
+                        HeaderPart(part, None, [("dummy-skip-this",)])
+                    )
+                    continue
+                elif part in IGNORED_COLVALUES:
+                    resolved.append(
+                        HeaderPart(part, None, [("dummy-ignore-skipped",)])
+                    )
+                    continue
+                # Try without final parenthesized part
+                part_without_parens = re.sub(
+                    r"[,/]?\s+\([^)]*\)\s*$", "", part
+                )
+                if part_without_parens in self.infl_map:
+                    v = self.infl_map[part_without_parens]
+                elif m is None:
+                    # Unrecognized header
+                    resolved.append(
+                        HeaderPart(part, None, UNRECOGNIZED_HEADER)
+                    )
+                    continue
+            resolved.append(HeaderPart(part, v, None))
+        parts = tuple(resolved)
+        self.parts[text] = parts
+        return parts
+
+    def value_inputs(self, v: object) -> InflValueInputs:
+        """Collects the inputs of the conditional expressions of a value."""
+        entry = self.inputs.get(id(v))
+        if entry is not None:
+            return entry[1]
+        if_tags: set[str] = set()
+        uses_depth = False
+        uses_template = False
+        stack = [v]
+        while stack:
+            x = stack.pop()
+            if not isinstance(x, dict):
+                continue
+            c = x.get("if")
+            if isinstance(c, str):
+                if c.startswith("any: "):
+                    c = c[5:]
+                if_tags.update(c.split())
+            uses_depth = uses_depth or "nested-table-depth" in x
+            uses_template = uses_template or "inflection-template" in x
+            stack.append(x.get("then", ""))
+            stack.append(x.get("else"))
+        inputs = InflValueInputs(frozenset(if_tags), uses_depth, uses_template)
+        self.inputs[id(v)] = (v, inputs)
+        return inputs
+
+    def evaluate(
+        self,
+        v: object,
+        lang: str,
+        pos: str,
+        base_tags: Union[list[str], set[str], tuple[str, ...]],
+        ignore_tags: bool,
+        depth: int,
+        template_name: Optional[str],
+    ) -> InflValue:
+        """Returns the memoized value of ``v`` for the given inputs."""
+        inputs = self.value_inputs(v)
+        tags = (
+            frozenset()
+            if ignore_tags
+            else frozenset(t for t in inputs.if_tags if t in base_tags)
+        )
+        key = (
+            id(v),
+            lang,
+            pos,
+            tags,
+            ignore_tags,
+            depth if inputs.uses_depth else None,
+            template_name if inputs.uses_template else None,
+        )
+        value = self.values.get(key)
+        if value is None:
+            tagset, messages = evaluate_infl_value(
+                v, lang, pos, tags, ignore_tags, depth, template_name
+            )
+            value = InflValue(
+                tagset, or_tagsets(lang, pos, [], tagset), messages
+            )
+            self.values[key] = value
+        return value
+
+
+# Tagset of the header parts that are not in the inflection map
+UNRECOGNIZED_HEADER: TagSets = [("error-unrecognized-form",)]
+
+infl_map_cache = InflMapCache(infl_map)
+
+
+def get_infl_map_cache() -> InflMapCache:
+    """Returns the cache of the current inflection map (the tests replace
+    the map)."""
+    global infl_map_cache
+    if infl_map_cache.infl_map is not infl_map:
+        infl_map_cache = InflMapCache(infl_map)
+    return infl_map_cache
+
+
+def evaluate_infl_value(
+    v: object,
+    lang: str,
+    pos: str,
+    base_tags: frozenset[str],
+    ignore_tags: bool,
+    depth: int,
+    template_name: Optional[str],
+) -> tuple[TagSets, tuple[tuple, ...]]:
+    """Evaluates the conditional expressions of an infl_map value until it
+    is a simple string or list.  ``template_name`` is None when there is
+    no table context.  This returns the tagset and the debug messages of
+    the evaluation as (sortid, ...) tuples."""
+    messages: list[tuple] = []
+    # Loop interpreting the value, until the value is a simple string.
+    # This may evaluate nested conditional expressions.
+    default_then = None
+    while True:
+        # If it is a string, we are done.
+        if isinstance(v, str):
+            tags = set(v.split())
+            remove_useless_tags(lang, pos, tags)
+            tagset = [tuple(sorted(tags))]
+            break
+        # For a list, just interpret it as alternatives.  (Currently the
+        # alternatives must directly be strings.)
+        if isinstance(v, (list, tuple)):
+            tagset = []
+            for x in v:
+                tags = set(x.split())
+                remove_useless_tags(lang, pos, tags)
+                tags_t = tuple(sorted(tags))
+                if tags_t not in tagset:
+                    tagset.append(tags_t)
+            break
+        # Otherwise the value should be a dictionary describing a
+        # conditional expression.
+        if not isinstance(v, dict):
+            messages.append(("inflection/767",))
+            tagset = [()]
+            break
+        # Evaluate the conditional expression.
+        assert isinstance(v, dict)
+        cond: Union[bool, str] = "default-true"
+        c: Union[str, list[str], set[str]] = ""
+        # Handle "lang" condition.  The value must be either a
+        # single language or a list of languages, and the
+        # condition evaluates to True if the table is one of
+        # those languages.
+        if "lang" in v:
+            c = v["lang"]
+            if isinstance(c, str):
+                cond = c == lang
+            else:
+                assert isinstance(c, (list, tuple, set))
+                cond = lang in c
+        # Handle "nested-table-depth" condition. The value must
+        # be an int or list of ints, and the condition evaluates
+        # True if the depth is one of those values.
+        # "depth" is how deep into a nested table tree the current
+        # table lies. It is first started in handle_wikitext_table,
+        # so only applies to tables-within-tables, not other
+        # WikiNode content. `depth` is currently only passed as a
+        # parameter down the table parsing stack, and not stored.
+        if cond and "nested-table-depth" in v:
+            d = v["nested-table-depth"]
+            if isinstance(d, int):
+                cond = d == depth
+            else:
+                assert isinstance(d, (list, tuple, set))
+                cond = depth in d
+        # Handle inflection-template condition. Must be a string
+        # or list of strings, and if tablecontext.template_name is in
+        # those, accept the condition.
+        # TableContext.template_name is passed down from page/
+        # parse_inflection, before parsing and expanding itself
+        # has begun.
+        if cond and template_name is not None and "inflection-template" in v:
+            d1 = v["inflection-template"]
+            if isinstance(d1, str):
+                cond = d1 == template_name
+            else:
+                assert isinstance(d1, (list, tuple, set))
+                cond = template_name in d1
+        # Handle "pos" condition.  The value must be either a single
+        # part-of-speech or a list of them, and the condition evaluates to
+        # True if the part-of-speech is any of those listed.
+        if cond and "pos" in v:
+            c = v["pos"]
+            if isinstance(c, str):
+                cond = c == pos
+            else:
+                assert isinstance(c, (list, tuple, set))
+                cond = pos in c
+        # Handle "if" condition.  The value must be a string containing a
+        # space-separated list of tags.  The condition evaluates to True if
+        # ``base_tags`` contains all of the listed tags.  If the condition
+        # is of the form "any: ...tags...", then any of the tags will be
+        # enough.
+        if cond and "if" in v and not ignore_tags:
+            c = v["if"]
+            assert isinstance(c, str)
+            # "if" condition is true if any of the listed tags is present if
+            # it starts with "any:", otherwise all must be present
+            if c.startswith("any: "):
+                cond = any(t in base_tags for t in c[5:].split())
+            else:
+                cond = all(t in base_tags for t in c.split())
+
+        # Handle "default" assignment. Store the value to be used
+        # as a default later.
+        if "default" in v:
+            assert isinstance(v["default"], str)
+            default_then = v["default"]
+
+        # Warning message about missing conditions for debugging.
+
+        if cond == "default-true" and not default_then:
+            messages.append(("inflection/851", c, cond))
+        # Based on the result of evaluating the condition, select either
+        # "then" part or "else" part.
+        if cond:
+            v = v.get("then", "")
+        else:
+            v1 = v.get("else")
+            if v1 is None:
+                if default_then:
+                    v = default_then
+                else:
+                    messages.append(("inflection/865",))
+                    v = "error-unrecognized-form"
+            else:
+                v = v1
+    return tagset, tuple(messages)
+
+
 def expand_header(
     wxr: WiktextractContext,
     tablecontext: "TableContext",
@@ -797,158 +1104,36 @@ def expand_header(
     assert isinstance(depth, int)
     # print("EXPAND_HDR: text={!r} base_tags={!r}".format(text, base_tags))
     # First map the text using the inflection map
-    text = clean_value(wxr, text)
+    cache = get_infl_map_cache()
+    template_name = tablecontext.template_name if tablecontext else None
     combined_return: list[tuple[str, ...]] = []
-    parts = split_at_comma_semi(text, separators=[";"])
-    for text in parts:
-        if not text:
-            continue
-        if text in infl_map:
-            v = infl_map[text]  # list or string
-        else:
-            m = re.match(infl_start_re, text)
-            if m is not None:
-                v = infl_start_map[m.group(1)]
-                # print("INFL_START {} -> {}".format(text, v))
-            elif re.match(r"Notes", text):
-                # Ignored header
-                # print("IGNORING NOTES")
-                combined_return = or_tagsets(
-                    lang, pos, combined_return, [("dummy-skip-this",)]
-                )
-                # this just adds dummy-skip-this
-                continue
-            elif text in IGNORED_COLVALUES:
-                combined_return = or_tagsets(
-                    lang, pos, combined_return, [("dummy-ignore-skipped",)]
-                )
-                continue
-            # Try without final parenthesized part
-            text_without_parens = re.sub(r"[,/]?\s+\([^)]*\)\s*$", "", text)
-            if text_without_parens in infl_map:
-                v = infl_map[text_without_parens]
-            elif m is None:
-                if not silent:
-                    wxr.wtp.debug(
-                        "inflection table: unrecognized header: {}".format(
-                            repr(text)
-                        ),
-                        sortid="inflection/735",
-                    )
-                # Unrecognized header
-                combined_return = or_tagsets(
-                    lang, pos, combined_return, [("error-unrecognized-form",)]
+    for text, v, tagset in cache.header_parts(clean_value(wxr, text)):
+        if tagset is UNRECOGNIZED_HEADER:
+            if not silent:
+                wxr.wtp.debug(
+                    "inflection table: unrecognized header: {}".format(
+                        repr(text)
+                    ),
+                    sortid="inflection/735",
                 )
-                continue
+        if tagset is not None:
+            combined_return = or_tagsets(lang, pos, combined_return, tagset)
+            continue
 
-        # Then loop interpreting the value, until the value is a simple string.
-        # This may evaluate nested conditional expressions.
-        default_then = None
-        while True:
-            # If it is a string, we are done.
-            if isinstance(v, str):
-                tags = set(v.split())
-                remove_useless_tags(lang, pos, tags)
-                tagset = [tuple(sorted(tags))]
-                break
-            # For a list, just interpret it as alternatives.  (Currently the
-            # alternatives must directly be strings.)
-            if isinstance(v, (list, tuple)):
-                tagset = []
-                for x in v:
-                    tags = set(x.split())
-                    remove_useless_tags(lang, pos, tags)
-                    tags_t = tuple(sorted(tags))
-                    if tags_t not in tagset:
-                        tagset.append(tags_t)
-                break
-            # Otherwise the value should be a dictionary describing a
-            # conditional expression.
-            if not isinstance(v, dict):
+        value = cache.evaluate(
+            v, lang, pos, base_tags, ignore_tags, depth, template_name
+        )
+        for sortid, *args in value.messages:
+            if sortid == "inflection/767":
                 wxr.wtp.debug(
                     "inflection table: internal: "
                     "UNIMPLEMENTED INFL_MAP VALUE: {}".format(infl_map[text]),
                     sortid="inflection/767",
                 )
-                tagset = [()]
-                break
-            # Evaluate the conditional expression.
-            assert isinstance(v, dict)
-            cond: Union[bool, str] = "default-true"
-            c: Union[str, list[str], set[str]] = ""
-            # Handle "lang" condition.  The value must be either a
-            # single language or a list of languages, and the
-            # condition evaluates to True if the table is one of
-            # those languages.
-            if "lang" in v:
-                c = v["lang"]
-                if isinstance(c, str):
-                    cond = c == lang
-                else:
-                    assert isinstance(c, (list, tuple, set))
-                    cond = lang in c
-            # Handle "nested-table-depth" condition. The value must
-            # be an int or list of ints, and the condition evaluates
-            # True if the depth is one of those values.
-            # "depth" is how deep into a nested table tree the current
-            # table lies. It is first started in handle_wikitext_table,
-            # so only applies to tables-within-tables, not other
-            # WikiNode content. `depth` is currently only passed as a
-            # parameter down the table parsing stack, and not stored.
-            if cond and "nested-table-depth" in v:
-                d = v["nested-table-depth"]
-                if isinstance(d, int):
-                    cond = d == depth
-                else:
-                    assert isinstance(d, (list, tuple, set))
-                    cond = depth in d
-            # Handle inflection-template condition. Must be a string
-            # or list of strings, and if tablecontext.template_name is in
-            # those, accept the condition.
-            # TableContext.template_name is passed down from page/
-            # parse_inflection, before parsing and expanding itself
-            # has begun.
-            if cond and tablecontext and "inflection-template" in v:
-                d1 = v["inflection-template"]
-                if isinstance(d1, str):
-                    cond = d1 == tablecontext.template_name
-                else:
-                    assert isinstance(d1, (list, tuple, set))
-                    cond = tablecontext.template_name in d1
-            # Handle "pos" condition.  The value must be either a single
-            # part-of-speech or a list of them, and the condition evaluates to
-            # True if the part-of-speech is any of those listed.
-            if cond and "pos" in v:
-                c = v["pos"]
-                if isinstance(c, str):
-                    cond = c == pos
-                else:
-                    assert isinstance(c, (list, tuple, set))
-                    cond = pos in c
-            # Handle "if" condition.  The value must be a string containing a
-            # space-separated list of tags.  The condition evaluates to True if
-            # ``base_tags`` contains all of the listed tags.  If the condition
-            # is of the form "any: ...tags...", then any of the tags will be
-            # enough.
-            if cond and "if" in v and not ignore_tags:
-                c = v["if"]
-                assert isinstance(c, str)
-                # "if" condition is true if any of the listed tags is present if
-                # it starts with "any:", otherwise all must be present
-                if c.startswith("any: "):
-                    cond = any(t in base_tags for t in c[5:].split())
-                else:
-                    cond = all(t in base_tags for t in c.split())
-
-            # Handle "default" assignment. Store the value to be used
-            # as a default later.
-            if "default" in v:
-                assert isinstance(v["default"], str)
-                default_then = v["default"]
-
-            # Warning message about missing conditions for debugging.
-
-            if cond == "default-true" and not default_then and not silent:
+            elif silent:
+                continue
+            elif sortid == "inflection/851":
+                c, cond = args
                 wxr.wtp.debug(
                     "inflection table: IF MISSING COND: word={} "
                     "lang={} text={} base_tags={} c={} cond={}".format(
@@ -956,32 +1141,24 @@ def expand_header(
                     ),
                     sortid="inflection/851",
                 )
-            # Based on the result of evaluating the condition, select either
-            # "then" part or "else" part.
-            if cond:
-                v = v.get("then", "")
             else:
-                v1 = v.get("else")
-                if v1 is None:
-                    if default_then:
-                        v = default_then
-                    else:
-                        if not silent:
-                            wxr.wtp.debug(
-                                "inflection table: IF WITHOUT ELSE EVALS "
-                                "False: "
-                                "{}/{} {!r} base_tags={}".format(
-                                    word, lang, text, base_tags
-                                ),
-                                sortid="inflection/865",
-                            )
-                        v = "error-unrecognized-form"
-                else:
-                    v = v1
+                wxr.wtp.debug(
+                    "inflection table: IF WITHOUT ELSE EVALS "
+                    "False: "
+                    "{}/{} {!r} base_tags={}".format(
+                        word, lang, text, base_tags
+                    ),
+                    sortid="inflection/865",
+                )
 
         # Merge the resulting tagset from this header part with the other
         # tagsets from the whole header
-        combined_return = or_tagsets(lang, pos, combined_return, tagset)
+        if combined_return:
+            combined_return = or_tagsets(
+                lang, pos, combined_return, value.tagset
+            )
+        else:
+            combined_return = list(value.merged)
 
     # Return the combined tagsets, or empty tagset if we got no tagsets
     if not combined_return:
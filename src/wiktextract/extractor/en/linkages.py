@@ -11,6 +11,7 @@ from wikitextprocessor import LevelNode, NodeKind, TemplateNode, WikiNode
 from ...datautils import data_append, data_extend, split_at_comma_semi
 from ...page import clean_node
 from ...tags import linkage_beginning_tags
+from ...title_index import page_exists
 from ...wxr_context import WiktextractContext
 from .form_descriptions import (
     classify_desc,
@@ -372,8 +373,8 @@ def parse_linkage_item_text(
         # print("linkage prefix: desc={!r} cls={} rest={!r} cls2={}"
         #      .format(desc, cls, rest, cls2))
 
-        e1 = wxr.wtp.page_exists(desc)
-        e2 = wxr.wtp.page_exists(rest)
+        e1 = page_exists(wxr, desc)
+        e2 = page_exists(wxr, rest)
         if cls != "tags":
             if (
                 cls2 == "tags"
@@ -890,7 +891,7 @@ def parse_linkage_item_text(
             if (
                 (not w or "," not in w)
                 and (not r or "," not in r)
-                and not wxr.wtp.page_exists(w)
+                and not page_exists(wxr, w)
             ):
                 lst = w.split("／") if len(w) > 1 else [w]
                 if len(lst) == 1:
@@ -908,9 +909,9 @@ def parse_linkage_item_text(
             # abbreviations that end with a period that should be kept)
             if (
                 w.endswith(".")
-                and not wxr.wtp.page_exists(w)
+                and not page_exists(wxr, w)
                 and (
-                    wxr.wtp.page_exists(w[:-1])
+                    page_exists(wxr, w[:-1])
                     or (len(w) >= 5)
                     and "." not in w[:-1]
                 )
@@ -45,7 +45,7 @@ from ...tags import valid_tags
 from ...wxr_context import WiktextractContext
 from ...wxr_logging import logger
 from ..ruby import extract_ruby, parse_ruby
-from ..share import strip_nodes
+from ..share import deep_copy_data, strip_nodes
 from .example import extract_example_list_item, extract_template_zh_x
 from .form_descriptions import (
     classify_desc,
@@ -919,7 +919,7 @@ def parse_language(
         for k, v in base.items():
             # Copy the value to ensure that we don't share lists or
             # dicts between structures (even nested ones).
-            v = copy.deepcopy(v)
+            v = deep_copy_data(v)
             if k not in data:
                 # The list was copied above, so this will not create shared ref
                 data[k] = v  # type: ignore[literal-required]
@@ -2066,7 +2066,7 @@ def parse_language(
                     continue
                 # copy sense_base to prevent cross-contamination between
                 # subglosses and other subglosses and superglosses
-                sense_base2 = copy.deepcopy(sense_base)
+                sense_base2 = deep_copy_data(sense_base)
                 if parse_sense_node(item, sense_base2, pos):
                     added = True
 
@@ -3788,7 +3788,7 @@ def parse_language(
                 if "pos" not in pos_data:
                     pos_data["pos"] = "soft-redirect"
             else:
-                new_page_data = copy.deepcopy(base_data)
+                new_page_data = deep_copy_data(base_data)
                 new_page_data["redirects"] = redirect_list
                 if "pos" not in new_page_data:
                     new_page_data["pos"] = "soft-redirect"
@@ -4394,6 +4394,38 @@ def fix_subtitle_hierarchy(wxr: WiktextractContext, text: str) -> str:
     return text
 
 
+# Level 2 titles after `fix_subtitle_hierarchy()`, only language names are
+# on level 2
+LANGUAGE_TITLE_RE = re.compile(r"(?m)^==(?!=)(.+?)==$")
+
+
+def select_language_sections(wxr: WiktextractContext, text: str) -> str:
+    """Removes language sections that would not be extracted from the page
+    text, so their templates are not expanded when the page is parsed.
+    This must be called after `fix_subtitle_hierarchy()`.  Text before the
+    first language title (top-level templates) is kept, and so are sections
+    whose title contains markup, those are checked after parsing."""
+    capture_language_codes = wxr.config.capture_language_codes
+    if not capture_language_codes:
+        return text
+    parts = LANGUAGE_TITLE_RE.split(text)
+    kept = [parts[0]]
+    for i in range(1, len(parts), 2):
+        title = parts[i]
+        section_text = parts[i + 1]
+        if re.search(r"[<>\[\]{}&']", title) is None:
+            lang_code = name_to_code(title.strip(), "en")
+            if lang_code != "" and lang_code not in capture_language_codes:
+                wxr.config.counters["skipped_language_sections"] += 1
+                wxr.config.counters["skipped_language_bytes"] += len(
+                    section_text.encode("utf-8")
+                )
+                continue
+        kept.append(f"=={title}==")
+        kept.append(section_text)
+    return "".join(kept)
+
+
 def parse_page(wxr: WiktextractContext, word: str, text: str) -> list[WordData]:
     # Skip translation pages
     if word.endswith("/" + TRANSLATIONS_TITLE):
@@ -4417,6 +4449,8 @@ def parse_page(wxr: WiktextractContext, word: str, text: str) -> list[WordData]:
     # Translations section on the same level as Noun.  Enforce a proper
     # hierarchy by manipulating the subtitle levels in certain cases.
     text = fix_subtitle_hierarchy(wxr, text)
+    # Don't pre-expand templates of languages that are not captured
+    text = select_language_sections(wxr, text)
 
     # Parse the page, pre-expanding those templates that are likely to
     # influence parsing
@@ -9,6 +9,7 @@ from wikitextprocessor.parser import (
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from ...wxr_logging import logger
+from ..share import deep_copy_data
 from .conjugation import extract_conjugation_section
 from .etymology import process_etymology_block
 from .example import extract_example
@@ -49,7 +50,7 @@ def parse_entries(
 
     # This might not be necessary but it's to prevent that base_data is applied
     # to entries that it shouldn't be applied to
-    base_data_copy = base_data.model_copy(deep=True)
+    base_data_copy = deep_copy_data(base_data)
     unexpected_nodes = []
     # Parse data affecting all subsections and add to base_data_copy
     for node in level_node.invert_find_child(LEVEL_KIND_FLAGS):
@@ -114,7 +115,7 @@ def parse_section(
         )
         pos_type = pos_data["pos"]
         if section_title != "forma flexiva":
-            page_data.append(base_data.model_copy(deep=True))
+            page_data.append(deep_copy_data(base_data))
             page_data[-1].pos = pos_type
             page_data[-1].pos_title = section_title
             page_data[-1].tags.extend(pos_data.get("tags", []))
@@ -129,17 +130,17 @@ def parse_section(
         section_title in TRANSLATIONS_TITLES and wxr.config.capture_translations
     ):
         if len(page_data) == 0:
-            page_data.append(base_data.model_copy(deep=True))
+            page_data.append(deep_copy_data(base_data))
         extract_translation_section(wxr, page_data, level_node)
     elif section_title in LINKAGE_TITLES:
         if len(page_data) == 0:
-            page_data.append(base_data.model_copy(deep=True))
+            page_data.append(deep_copy_data(base_data))
         extract_linkage_section(
             wxr, page_data, level_node, LINKAGE_TITLES[section_title]
         )
     elif section_title == "conjugación":
         if len(page_data) == 0:
-            page_data.append(base_data.model_copy(deep=True))
+            page_data.append(deep_copy_data(base_data))
         extract_conjugation_section(wxr, page_data, level_node)
     else:
         wxr.wtp.debug(
@@ -10,6 +10,7 @@ from wikitextprocessor.parser import (
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from ...wxr_logging import logger
+from ..share import deep_copy_data
 from .etymology import (
     EtymologyData,
     extract_etymology,
@@ -138,7 +139,7 @@ def process_pos_block(
     pos_data = POS_SECTIONS[pos_argument]
     pos_type = pos_data["pos"]
     if len(page_data) == 0 or "pos" in page_data[-1].model_fields_set:
-        page_data.append(base_data.model_copy(deep=True))
+        page_data.append(deep_copy_data(base_data))
     page_data[-1].pos = pos_type
     page_data[-1].pos_title = pos_title
     page_data[-1].tags.extend(pos_data.get("tags", []))
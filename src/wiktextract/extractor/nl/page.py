@@ -10,6 +10,7 @@ from wikitextprocessor.parser import (
 
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
+from ..share import deep_copy_data
 from .descendant import extract_descendant_section
 from .etymology import extract_etymology_section
 from .inflection import FORMS_TABLE_TEMPLATES, extract_inflection_template
@@ -168,7 +169,7 @@ def parse_page(
             lang=lang_name,
             pos="unknown",
         )
-        forms_data = base_data.model_copy(deep=True)
+        forms_data = deep_copy_data(base_data)
         extract_section_categories(wxr, base_data, level2_node)
         etymology_data = []
         for t_node in level2_node.find_child(NodeKind.TEMPLATE):
@@ -4,6 +4,7 @@ from wikitextprocessor import LevelNode, NodeKind, TemplateNode, WikiNode
 
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
+from ..share import deep_copy_data
 from .example import (
     EXAMPLE_TEMPLATES,
     extract_example_list_item,
@@ -26,7 +27,7 @@ def extract_pos_section(
     level_node: LevelNode,
     pos_title: str,
 ) -> None:
-    page_data.append(base_data.model_copy(deep=True))
+    page_data.append(deep_copy_data(base_data))
     page_data[-1].pos_title = pos_title
     pos_data = POS_DATA[pos_title]
     page_data[-1].pos = pos_data["pos"]
@@ -13,6 +13,7 @@ from ...config import POSSubtitleData
 from ...page import clean_node
 from ...wxr_context import WiktextractContext
 from ...wxr_logging import logger
+from ..share import deep_copy_data
 from .etymology import extract_etymology
 from .gloss import extract_gloss, process_meaning_template
 from .inflection import parse_adj_forms_table, parse_wikitext_forms_table
@@ -287,7 +288,7 @@ def parse_page(
                 if pos_data is not None:
                     base_data.pos = pos_data["pos"]
                     base_data.tags.extend(pos_data.get("tags", []))
-            page_data.append(base_data.model_copy(deep=True))
+            page_data.append(deep_copy_data(base_data))
             extract_level2_node_contents(wxr, page_data[-1], level2_node)
             has_level3 = False
             for level3_node in level2_node.find_child(NodeKind.LEVEL3):
@@ -304,7 +305,7 @@ def parse_page(
                 len(page_data) == 0
                 or page_data[-1].lang_code != base_data.lang_code
             ):
-                page_data.append(base_data.model_copy(deep=True))
+                page_data.append(deep_copy_data(base_data))
             parse_section(wxr, page_data, any_level_node)
 
         if len(page_data) > 0 and page_data[-1] == base_data:
@@ -362,7 +363,7 @@ def process_form_template(
     expanded_node = wxr.wtp.parse(
         wxr.wtp.node_to_wikitext(template_node), expand_all=True
     )
-    current_data = base_data.model_copy(deep=True)
+    current_data = deep_copy_data(base_data)
     for list_item in expanded_node.find_child_recursively(NodeKind.LIST_ITEM):
         gloss_text = clean_node(wxr, None, list_item.children)
         if len(gloss_text) > 0:
@@ -1,10 +1,18 @@
+import copy
 import hashlib
 import re
 from html import unescape
-from typing import Iterable, Optional, Union
+from typing import Any, Iterable, Optional, TypeVar, Union
 
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
 from wikitextprocessor import WikiNode
 
+T = TypeVar("T")
+
+# Values shared by the copies of `deep_copy_data()`
+IMMUTABLE_TYPES = frozenset([str, int, float, bool, type(None)])
+
 
 def strip_nodes(
     nodes: list[Union[WikiNode, str]]
@@ -131,3 +139,76 @@ def split_senseids(senseids_str: str) -> list[str]:
                 pass
 
     return senseids
+
+
+def deep_copy_data(value: T) -> T:
+    """
+    Returns the same copy of extracted data as `copy.deepcopy()` or
+    `model_copy(deep=True)`, for the base data copied to each part of
+    speech section.  Strings and numbers are shared, lists, dicts and
+    pydantic models are copied directly rather than through the generic
+    dispatch of the `copy` module, which is most of the cost of copying
+    long lists of sounds or categories.  Objects referenced more than once
+    are copied once, like `copy.deepcopy()` does.
+    """
+    return copy_value(value, {})
+
+
+def copy_value(value: Any, memo: dict[int, Any]) -> Any:
+    cls = type(value)
+    if cls in IMMUTABLE_TYPES:
+        return value
+    if id(value) in memo:
+        return memo[id(value)]
+    copied: Any
+    if cls is list:
+        copied = []
+        memo[id(value)] = copied
+        for v in value:
+            copied.append(
+                v if type(v) in IMMUTABLE_TYPES else copy_value(v, memo)
+            )
+    elif cls is dict:
+        copied = {}
+        memo[id(value)] = copied
+        copy_items(value, copied, memo)
+    elif cls is tuple:
+        items = tuple(copy_value(v, memo) for v in value)
+        # Like `copy.deepcopy()`, tuples of shared values are shared
+        copied = value if all(a is b for a, b in zip(items, value)) else items
+        memo[id(value)] = copied
+    elif isinstance(value, BaseModel):
+        # Same attributes as `BaseModel.__deepcopy__()`
+        copied = cls.__new__(cls)
+        memo[id(value)] = copied
+        fields: dict[str, Any] = {}
+        copy_items(value.__dict__, fields, memo)
+        object.__setattr__(copied, "__dict__", fields)
+        object.__setattr__(
+            copied,
+            "__pydantic_extra__",
+            copy_value(value.__pydantic_extra__, memo),
+        )
+        fields_set = set(value.__pydantic_fields_set__)
+        object.__setattr__(copied, "__pydantic_fields_set__", fields_set)
+        private = value.__pydantic_private__
+        if private is not None:
+            private = copy.deepcopy(
+                {
+                    k: v
+                    for k, v in private.items()
+                    if v is not PydanticUndefined
+                },
+                memo,
+            )
+        object.__setattr__(copied, "__pydantic_private__", private)
+    else:
+        copied = copy.deepcopy(value, memo)
+    return copied
+
+
+def copy_items(value: dict, copied: dict, memo: dict[int, Any]) -> None:
+    for k, v in value.items():
+        if type(k) not in IMMUTABLE_TYPES:
+            k = copy_value(k, memo)
+        copied[k] = v if type(v) in IMMUTABLE_TYPES else copy_value(v, memo)
@@ -1,5 +1,6 @@
 from wikitextprocessor.parser import LEVEL_KIND_FLAGS  #, print_tree
 
+from wiktextract.extractor.share import deep_copy_data
 from wiktextract.page import clean_node
 from wiktextract.wxr_context import WiktextractContext
 from wiktextract.wxr_logging import logger
@@ -155,7 +156,7 @@ def parse_page(
         else:
             pos_num = -1  # default: see models.py/Sense
         if heading_title in POS_HEADINGS:
-            pos_data = base_data.model_copy(deep=True)
+            pos_data = deep_copy_data(base_data)
             new_data = process_pos(wxr, level, pos_data, heading_title, pos_num)
             if new_data is not None:
                 # new_data would be one WordEntry object, for one Part of
@@ -4,6 +4,7 @@ from wikitextprocessor.parser import LEVEL_KIND_FLAGS
 
 from wiktextract import WiktextractContext
 from wiktextract.clean import clean_value
+from wiktextract.extractor.share import deep_copy_data
 from wiktextract.page import clean_node
 
 from .models import TemplateData, WordEntry
@@ -79,7 +80,7 @@ def process_etym(
 
         new_data: list[WordEntry] = []
         if heading_title in POS_HEADINGS:
-            pos_data = base_data.model_copy(deep=True)
+            pos_data = deep_copy_data(base_data)
             # Assume we'll get only one WordEntry or nothing.
             if (
                 nd := process_pos(
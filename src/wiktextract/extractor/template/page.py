@@ -6,6 +6,7 @@ from mediawiki_langcodes import name_to_code  # Thanks for xxyzz!
 from wikitextprocessor.parser import LEVEL_KIND_FLAGS  # , print_tree
 
 # Clean node takes a WikiNode+strings node or tree and gives you a cleanish text
+from wiktextract.extractor.share import deep_copy_data
 from wiktextract.page import clean_node
 
 # The main context object to more easily share state of parsing between
@@ -172,7 +173,7 @@ def parse_page(
                 # USUALLY this is a LEVEL 3 node with Part of speech headings
                 # inside of it. The template assumes if there is an Etym section
                 # then it has POS sections inside of it.
-                etym_data = base_data.model_copy(deep=True)
+                etym_data = deep_copy_data(base_data)
                 new_data = process_etym(
                     wxr,
                     etym_data,
@@ -181,7 +182,7 @@ def parse_page(
                     heading_num,
                 )
             elif heading_title in POS_HEADINGS:
-                pos_data = base_data.model_copy(deep=True)
+                pos_data = deep_copy_data(base_data)
                 # Assume we'll get only one WordEntry or nothing.
                 if (
                     nd := process_pos(
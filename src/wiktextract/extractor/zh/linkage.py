@@ -115,7 +115,7 @@ def extract_saurus_template(
 
     https://zh.wiktionary.org/wiki/Template:Syn-saurus
     """
-    from wiktextract.thesaurus import search_thesaurus
+    from wiktextract.thesaurus_index import lookup_thesaurus
 
     linkage_data = []
     if node.template_name in ("zh-syn-saurus", "zh-ant-saurus"):
@@ -124,8 +124,8 @@ def extract_saurus_template(
     else:
         thesaurus_page_title = node.template_parameters.get(2)
 
-    for thesaurus in search_thesaurus(
-        wxr.thesaurus_db_conn,
+    for thesaurus in lookup_thesaurus(
+        wxr,
         thesaurus_page_title,
         page_data[-1].lang_code,
         page_data[-1].pos,
@@ -0,0 +1,484 @@
+# Incremental second phase.  A run can save a page index next to its
+# output file, with the byte range of the output of each page and a digest
+# of everything the page output depends on: the page body, the templates
+# and modules it uses, directly or through other templates and modules, the
+# extractor code and the extraction settings.  A later run on a new
+# database reads the index of the previous run, and copies the output of
+# the pages whose digest hasn't changed from the previous output file
+# instead of extracting them again.  The extractor code digest also covers
+# the wikitextprocessor version and the thesaurus terms injected in the
+# linkages.  Pages that failed or were quarantined are not indexed, so they
+# are extracted again.
+#
+# The dependencies are found from the template calls, `#invoke`s and Lua
+# `require`s in the page and template bodies, so templates and modules
+# whose names are generated by other expansions, and other pages that
+# change the output (for example with `page_exists()`), are not tracked.
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from collections.abc import Iterable, Iterator
+from importlib.metadata import PackageNotFoundError, version
+from importlib.resources import files
+from pathlib import Path
+from typing import BinaryIO
+
+from wikitextprocessor import Page, Wtp
+
+from .wxr_context import WiktextractContext
+from .wxr_logging import logger
+
+INDEX_SUFFIX = ".index"
+
+# `{{name|` or `{{name}}`, not `{{{parameter}}}`
+TEMPLATE_CALL_RE = re.compile(
+    r"(?<!\{)\{\{(?!\{)\s*([^{}|\[\]]+?)\s*(?:\||\}\})"
+)
+LUA_TEMPLATE_RE = re.compile(
+    r"""expandTemplate\s*\{\s*title\s*=\s*["']([^"']+)["']"""
+)
+LUA_MODULE_RE = re.compile(
+    r"""(?:\brequire|\bloadData|\bloadJsonData)\s*\(?\s*["']([^"']+)["']"""
+)
+TEMPLATE_PREFIXES = ("subst:", "safesubst:", "msgnw:")
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(name.replace("_", " ").split())
+
+
+def hash_text(*texts: str | None) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for text in texts:
+        h.update((text or "").encode("utf-8", "surrogatepass"))
+        h.update(b"\0")
+    return h.digest()
+
+
+class TemplateCalls:
+    """Finds the templates and modules called in page bodies, by their
+    titles in the database."""
+
+    def __init__(self, wtp: Wtp) -> None:
+        template_ns = wtp.NAMESPACE_DATA["Template"]
+        module_ns = wtp.NAMESPACE_DATA["Module"]
+        self.template_ns_id = template_ns["id"]
+        self.module_ns_id = module_ns["id"]
+        self.template_prefix = template_ns["name"] + ":"
+        self.module_prefix = module_ns["name"] + ":"
+        self.template_prefixes = tuple(
+            name + ":"
+            for name in [template_ns["name"], "Template"]
+            + template_ns.get("aliases", [])
+        )
+        self.module_prefixes = tuple(
+            name + ":"
+            for name in [module_ns["name"], "Module"]
+            + module_ns.get("aliases", [])
+        )
+
+    def template_title(self, name: str) -> str | None:
+        name = normalize_name(name)
+        if name.startswith("#"):
+            function, _, module = name.partition(":")
+            if function.lower() == "#invoke" and module:
+                return self.module_prefix + normalize_name(module)
+            return None
+        for prefix in TEMPLATE_PREFIXES:
+            if name.lower().startswith(prefix):
+                name = normalize_name(name[len(prefix) :])
+        if name.startswith(self.template_prefixes):
+            name = name.partition(":")[2].strip()
+        if name == "" or name.startswith(":"):
+            # Pages of the main namespace aren't tracked
+            return None
+        # Magic words and parser functions like "lc:" are looked up as
+        # templates that don't exist
+        return self.template_prefix + name
+
+    def module_title(self, name: str) -> str | None:
+        name = normalize_name(name)
+        if not name.startswith(self.module_prefixes):
+            # Lua libraries
+            return None
+        return self.module_prefix + name.partition(":")[2].strip()
+
+    def page_calls(self, page: Page) -> set[str]:
+        """Returns the titles of the templates and modules called in the
+        page body."""
+        titles: set[str | None] = set()
+        if page.redirect_to is not None:
+            titles.add(page.redirect_to)
+        body = page.body or ""
+        if page.title.startswith(self.module_prefix):
+            titles.update(
+                self.module_title(m.group(1))
+                for m in LUA_MODULE_RE.finditer(body)
+            )
+            titles.update(
+                self.template_title(m.group(1))
+                for m in LUA_TEMPLATE_RE.finditer(body)
+            )
+        else:
+            titles.update(
+                self.template_title(m.group(1))
+                for m in TEMPLATE_CALL_RE.finditer(body)
+            )
+        titles.discard(None)
+        return titles  # type: ignore[return-value]
+
+
+class DependencyGraph(TemplateCalls):
+    """Digests of the templates and modules of the database, each digest
+    covers the bodies of all the templates and modules it depends on."""
+
+    def __init__(self, wtp: Wtp) -> None:
+        super().__init__(wtp)
+        bodies: dict[str, bytes] = {}
+        calls: dict[str, set[str]] = {}
+        for page in wtp.get_all_pages(
+            [self.template_ns_id, self.module_ns_id]
+        ):
+            bodies[page.title] = hash_text(page.body, page.redirect_to)
+            calls[page.title] = self.page_calls(page)
+        self.digests = component_digests(bodies, calls)
+        logger.info(
+            f"Found the dependencies of {len(self.digests)} templates and "
+            "modules"
+        )
+
+    def page_digest(self, page: Page, fingerprint: str) -> bytes:
+        """Returns the digest of the page body and of the templates and
+        modules it calls."""
+        h = hashlib.blake2b(hash_text(fingerprint, page.body, page.redirect_to))
+        for title in sorted(self.page_calls(page)):
+            # Templates that don't exist are added by their title, so the
+            # page is extracted again when they are created
+            h.update(self.digests.get(title) or hash_text("missing", title))
+        return h.digest()[:16]
+
+
+def component_digests(
+    bodies: dict[str, bytes], calls: dict[str, set[str]]
+) -> dict[str, bytes]:
+    """Returns the digest of each page from its body hash and the digests of
+    the pages it calls.  Pages that call each other (strongly connected
+    components of the call graph) get the same digest, found with an
+    iterative version of Tarjan's algorithm."""
+    digests: dict[str, bytes] = {}
+    index: dict[str, int] = {}
+    lowlink: dict[str, int] = {}
+    stack: list[str] = []
+    on_stack: set[str] = set()
+    for root in bodies:
+        if root in index:
+            continue
+        work: list[tuple[str, Iterator[str]]] = []
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work.append((root, iter(sorted(calls[root]))))
+        while work:
+            node, callees = work[-1]
+            for callee in callees:
+                if callee not in bodies:
+                    continue
+                if callee not in index:
+                    index[callee] = lowlink[callee] = len(index)
+                    stack.append(callee)
+                    on_stack.add(callee)
+                    work.append((callee, iter(sorted(calls[callee]))))
+                    break
+                if callee in on_stack:
+                    lowlink[node] = min(lowlink[node], index[callee])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    component.sort()
+                    h = hashlib.blake2b(digest_size=16)
+                    outside_calls = set()
+                    for member in component:
+                        h.update(member.encode("utf-8", "surrogatepass"))
+                        h.update(bodies[member])
+                        outside_calls.update(calls[member])
+                    outside_calls.difference_update(component)
+                    for callee in sorted(outside_calls):
+                        h.update(
+                            digests.get(callee) or hash_text("missing", callee)
+                        )
+                    digest = h.digest()
+                    for member in component:
+                        digests[member] = digest
+    return digests
+
+
+def extraction_fingerprint(
+    wxr: WiktextractContext, human_readable: bool
+) -> str:
+    """Returns a hash of the extractor code, its data files, the
+    wikitextprocessor version, the thesaurus terms and the settings that
+    change the output."""
+    h = hashlib.sha256()
+    try:
+        h.update(version("wikitextprocessor").encode())
+    except PackageNotFoundError:
+        pass
+    package_dir = Path(str(files("wiktextract")))
+    for path in sorted(package_dir.rglob("*")):
+        if path.suffix in (".py", ".json", ".lua", ".txt") and path.is_file():
+            h.update(str(path.relative_to(package_dir)).encode())
+            h.update(path.read_bytes())
+    from .wiktionary import orjson_enabled
+
+    config = wxr.config
+    settings = [
+        config.dump_file_lang_code,
+        sorted(config.capture_language_codes or []),
+        config.capture_language_codes is None,
+        config.capture_translations,
+        config.capture_pronunciation,
+        config.capture_linkages,
+        config.capture_compounds,
+        config.capture_redirects,
+        config.capture_examples,
+        config.capture_etymologies,
+        config.capture_inflections,
+        config.capture_descendants,
+        config.extract_ns_names,
+        human_readable,
+        orjson_enabled,
+    ]
+    h.update(json.dumps(settings, default=str).encode())
+    if config.extract_thesaurus_pages and wxr.thesaurus_db_conn is not None:
+        h.update(thesaurus_digest(wxr.thesaurus_db_conn))
+    return h.hexdigest()
+
+
+def thesaurus_digest(conn: sqlite3.Connection) -> bytes:
+    """Returns a digest of the thesaurus terms, without the row ids which
+    depend on the order the thesaurus pages were extracted in."""
+    h = hashlib.blake2b(digest_size=16)
+    for row in conn.execute(
+        """
+        SELECT entry, pos, language_code, sense, term, linkage, tags,
+        raw_tags, topics, roman
+        FROM terms JOIN entries ON terms.entry_id = entries.id
+        ORDER BY entry, pos, language_code, term
+        """
+    ):
+        for value in row:
+            h.update((value or "").encode("utf-8", "surrogatepass"))
+            h.update(b"\0")
+    return h.digest()
+
+
+class PageIndex:
+    """Index of the pages of an output file: the digest of each page and
+    the byte range of its output."""
+
+    def __init__(self, path: str, fingerprint: str | None = None) -> None:
+        """Opens the index file `path`, or creates it if `fingerprint` is
+        given."""
+        self.conn = sqlite3.connect(path)
+        if fingerprint is not None:
+            self.conn.executescript(
+                """
+                PRAGMA journal_mode = OFF;
+                PRAGMA synchronous = OFF;
+                CREATE TABLE meta (fingerprint TEXT);
+                CREATE TABLE pages (
+                title TEXT PRIMARY KEY,
+                digest BLOB,
+                start INTEGER,
+                end INTEGER,
+                -- (word, lang_code, pos) of the entries, JSON
+                emitted TEXT
+                ) WITHOUT ROWID;
+                """
+            )
+            self.conn.execute("INSERT INTO meta VALUES (?)", (fingerprint,))
+        self.rows: list[tuple[str, bytes, int, int, str]] = []
+
+    def fingerprint(self) -> str | None:
+        for (fingerprint,) in self.conn.execute("SELECT fingerprint FROM meta"):
+            return fingerprint
+        return None
+
+    def get(self, title: str) -> tuple[bytes, int, int, str] | None:
+        for row in self.conn.execute(
+            "SELECT digest, start, end, emitted FROM pages WHERE title = ?",
+            (title,),
+        ):
+            return row
+        return None
+
+    def add(
+        self, title: str, digest: bytes, start: int, end: int, emitted: str
+    ) -> None:
+        self.rows.append((title, digest, start, end, emitted))
+        if len(self.rows) >= 10000:
+            self.flush()
+
+    def flush(self) -> None:
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)", self.rows
+        )
+        self.rows.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self.conn.commit()
+        self.conn.close()
+
+
+class IncrementalRun:
+    """Writes the page index `index_path` of the output, and copies the
+    output of the pages that haven't changed since the run that wrote
+    `previous_output_path`."""
+
+    def __init__(
+        self,
+        wxr: WiktextractContext,
+        index_path: str,
+        previous_output_path: str | None,
+        human_readable: bool,
+        out_buffer: BinaryIO,
+    ) -> None:
+        self.fingerprint = extraction_fingerprint(wxr, human_readable)
+        self.graph = DependencyGraph(wxr.wtp)
+        if os.path.exists(index_path):
+            os.remove(index_path)
+        self.index = PageIndex(index_path, self.fingerprint)
+        self.out_buffer = out_buffer
+        self.offset = out_buffer.tell()
+        self.previous: PageIndex | None = None
+        self.previous_f: BinaryIO | None = None
+        previous_index_path = (
+            previous_output_path + INDEX_SUFFIX
+            if previous_output_path is not None
+            else None
+        )
+        if previous_index_path is not None and not os.path.exists(
+            previous_index_path
+        ):
+            logger.warning(
+                f"Page index {previous_index_path} not found, extracting all "
+                "pages"
+            )
+        elif previous_index_path is not None:
+            previous = PageIndex(previous_index_path)
+            if previous.fingerprint() == self.fingerprint:
+                self.previous = previous
+                self.previous_f = open(previous_output_path, "rb")
+            else:
+                logger.warning(
+                    "Extractor code or settings changed since the previous "
+                    "run, extracting all pages"
+                )
+                previous.conn.close()
+        # Unchanged pages waiting for the output of the pages before them:
+        # key, title, digest, previous start, previous end, emitted words
+        self.copies: list[tuple[int, str, bytes, int, int, str]] = []
+        self.copy_pos = 0
+        # Digests of the pages sent to the workers
+        self.digests: dict[int, tuple[str, bytes]] = {}
+        self.copied_pages = 0
+        self.extracted_pages = 0
+
+    def changed_pages(
+        self, pages: Iterable[tuple[int, Page]]
+    ) -> Iterator[tuple[int, Page]]:
+        """Returns the pages that must be extracted, the other pages are
+        copied from the previous output by `write_page()`."""
+        for key, page in pages:
+            digest = self.graph.page_digest(page, self.fingerprint)
+            row = (
+                self.previous.get(page.title)
+                if self.previous is not None
+                else None
+            )
+            if row is not None and row[0] == digest:
+                _, start, end, emitted = row
+                self.copies.append(
+                    (key, page.title, digest, start, end, emitted)
+                )
+            else:
+                self.digests[key] = (page.title, digest)
+                yield key, page
+
+    def write_copies(self, before_key: int | None, emitted: set) -> None:
+        """Copies the output of the unchanged pages before the page
+        `before_key`, or of all the remaining pages if None."""
+        while self.copy_pos < len(self.copies):
+            key, title, digest, start, end, emitted_json = self.copies[
+                self.copy_pos
+            ]
+            if before_key is not None and key > before_key:
+                break
+            self.copy_pos += 1
+            assert self.previous_f is not None
+            self.previous_f.seek(start)
+            data = self.previous_f.read(end - start)
+            self.out_buffer.write(data)
+            self.index.add(
+                title,
+                digest,
+                self.offset,
+                self.offset + len(data),
+                emitted_json,
+            )
+            self.offset += len(data)
+            emitted.update(tuple(e) for e in json.loads(emitted_json))
+            self.copied_pages += 1
+        if self.copy_pos > 10000:
+            del self.copies[: self.copy_pos]
+            self.copy_pos = 0
+
+    def write_page(
+        self,
+        key: int,
+        data: bytes,
+        page_emitted: list[tuple[str, str, str]],
+        emitted: set,
+        failed: bool = False,
+    ) -> None:
+        """Writes the output of an extracted page, after the unchanged
+        pages before it.  A page that `failed` isn't added to the index."""
+        self.write_copies(key, emitted)
+        self.out_buffer.write(data)
+        title, digest = self.digests.pop(key)
+        if not failed:
+            self.index.add(
+                title,
+                digest,
+                self.offset,
+                self.offset + len(data),
+                json.dumps(page_emitted, ensure_ascii=False),
+            )
+        self.offset += len(data)
+        self.extracted_pages += 1
+
+    def close(self, emitted: set) -> None:
+        self.write_copies(None, emitted)
+        self.index.close()
+        if self.previous is not None:
+            self.previous.conn.close()
+        if self.previous_f is not None:
+            self.previous_f.close()
+        logger.info(
+            f"Extracted {self.extracted_pages} pages, copied "
+            f"{self.copied_pages} unchanged pages from the previous output"
+        )
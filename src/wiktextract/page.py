@@ -5,7 +5,7 @@
 import re
 from collections import defaultdict
 from copy import copy
-from typing import Any, Callable, Optional, Union
+from typing import Any, Callable, NamedTuple, Optional, Union
 
 from mediawiki_langcodes import name_to_code
 from wikitextprocessor.core import (
@@ -20,6 +20,7 @@ from wikitextprocessor.parser import GeneralNode, NodeKind, WikiNode
 from .clean import clean_value
 from .datautils import data_append, data_extend
 from .import_utils import import_extractor_module
+from .trusted_models import use_trusted_models, validate_page_data
 from .wxr_context import WiktextractContext
 
 # NodeKind values for subtitles
@@ -31,18 +32,46 @@ LEVEL_KINDS = {
     NodeKind.LEVEL6,
 }
 
+# Links in the HTML of `clean_node()`
+LINK_RE = re.compile(
+    r"(?is)\[\[:?(\s*([^][|:]+):)?\s*([^]|]+)(\|([^]|]+))?\]\]"
+    #            1   2               3       4  5
+)
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+class CategoryPatterns(NamedTuple):
+    # Names and aliases of the category namespace
+    names: set[str]
+    # Category links, "[[Category:name]]"
+    link: re.Pattern
+    # "(Category:name)" created by some templates, maybe in <sup>
+    parenthesized: re.Pattern
+
+
+# Compiled once for each edition, see `category_patterns()`
+CATEGORY_PATTERNS: dict[str, CategoryPatterns] = {}
+
 
 def parse_page(
-    wxr: WiktextractContext, page_title: str, page_text: str
+    wxr: WiktextractContext,
+    page_title: str,
+    page_text: str,
+    validate_models: bool = True,
 ) -> list[dict[str, Any]]:
     """Parses the text of a Wiktionary page and returns a list of
     dictionaries, one for each word/part-of-speech defined on the page
     for the languages specified by ``capture_language_codes`` (None means
     all available languages).  ``word`` is page title, and ``text`` is
     page text in Wikimedia format.  Other arguments indicate what is
-    captured."""
+    captured.  With trusted models, the data is validated with the
+    edition's models if ``validate_models`` is True."""
     page_extractor_mod = import_extractor_module(wxr.wtp.lang_code, "page")
+    if wxr.config.trusted_models:
+        use_trusted_models(wxr)
     page_data = page_extractor_mod.parse_page(wxr, page_title, page_text)
+    if wxr.config.trusted_models and validate_models:
+        validate_page_data(wxr, page_data)
     if wxr.config.extract_thesaurus_pages:
         inject_linkages(wxr, page_data)
     if wxr.config.dump_file_lang_code == "en":
@@ -161,7 +190,7 @@ def recursively_extract(
 
 def inject_linkages(wxr: WiktextractContext, page_data: list[dict]) -> None:
     # Inject linkages from thesaurus entries
-    from .thesaurus import search_thesaurus
+    from .thesaurus_index import lookup_thesaurus
 
     local_thesaurus_ns = wxr.wtp.NAMESPACE_DATA.get("Thesaurus", {}).get("name")  # type: ignore[call-overload]
     for data in page_data:
@@ -170,12 +199,7 @@ def inject_linkages(wxr: WiktextractContext, page_data: list[dict]) -> None:
         word = data["word"]
         lang_code = data["lang_code"]
         pos = data["pos"]
-        for term in search_thesaurus(
-            wxr.thesaurus_db_conn,  # type:ignore[arg-type]
-            word,
-            lang_code,
-            pos,  # type: ignore[arg-type]
-        ):
+        for term in lookup_thesaurus(wxr, word, lang_code, pos):
             for dt in data.get(term.linkage, ()):
                 if dt.get("word") == term.term and (
                     not term.sense or dt.get("sense") == term.sense
@@ -322,6 +346,31 @@ def remove_duplicate_data(page_data: dict) -> None:
                 del s["raw_glosses"]
 
 
+def category_patterns(wxr: WiktextractContext) -> CategoryPatterns:
+    """Returns the patterns of the category namespace of the edition."""
+    patterns = CATEGORY_PATTERNS.get(wxr.wtp.lang_code)
+    if patterns is None:
+        category_ns_data: NamespaceDataEntry = wxr.wtp.NAMESPACE_DATA.get(
+            "Category",
+            {},  # type: ignore[typeddict-item]
+        )
+        category_ns_names: set[str] = {category_ns_data.get("name")} | set(
+            category_ns_data.get("aliases")  # type:ignore[assignment,arg-type]
+        )
+        category_ns_names |= {"Category", "category"}
+        category_names_pattern = rf"(?:{'|'.join(category_ns_names)})"
+        patterns = CategoryPatterns(
+            category_ns_names,
+            re.compile(rf"(?is)\[\[:?\s*{category_names_pattern}\s*:([^]|]+)"),
+            re.compile(
+                rf"(?si)\s*(?:<sup>)?\({category_names_pattern}:[^)]+\)"
+                r"(?:</sup>)?"
+            ),
+        )
+        CATEGORY_PATTERNS[wxr.wtp.lang_code] = patterns
+    return patterns
+
+
 def clean_node(
     wxr: WiktextractContext,
     sense_data: Optional[Any],
@@ -381,45 +430,32 @@ def clean_node(
     # Capture categories if sense_data has been given.  We also track
     # Lua execution errors here.
     # If collect_links=True (for glosses), capture links
-    category_ns_data: NamespaceDataEntry = wxr.wtp.NAMESPACE_DATA.get(
-        "Category",
-        {},  # type: ignore[typeddict-item]
-    )
-    category_ns_names: set[str] = {category_ns_data.get("name")} | set(
-        category_ns_data.get("aliases")  # type:ignore[assignment,arg-type]
-    )
-    category_ns_names |= {"Category", "category"}
-    category_names_pattern = rf"(?:{'|'.join(category_ns_names)})"
+    patterns = category_patterns(wxr)
     if sense_data is not None:
         # Check for Lua execution error
         if '<strong class="error">Lua execution error' in v:
             data_append(sense_data, "tags", "error-lua-exec")
         if '<strong class="error">Lua timeout error' in v:
             data_append(sense_data, "tags", "error-lua-timeout")
-        # Capture Category tags
-        if not collect_links:
-            for m in re.finditer(
-                rf"(?is)\[\[:?\s*{category_names_pattern}\s*:([^]|]+)",
-                v,
-            ):
+        # Capture Category tags.  Templates add them to the expanded text,
+        # so they are found in the HTML rather than in the nodes.
+        has_links = "[[" in v
+        if has_links and not collect_links:
+            for m in patterns.link.finditer(v):
                 cat = clean_value(wxr, m.group(1))
-                cat = re.sub(r"\s+", " ", cat)
+                cat = WHITESPACE_RE.sub(" ", cat)
                 cat = cat.strip()
                 if not cat:
                     continue
                 if not sense_data_has_value(sense_data, "categories", cat):
                     data_append(sense_data, "categories", cat)
-        else:
-            for m in re.finditer(
-                r"(?is)\[\[:?(\s*([^][|:]+):)?\s*([^]|]+)(\|([^]|]+))?\]\]",
-                #            1   2               3       4  5
-                v,
-            ):
+        elif has_links:
+            for m in LINK_RE.finditer(v):
                 # Add here other stuff different "Something:restofthelink"
                 # things;
-                if m.group(2) and m.group(2).strip() in category_ns_names:
+                if m.group(2) and m.group(2).strip() in patterns.names:
                     cat = clean_value(wxr, m.group(3))
-                    cat = re.sub(r"\s+", " ", cat)
+                    cat = WHITESPACE_RE.sub(" ", cat)
                     cat = cat.strip()
                     if not cat:
                         continue
@@ -435,9 +471,9 @@ def clean_node(
                         txt = clean_value(wxr, m.group(3))
                         ltext = txt
                         ltarget = txt
-                    ltarget = re.sub(r"\s+", " ", ltarget)
+                    ltarget = WHITESPACE_RE.sub(" ", ltarget)
                     ltarget = ltarget.strip()
-                    ltext = re.sub(r"\s+", " ", ltext)
+                    ltext = WHITESPACE_RE.sub(" ", ltext)
                     ltext = ltext.strip()
                     if not ltext and not ltarget:
                         continue
@@ -454,14 +490,11 @@ def clean_node(
     # to clean up erroneous codings in the original text.
     # v = re.sub(r"(?s)\{\{.*", "", v)
     # Some templates create <sup>(Category: ...)</sup>; remove
-    v = re.sub(
-        rf"(?si)\s*(?:<sup>)?\({category_names_pattern}:[^)]+\)(?:</sup>)?",
-        "",
-        v,
-    )
+    if "(" in v:
+        v = patterns.parenthesized.sub("", v)
     # Some templates create question mark in <sup>, e.g.,
     # some Korean Hanja form
-    v = re.sub(r"\^\?", "", v)
+    v = v.replace("^?", "")
     return v
 
 
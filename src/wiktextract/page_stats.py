@@ -0,0 +1,187 @@
+# Per-page timing and resource statistics for finding the pages that
+# dominate the running time of the second phase.  Workers measure each page
+# with `PageStatsCollector`, the parent process writes the records with
+# `PageStatsWriter` and logs a summary at the end of the run.
+
+import heapq
+import json
+import resource
+import time
+from array import array
+from functools import wraps
+from typing import Callable, TypedDict
+
+from wikitextprocessor import Wtp, luaexec
+
+from .wxr_logging import logger
+
+PageStatsData = TypedDict(
+    "PageStatsData",
+    {
+        "title": str,
+        "wall": float,  # seconds
+        "cpu": float,  # seconds
+        "rss": int,  # increase of peak resident set size in KiB
+        "expand": int,  # templates expanded, not found in the cache
+        "lua": int,  # Lua module function calls
+        "out": int,  # output bytes
+    },
+)
+
+
+class PageStatsCollector:
+    """Measures the time and memory used for processing one page in a worker
+    process, and counts template expansion and Lua calls.  The counters are
+    installed with `count_wtp_calls()`."""
+
+    __slots__ = ("title", "wall", "cpu", "rss", "expand", "lua")
+
+    # Updated by the wrapped `Wtp` functions
+    expand_calls = 0
+    lua_calls = 0
+
+    def __init__(self, wtp: Wtp, title: str):
+        self.title = title
+        self.expand = PageStatsCollector.expand_calls
+        self.lua = PageStatsCollector.lua_calls
+        self.rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        self.cpu = time.process_time()
+        self.wall = time.perf_counter()
+
+    def finish(self, out_bytes: int) -> PageStatsData:
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        return {
+            "title": self.title,
+            "wall": round(wall, 4),
+            "cpu": round(cpu, 4),
+            "rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            - self.rss,
+            "expand": PageStatsCollector.expand_calls - self.expand,
+            "lua": PageStatsCollector.lua_calls - self.lua,
+            "out": out_bytes,
+        }
+
+
+def count_wtp_calls(wtp: Wtp) -> None:
+    """Counts the templates expanded by `Wtp.expand()` and the calls of the
+    Lua invoke function.  Must be called before `Wtp.expand()` is wrapped by
+    the expansion cache, which only looks up the templates of the calls
+    without a `template_fn` or `post_template_fn`."""
+    wtp_class = type(wtp)
+    if not getattr(wtp_class.expand, "counts_calls", False):
+        wtp_class.expand = count_template_expansions(wtp_class.expand)  # type: ignore[method-assign]
+    # The Lua runtime is created when the first page that uses it is
+    # processed, its invoke function is wrapped as soon as it exists
+    if hasattr(luaexec, "initialize_lua") and not getattr(
+        luaexec.initialize_lua, "counts_calls", False
+    ):
+        luaexec.initialize_lua = count_lua_calls(luaexec.initialize_lua)
+    if wtp.lua_invoke is not None and not getattr(
+        wtp.lua_invoke, "counts_calls", False
+    ):
+        wtp.lua_invoke = count_calls(wtp.lua_invoke, "lua_calls")
+
+
+def count_calls(func: Callable, counter_name: str) -> Callable:
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        setattr(
+            PageStatsCollector,
+            counter_name,
+            getattr(PageStatsCollector, counter_name) + 1,
+        )
+        return func(*args, **kwargs)
+
+    wrapper.counts_calls = True  # type: ignore[attr-defined]
+    return wrapper
+
+
+def count_lua_calls(initialize_lua: Callable) -> Callable:
+    @wraps(initialize_lua)
+    def wrapper(wtp: Wtp, *args, **kwargs):
+        ret = initialize_lua(wtp, *args, **kwargs)
+        if wtp.lua_invoke is not None and not getattr(
+            wtp.lua_invoke, "counts_calls", False
+        ):
+            wtp.lua_invoke = count_calls(wtp.lua_invoke, "lua_calls")
+        return ret
+
+    wrapper.counts_calls = True  # type: ignore[attr-defined]
+    return wrapper
+
+
+# Index of `post_template_fn` in the positional arguments of `Wtp.expand()`
+# after `text`
+POST_TEMPLATE_FN_POSITION = 3
+
+
+def count_template_expansions(expand: Callable) -> Callable:
+    """Wraps `Wtp.expand()` to count each template it expands, one call can
+    expand any number of templates.  The `post_template_fn` of the caller
+    is still called."""
+
+    @wraps(expand)
+    def wrapper(self, text, *args, **kwargs):
+        if len(args) > POST_TEMPLATE_FN_POSITION:
+            return expand(self, text, *args, **kwargs)
+        post_template_fn = kwargs.get("post_template_fn")
+
+        def counting_post_template_fn(name, ht, expansion):
+            PageStatsCollector.expand_calls += 1
+            if post_template_fn is not None:
+                return post_template_fn(name, ht, expansion)
+            return None
+
+        kwargs["post_template_fn"] = counting_post_template_fn
+        return expand(self, text, *args, **kwargs)
+
+    wrapper.counts_calls = True  # type: ignore[attr-defined]
+    return wrapper
+
+
+class PageStatsWriter:
+    """Writes one JSON line per page and keeps what is needed for the
+    summary: wall times in a compact array and a heap of the slowest
+    pages."""
+
+    def __init__(self, path: str, top_n: int = 20):
+        self.out_f = open(path, "w", encoding="utf-8")
+        self.top_n = top_n
+        self.wall_times = array("f")
+        self.slowest: list[tuple[float, str]] = []
+
+    def add(self, stats: PageStatsData) -> None:
+        self.out_f.write(json.dumps(stats, ensure_ascii=False) + "\n")
+        wall = stats["wall"]
+        self.wall_times.append(wall)
+        if len(self.slowest) < self.top_n:
+            heapq.heappush(self.slowest, (wall, stats["title"]))
+        elif wall > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (wall, stats["title"]))
+
+    def close(self) -> None:
+        self.out_f.close()
+        self.log_summary()
+
+    def log_summary(self) -> None:
+        if len(self.wall_times) == 0:
+            return
+        times = sorted(self.wall_times)
+        total = sum(times)
+        logger.info(
+            f"Page statistics: {len(times)} pages, {total:.1f}s total "
+            "page processing time"
+        )
+        percentiles = ", ".join(
+            f"p{p}: {percentile(times, p):.3f}s" for p in (50, 90, 99, 99.9)
+        )
+        logger.info(f"  {percentiles}, max: {times[-1]:.3f}s")
+        logger.info(f"  {len(self.slowest)} slowest pages:")
+        for wall, title in sorted(self.slowest, reverse=True):
+            logger.info(f"  {wall:10.3f}s {title}")
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))
+    return sorted_values[index]
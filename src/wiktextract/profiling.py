@@ -0,0 +1,57 @@
+# CPU time profiling of the worker processes.  Each worker profiles the
+# pages it processes and writes its stats to a directory when it exits, the
+# parent process merges the stats into one report.
+
+import cProfile
+import os
+import pstats
+from multiprocessing.util import Finalize
+from pathlib import Path
+
+from .wxr_logging import logger
+
+
+class WorkerProfiler:
+    """Profiles every `interval`th page processed in a worker process.  The
+    stats are written to `profile_dir` when the worker process exits."""
+
+    def __init__(self, profile_dir: str, interval: int = 1):
+        self.profile = cProfile.Profile()
+        self.interval = max(interval, 1)
+        self.num_pages = 0
+        self.enabled = False
+        self.path = Path(profile_dir) / f"worker-{os.getpid()}.prof"
+        # `atexit` functions are not called in forked worker processes
+        Finalize(self, self.dump_stats, exitpriority=10)
+
+    def start_page(self) -> None:
+        self.num_pages += 1
+        self.enabled = self.num_pages % self.interval == 0
+        if self.enabled:
+            self.profile.enable()
+
+    def end_page(self) -> None:
+        if self.enabled:
+            self.profile.disable()
+            self.enabled = False
+
+    def dump_stats(self) -> None:
+        self.profile.dump_stats(self.path)
+
+
+def merge_worker_profiles(profile_dir: str, out_path: str) -> None:
+    """Merges the stats files written by the workers into `out_path` and
+    prints the functions with the highest cumulative time."""
+    paths = sorted(Path(profile_dir).glob("worker-*.prof"))
+    if len(paths) == 0:
+        logger.warning(f"No worker profile stats found in {profile_dir}")
+        return
+    stats = pstats.Stats(str(paths[0]))
+    for path in paths[1:]:
+        stats.add(str(path))
+    stats.dump_stats(out_path)
+    logger.info(
+        f"Merged profile stats of {len(paths)} worker processes "
+        f"saved to {out_path}"
+    )
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(50)
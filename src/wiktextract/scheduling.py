@@ -0,0 +1,98 @@
+# Scheduling the pages of the second phase by their expected processing
+# time.  Pages are processed in database order by default, and a chunk of
+# pages that contains a page like "a" can keep one worker busy long after
+# the other workers are done.  The scheduled pages are sent to the workers
+# from the most expensive to the cheapest, in chunks that get smaller as
+# the remaining work decreases, and the output is written in database order
+# afterwards.
+#
+# The expected processing time of a page is its duration in a page stats
+# file (`--page-stats`) of a previous run, or its body length scaled to
+# seconds with the durations of the other pages.
+
+import json
+from collections.abc import Iterable, Iterator
+from typing import NamedTuple
+
+from wikitextprocessor import Page
+
+from .wxr_logging import logger
+
+MAX_CHUNK_PAGES = 100
+# Chunks are cut so that the remaining work could be split into this many
+# chunks per worker
+CHUNKS_PER_WORKER = 4
+
+
+class ScheduledPage(NamedTuple):
+    index: int  # position in database order
+    title: str
+    namespace_id: int
+    cost: float
+
+
+def load_page_durations(path: str) -> dict[str, float]:
+    """Reads the page processing times from a page stats file."""
+    durations = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            stats = json.loads(line)
+            durations[stats["title"]] = stats["wall"]
+    logger.info(f"Loaded processing times of {len(durations)} pages")
+    return durations
+
+
+def schedule_pages(
+    pages: Iterable[Page], durations: dict[str, float] | None = None
+) -> list[ScheduledPage]:
+    """Returns the pages sorted by their expected processing time, the most
+    expensive first."""
+    durations = durations or {}
+    pages_info = []
+    known_time = 0.0
+    known_length = 0
+    for page in pages:
+        length = len(page.body or "")
+        duration = durations.get(page.title)
+        if duration is not None:
+            known_time += duration
+            known_length += length
+        pages_info.append((page.title, page.namespace_id, length, duration))
+    seconds_per_char = known_time / known_length if known_length > 0 else 1.0
+    scheduled = [
+        ScheduledPage(
+            index,
+            title,
+            namespace_id,
+            duration if duration is not None else length * seconds_per_char,
+        )
+        for index, (title, namespace_id, length, duration) in enumerate(
+            pages_info
+        )
+    ]
+    scheduled.sort(key=lambda p: p.cost, reverse=True)
+    return scheduled
+
+
+def chunk_pages(
+    scheduled: list[ScheduledPage], num_workers: int
+) -> Iterator[list[ScheduledPage]]:
+    """Splits the scheduled pages into chunks of about the remaining cost
+    divided by `CHUNKS_PER_WORKER * num_workers`, so the chunks get
+    smaller at the end of the run."""
+    remaining_cost = sum(p.cost for p in scheduled)
+    chunk: list[ScheduledPage] = []
+    chunk_cost = 0.0
+    for page in scheduled:
+        chunk.append(page)
+        chunk_cost += page.cost
+        if (
+            len(chunk) >= MAX_CHUNK_PAGES
+            or chunk_cost >= remaining_cost / (CHUNKS_PER_WORKER * num_workers)
+        ):
+            yield chunk
+            remaining_cost -= chunk_cost
+            chunk = []
+            chunk_cost = 0.0
+    if len(chunk) > 0:
+        yield chunk
@@ -0,0 +1,85 @@
+# Splitting the second phase into shards that can be processed on different
+# machines with copies of the same database, and merging the shard outputs.
+#
+# Each shard processes the pages whose title hash falls into it.  Words
+# that only occur in the thesaurus can only be found when the words of all
+# shards are known, so the shards save their emitted words next to their
+# output file and the thesaurus words are written when the outputs are
+# merged.
+
+import json
+import shutil
+import zlib
+from collections.abc import Iterable, Iterator
+from typing import TextIO
+
+from wikitextprocessor import Page
+
+from .compressed_output import open_input
+from .thesaurus import emit_words_in_thesaurus
+from .wxr_context import WiktextractContext
+from .wxr_logging import logger
+
+EMITTED_WORDS_SUFFIX = ".emitted"
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    """Parses the "I/N" shard argument, I is from 1 to N.  Returns the
+    zero-based shard index and the number of shards."""
+    index_str, _, count_str = value.partition("/")
+    try:
+        index = int(index_str)
+        count = int(count_str)
+    except ValueError:
+        raise ValueError(f"Invalid shard {value!r}, should be I/N")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard {value!r}, I must be from 1 to N")
+    return index - 1, count
+
+
+def shard_pages(
+    pages: Iterable[Page], shard: tuple[int, int]
+) -> Iterator[Page]:
+    index, count = shard
+    for page in pages:
+        if zlib.crc32(page.title.encode("utf-8")) % count == index:
+            yield page
+
+
+def write_emitted_words(
+    path: str, emitted: Iterable[tuple[str, str, str]]
+) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for word_lang_pos in emitted:
+            f.write(json.dumps(word_lang_pos, ensure_ascii=False) + "\n")
+
+
+def read_emitted_words(path: str) -> set[tuple[str, str, str]]:
+    with open(path, encoding="utf-8") as f:
+        return {tuple(json.loads(line)) for line in f}  # type: ignore[misc]
+
+
+def merge_shards(
+    wxr: WiktextractContext,
+    shard_paths: list[str],
+    out_f: TextIO,
+    human_readable: bool,
+    errors_paths: list[str] | None = None,
+) -> None:
+    """Concatenates the shard output files to `out_f`, writes the words that
+    only occur in the thesaurus and merges the shard `--errors` files into
+    `wxr.config`."""
+    logger.info(f"Merging {len(shard_paths)} shard output files")
+    emitted: set[tuple[str, str, str]] = set()
+    for path in shard_paths:
+        with open_input(path) as f:
+            shutil.copyfileobj(f, out_f, 1024 * 1024)
+        emitted |= read_emitted_words(path + EMITTED_WORDS_SUFFIX)
+
+    if wxr.config.dump_file_lang_code == "en":
+        emit_words_in_thesaurus(wxr, emitted, out_f, human_readable)
+
+    for path in errors_paths or []:
+        with open(path, encoding="utf-8") as f:
+            ret = json.load(f)
+        wxr.config.merge_return(ret)
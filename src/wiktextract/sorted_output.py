@@ -0,0 +1,91 @@
+# Writing the output entries sorted by word, language code and part of
+# speech, so the output of two runs can be compared without sorting the
+# files afterwards, or sorted by another key like the position of the page
+# in the database.  This is an external merge sort: sorted runs of entries
+# are spilled to temporary files while the pages are processed, and merged
+# into the output file at the end.
+
+import heapq
+import os
+import pickle
+import tempfile
+from collections.abc import Iterator
+from typing import BinaryIO, TextIO
+
+# Word (or title of redirect pages), language code, part of speech and the
+# JSON line encoded in UTF-8
+OutputEntry = tuple[str, str, str, bytes]
+# Sort key and JSON line
+SortEntry = tuple[tuple, bytes]
+
+
+class SortedOutput:
+    """Collects the output entries and writes them sorted to `out_f` when
+    `close()` is called.  At most about `max_buffer_size` bytes of JSON
+    lines are kept in memory."""
+
+    def __init__(
+        self,
+        out_f: TextIO,
+        max_buffer_size: int = 256 * 1024 * 1024,
+        tmp_dir: str | None = None,
+    ):
+        self.out_f = out_f
+        self.max_buffer_size = max_buffer_size
+        self.buffer: list[SortEntry] = []
+        self.buffer_size = 0
+        self.tmp_dir = tempfile.TemporaryDirectory(
+            prefix="wiktextract-sort", dir=tmp_dir
+        )
+        self.run_paths: list[str] = []
+
+    def add(self, word: str, lang_code: str, pos: str, line: bytes) -> None:
+        # The JSON line is the last part of the sort key, so entries with
+        # the same word, language and POS are always in the same order
+        self.add_sorted((word, lang_code, pos), line)
+
+    def add_sorted(self, key: tuple, line: bytes) -> None:
+        """Adds a line sorted by `key`, all keys must be comparable."""
+        self.buffer.append((key, line))
+        self.buffer_size += len(line)
+        if self.buffer_size >= self.max_buffer_size:
+            self.spill()
+
+    def spill(self) -> None:
+        self.buffer.sort()
+        path = os.path.join(self.tmp_dir.name, f"{len(self.run_paths)}.pickle")
+        with open(path, "wb") as f:
+            for entry in self.buffer:
+                pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+        self.run_paths.append(path)
+        self.buffer.clear()
+        self.buffer_size = 0
+
+    def close(self) -> None:
+        """Writes all entries to the output file."""
+        self.out_f.flush()
+        out_buffer: BinaryIO = self.out_f.buffer  # type: ignore[attr-defined]
+        if len(self.run_paths) == 0:
+            self.buffer.sort()
+            for _, line in self.buffer:
+                out_buffer.write(line)
+            self.buffer.clear()
+        else:
+            if len(self.buffer) > 0:
+                self.spill()
+            run_files = [open(path, "rb") for path in self.run_paths]
+            try:
+                for _, line in heapq.merge(*map(read_run, run_files)):
+                    out_buffer.write(line)
+            finally:
+                for f in run_files:
+                    f.close()
+        self.tmp_dir.cleanup()
+
+
+def read_run(f: BinaryIO) -> Iterator[SortEntry]:
+    while True:
+        try:
+            yield pickle.load(f)
+        except EOFError:
+            return
@@ -0,0 +1,73 @@
+# Cache of tables derived from large source tables at import time, like
+# the tag sequence tree of the English extractor.  Worker processes are
+# started with the "spawn" method and import the extractor modules again,
+# so each worker would otherwise build the same tables.
+#
+# The tables are saved with `marshal` in a cache directory, the file name
+# contains a hash of the files the tables are built from.  When a source
+# file changes, the table is rebuilt and saved with the new hash.
+
+import hashlib
+import marshal
+import os
+import sys
+import tempfile
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from .wxr_logging import logger
+
+# Increase when the format of a cached table changes
+TABLE_CACHE_VERSION = 1
+
+
+def table_cache_dir() -> Path:
+    """Returns the cache directory, set with the WIKTEXTRACT_CACHE_DIR
+    environment variable or "wiktextract" in the user cache directory."""
+    if "WIKTEXTRACT_CACHE_DIR" in os.environ:
+        return Path(os.environ["WIKTEXTRACT_CACHE_DIR"])
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "wiktextract"
+
+
+def sources_hash(source_paths: list[str]) -> str:
+    h = hashlib.sha256()
+    # `marshal` format depends on the Python version
+    h.update(f"{TABLE_CACHE_VERSION} {sys.version_info[:2]}".encode())
+    for path in source_paths:
+        h.update(Path(path).read_bytes())
+    return h.hexdigest()[:16]
+
+
+def cached_table(
+    name: str, source_paths: list[str], build: Callable[[], Any]
+) -> Any:
+    """Returns the table `name` from the cache if it was saved from the
+    same `source_paths` files, otherwise calls `build()` and saves the
+    table.  The table must only contain types supported by `marshal`."""
+    cache_dir = table_cache_dir()
+    path = cache_dir / f"{name}-{sources_hash(source_paths)}.marshal"
+    try:
+        with path.open("rb") as f:
+            return marshal.load(f)
+    except FileNotFoundError:
+        pass
+    except (OSError, EOFError, ValueError, TypeError) as e:
+        logger.warning(f"Can't load cached table {path}: {e}")
+
+    table = build()
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # Other processes may build the same table at the same time
+        with tempfile.NamedTemporaryFile(
+            "wb", dir=cache_dir, prefix=f".{name}", delete=False
+        ) as f:
+            marshal.dump(table, f)
+        os.replace(f.name, path)
+        for old_path in cache_dir.glob(f"{name}-*.marshal"):
+            if old_path != path:
+                old_path.unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning(f"Can't save cached table {path}: {e}")
+    return table
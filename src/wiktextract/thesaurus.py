@@ -2,16 +2,13 @@
 # merged into word linkages in later stages.
 #
 # Copyright (c) 2021 Tatu Ylonen.  See file LICENSE and https://ylonen.org
-import atexit
-import os
 import sqlite3
 import tempfile
 import time
 from collections.abc import Iterable
 from concurrent.futures import ProcessPoolExecutor
-from copy import deepcopy
 from dataclasses import dataclass, field
-from multiprocessing import current_process, get_context
+from multiprocessing import current_process
 from pathlib import Path
 from traceback import format_exc
 from typing import Optional, TextIO
@@ -21,6 +18,8 @@ from wikitextprocessor import Page
 from wikitextprocessor.core import CollatedErrorReturnData, NamespaceDataEntry
 
 from .import_utils import import_extractor_module
+from .sorted_output import SortedOutput
+from .worker_pool import create_worker_pool, worker_context
 from .wxr_context import WiktextractContext
 from .wxr_logging import logger
 
@@ -40,34 +39,54 @@ class ThesaurusTerm:
     sense: str = ""
 
 
-def init_worker(wxr: WiktextractContext) -> None:
-    global worker_wxr
-    worker_wxr = wxr
-    worker_wxr.reconnect_databases()
-    atexit.register(worker_wxr.remove_unpicklable_objects)
+# Suffix of the thesaurus index file next to the database, see
+# thesaurus_index.py
+INDEX_SUFFIX = ".index"
+# Terms of a thesaurus entry sent by the workers: entry, language code,
+# part of speech, sense, and a (term, linkage, tags, topics, roman,
+# raw_tags) row for each term
+EntryTerms = tuple[str, str, str, str, list[tuple[str, ...]]]
 
 
 def worker_func(
     page: Page,
-) -> tuple[bool, list[ThesaurusTerm], CollatedErrorReturnData, Optional[str]]:
-    with tempfile.TemporaryDirectory(prefix="wiktextract") as tmpdirname:
-        debug_path = "{}/wiktextract-{}".format(tmpdirname, os.getpid())
-        with open(debug_path, "w", encoding="utf-8") as f:
-            f.write(page.title + "\n")
-
-        worker_wxr.wtp.start_page(page.title)
-        try:
-            terms = extract_thesaurus_page(worker_wxr, page)
-            return True, terms, worker_wxr.wtp.to_return(), None
-        except Exception:
-            msg = (
-                '=== EXCEPTION while parsing page "{}":\n in process {}'.format(
-                    page.title,
-                    current_process().name,
-                )
-                + format_exc()
+) -> tuple[bool, list[EntryTerms], CollatedErrorReturnData, Optional[str]]:
+    worker_wxr = worker_context()
+    worker_wxr.wtp.start_page(page.title)
+    try:
+        terms = extract_thesaurus_page(worker_wxr, page)
+        return True, group_terms(terms), worker_wxr.wtp.to_return(), None
+    except Exception:
+        msg = (
+            '=== EXCEPTION while parsing page "{}":\n in process {}'.format(
+                page.title,
+                current_process().name,
             )
-            return False, [], {}, msg  # type:ignore[typeddict-item]
+            + format_exc()
+        )
+        return False, [], {}, msg  # type:ignore[typeddict-item]
+
+
+def group_terms(terms: list[ThesaurusTerm]) -> list[EntryTerms]:
+    """Groups the terms of a page by entry, with the tags joined like in
+    the database.  The sense of the first term of an entry is kept."""
+    entries: dict[tuple[str, str, str], EntryTerms] = {}
+    for term in terms:
+        key = (term.entry, term.language_code, term.pos)
+        entry = entries.get(key)
+        if entry is None:
+            entry = entries[key] = (*key, term.sense, [])
+        entry[4].append(
+            (
+                term.term,
+                term.linkage,
+                "|".join(term.tags),
+                "|".join(term.topics),
+                term.roman,
+                "|".join(term.raw_tags),
+            )
+        )
+    return list(entries.values())
 
 
 def extract_thesaurus_page(
@@ -80,8 +99,13 @@ def extract_thesaurus_page(
 
 
 def extract_thesaurus_data(
-    wxr: WiktextractContext, num_processes: Optional[int] = None
+    wxr: WiktextractContext,
+    num_processes: Optional[int] = None,
+    executor: Optional[ProcessPoolExecutor] = None,
 ) -> None:
+    """Extracts the thesaurus pages to the thesaurus database.  The pages
+    are processed in the worker pool `executor`, or in a new pool of
+    `num_processes` workers."""
     start_t = time.time()
     logger.info("Extracting thesaurus data")
     thesaurus_ns_data: NamespaceDataEntry = wxr.wtp.NAMESPACE_DATA.get(
@@ -90,26 +114,11 @@ def extract_thesaurus_data(
     )
     thesaurus_ns_id = thesaurus_ns_data.get("id", 0)
 
-    wxr.remove_unpicklable_objects()
-    with ProcessPoolExecutor(
-        max_workers=num_processes,
-        mp_context=get_context("spawn"),
-        initializer=init_worker,
-        initargs=(deepcopy(wxr),),
-    ) as executor:
-        wxr.reconnect_databases()
-        for success, terms, stats, err in executor.map(
-            worker_func,
-            wxr.wtp.get_all_pages([thesaurus_ns_id], False),
-            chunksize=100,  # default is 1 too slow
-        ):
-            if not success:
-                # Print error in parent process - do not remove
-                logger.error(err)
-                continue
-            for term in terms:
-                insert_thesaurus_term(wxr.thesaurus_db_conn, term)  # type:ignore[arg-type]
-            wxr.config.merge_return(stats)
+    if executor is None:
+        with create_worker_pool(wxr, num_processes) as executor:
+            extract_thesaurus_pages(wxr, executor, thesaurus_ns_id)
+    else:
+        extract_thesaurus_pages(wxr, executor, thesaurus_ns_id)
 
     wxr.thesaurus_db_conn.commit()  # type:ignore[union-attr]
     num_pages = wxr.wtp.saved_page_nums([thesaurus_ns_id], False)
@@ -121,6 +130,112 @@ def extract_thesaurus_data(
     )
 
 
+def extract_thesaurus_pages(
+    wxr: WiktextractContext,
+    executor: ProcessPoolExecutor,
+    thesaurus_ns_id: int,
+) -> None:
+    loader = ThesaurusLoader(wxr.thesaurus_db_conn)  # type:ignore[arg-type]
+    for success, entries, stats, err in executor.map(
+        worker_func,
+        wxr.wtp.get_all_pages([thesaurus_ns_id], False),
+        chunksize=100,  # default is 1 too slow
+    ):
+        if not success:
+            # Print error in parent process - do not remove
+            logger.error(err)
+            continue
+        loader.add(entries)
+        wxr.config.merge_return(stats)
+    loader.finish()
+
+
+class ThesaurusLoader:
+    """Loads the terms of the thesaurus pages to the database in batches.
+    The entries of a batch are written to a staging table, added to the
+    `entries` table and their IDs read back with one statement each, and
+    the terms are inserted with `executemany()`, instead of up to three
+    statements for each term.  The index of the terms by entry is created
+    after the terms are loaded."""
+
+    def __init__(
+        self, db_conn: sqlite3.Connection, batch_size: int = 10000
+    ) -> None:
+        self.db_conn = db_conn
+        self.batch_size = batch_size
+        self.entry_ids: dict[tuple[str, str, str], int] = {}
+        self.entries: list[EntryTerms] = []
+        self.num_terms = 0
+        db_conn.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS staging_entries (
+            entry TEXT,
+            language_code TEXT,
+            pos TEXT,
+            sense TEXT
+            )
+            """
+        )
+
+    def add(self, entries: list[EntryTerms]) -> None:
+        self.entries.extend(entries)
+        self.num_terms += sum(len(entry[4]) for entry in entries)
+        if self.num_terms >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        new_entries = {}
+        for entry in self.entries:
+            key = entry[:3]
+            if key not in self.entry_ids and key not in new_entries:
+                new_entries[key] = entry[3]
+        if len(new_entries) > 0:
+            self.db_conn.executemany(
+                "INSERT INTO staging_entries VALUES(?, ?, ?, ?)",
+                ((*key, sense) for key, sense in new_entries.items()),
+            )
+            # The sense of the first term of an entry is kept.  The entries
+            # are matched with `IS` because the part of speech can be NULL.
+            self.db_conn.execute(
+                """
+                INSERT OR IGNORE INTO entries
+                (entry, language_code, pos, sense)
+                SELECT entry, language_code, pos, sense FROM staging_entries
+                ORDER BY rowid
+                """
+            )
+            for entry, language_code, pos, entry_id in self.db_conn.execute(
+                """
+                SELECT s.entry, s.language_code, s.pos, e.id
+                FROM staging_entries s JOIN entries e ON e.entry IS s.entry
+                AND e.language_code IS s.language_code AND e.pos IS s.pos
+                """
+            ):
+                self.entry_ids[(entry, language_code, pos)] = entry_id
+            self.db_conn.execute("DELETE FROM staging_entries")
+        self.db_conn.executemany(
+            """
+            INSERT OR IGNORE INTO terms
+            (entry_id, term, linkage, tags, topics, roman, raw_tags)
+            VALUES(?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                (self.entry_ids.get(entry[:3]), *term)
+                for entry in self.entries
+                for term in entry[4]
+            ),
+        )
+        self.entries.clear()
+        self.num_terms = 0
+
+    def finish(self) -> None:
+        self.flush()
+        self.db_conn.execute("DROP TABLE staging_entries")
+        self.db_conn.execute(
+            "CREATE INDEX IF NOT EXISTS terms_entry_index ON terms(entry_id)"
+        )
+
+
 def init_thesaurus_db(db_path: Path) -> sqlite3.Connection:
     conn = sqlite3.connect(db_path)
     conn.executescript(
@@ -193,51 +308,17 @@ def search_thesaurus(
         )
 
 
-def insert_thesaurus_term(
-    db_conn: sqlite3.Connection, term: ThesaurusTerm
-) -> None:
-    entry_id = None
-    for (new_entry_id,) in db_conn.execute(
-        "INSERT OR IGNORE INTO entries (entry, language_code, pos, sense) "
-        "VALUES(?, ?, ?, ?) RETURNING id",
-        (term.entry, term.language_code, term.pos, term.sense),
-    ):
-        entry_id = new_entry_id
-    if entry_id is None:
-        for (old_entry_id,) in db_conn.execute(
-            "SELECT id FROM entries WHERE entry = ? AND language_code = ? "
-            "AND pos = ?",
-            (term.entry, term.language_code, term.pos),
-        ):
-            entry_id = old_entry_id
-    db_conn.execute(
-        """
-        INSERT OR IGNORE INTO terms
-        (term, entry_id, linkage, tags, topics, roman, raw_tags)
-        VALUES(?, ?, ?, ?, ?, ?, ?)
-        """,
-        (
-            term.term,
-            entry_id,
-            term.linkage,
-            "|".join(term.tags),
-            "|".join(term.topics),
-            term.roman,
-            "|".join(term.raw_tags),
-        ),
-    )
-
-
 def close_thesaurus_db(db_path: Path, db_conn: sqlite3.Connection) -> None:
     db_conn.close()
     if db_path.parent.samefile(Path(tempfile.gettempdir())):
         db_path.unlink(True)
+        db_path.with_suffix(INDEX_SUFFIX).unlink(True)
 
 
 def emit_words_in_thesaurus(
     wxr: WiktextractContext,
     emitted: set[tuple[str, str, str]],
-    out_f: TextIO,
+    out_f: TextIO | SortedOutput,
     human_readable: bool,
 ) -> None:
     # Emit words that occur in thesaurus as main words but for which
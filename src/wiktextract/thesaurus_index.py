@@ -0,0 +1,188 @@
+# Read-only index of the thesaurus database for the lookups of the second
+# phase.  Each page looks up the thesaurus terms of each of its entries,
+# which would otherwise be a join query on the thesaurus database in every
+# worker process.
+#
+# The index is written by the parent process after the thesaurus
+# extraction and mapped into memory by the workers, so the operating
+# system shares one copy of it.  The file contains a header, the sorted
+# 64-bit hashes of the (entry, language code, part of speech) keys, the
+# offsets of the data of each key, and the data: the key and the terms
+# saved with `marshal`, with the tags already split.
+
+import hashlib
+import marshal
+import mmap
+import os
+import sqlite3
+import struct
+import tempfile
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable
+from pathlib import Path
+
+from .thesaurus import INDEX_SUFFIX, ThesaurusTerm, search_thesaurus
+from .wxr_context import WiktextractContext
+from .wxr_logging import logger
+
+INDEX_MAGIC = b"WXTHES01"
+# Magic, number of keys; the hashes and offsets are in native byte order
+HEADER = struct.Struct("=8sQ")
+
+
+def key_hash(entry: str, lang_code: str, pos: str) -> int:
+    h = hashlib.blake2b(digest_size=8)
+    h.update(f"{entry}\0{lang_code}\0{pos}".encode("utf-8", "surrogatepass"))
+    return int.from_bytes(h.digest(), "little")
+
+
+def split_tags(tags: str) -> list[str]:
+    return tags.split("|") if len(tags) > 0 else []
+
+
+def build_thesaurus_index(db_conn: sqlite3.Connection, path: Path) -> None:
+    """Writes the index of the thesaurus database to `path`.  The terms of
+    an entry are in the order `search_thesaurus()` returns them."""
+    keys: list[tuple[int, bytes]] = []
+    current_id = None
+    current: tuple[str, str, str, list] | None = None
+    for row in db_conn.execute(
+        """
+        SELECT entries.id, entry, language_code, pos, term, linkage, tags,
+        topics, roman, sense, raw_tags
+        FROM terms JOIN entries ON terms.entry_id = entries.id
+        WHERE entry IS NOT NULL AND language_code IS NOT NULL
+        AND pos IS NOT NULL
+        ORDER BY entries.id, terms.rowid
+        """
+    ):
+        if row[0] != current_id:
+            if current is not None:
+                keys.append((key_hash(*current[:3]), marshal.dumps(current)))
+            current_id = row[0]
+            current = (row[1], row[2], row[3], [])
+        current[3].append(  # type: ignore[index]
+            (
+                row[4],
+                row[0],
+                row[5],
+                split_tags(row[6]),
+                split_tags(row[7]),
+                row[8],
+                row[9],
+                split_tags(row[10]),
+            )
+        )
+    if current is not None:
+        keys.append((key_hash(*current[:3]), marshal.dumps(current)))
+    keys.sort(key=lambda k: k[0])
+
+    # Written to a temporary file and renamed, the workers of another run
+    # may be using the previous index
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(HEADER.pack(INDEX_MAGIC, len(keys)))
+        f.write(array("Q", (k[0] for k in keys)).tobytes())
+        offsets = array("Q", [0])
+        for _, data in keys:
+            offsets.append(offsets[-1] + len(data))
+        f.write(offsets.tobytes())
+        for _, data in keys:
+            f.write(data)
+    os.replace(tmp_path, path)
+    logger.info(f"Wrote the thesaurus index of {len(keys)} entries")
+
+
+class ThesaurusIndex:
+    """Memory-mapped index written by `build_thesaurus_index()`."""
+
+    def __init__(self, path: str | Path) -> None:
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER.unpack_from(self.map)
+        if magic != INDEX_MAGIC:
+            raise ValueError(f"{path} is not a thesaurus index")
+        view = memoryview(self.map)
+        start = HEADER.size
+        self.hashes = view[start : start + count * 8].cast("Q")
+        start += count * 8
+        self.offsets = view[start : start + (count + 1) * 8].cast("Q")
+        self.data = view[start + (count + 1) * 8 :]
+
+    def search(
+        self,
+        entry: str,
+        lang_code: str,
+        pos: str,
+        linkage_type: str | None = None,
+    ) -> list[ThesaurusTerm]:
+        h = key_hash(entry, lang_code, pos)
+        i = bisect_left(self.hashes, h)
+        while i < len(self.hashes) and self.hashes[i] == h:
+            key_entry, key_lang_code, key_pos, terms = marshal.loads(
+                self.data[self.offsets[i] : self.offsets[i + 1]]
+            )
+            if (key_entry, key_lang_code, key_pos) == (entry, lang_code, pos):
+                return [
+                    ThesaurusTerm(
+                        entry=entry,
+                        language_code=lang_code,
+                        pos=pos,
+                        term=term,
+                        entry_id=entry_id,
+                        linkage=linkage,
+                        tags=tags,
+                        topics=topics,
+                        roman=roman,
+                        sense=sense,
+                        raw_tags=raw_tags,
+                    )
+                    for (
+                        term,
+                        entry_id,
+                        linkage,
+                        tags,
+                        topics,
+                        roman,
+                        sense,
+                        raw_tags,
+                    ) in terms
+                    if linkage_type is None or linkage == linkage_type
+                ]
+            i += 1
+        return []
+
+
+def thesaurus_index_path(wxr: WiktextractContext) -> Path:
+    return wxr.thesaurus_db_path.with_suffix(INDEX_SUFFIX)
+
+
+def use_thesaurus_index(path: str | None) -> None:
+    """Makes `lookup_thesaurus()` use the index file `path` in this
+    process, None to use the thesaurus database."""
+    global thesaurus_index
+    thesaurus_index = ThesaurusIndex(path) if path is not None else None
+
+
+thesaurus_index: ThesaurusIndex | None = None
+
+
+def lookup_thesaurus(
+    wxr: WiktextractContext,
+    entry: str,
+    lang_code: str,
+    pos: str,
+    linkage_type: str | None = None,
+) -> Iterable[ThesaurusTerm]:
+    """Returns the thesaurus terms of an entry from the index if it's used,
+    otherwise from the thesaurus database."""
+    if thesaurus_index is not None:
+        return thesaurus_index.search(entry, lang_code, pos, linkage_type)
+    return search_thesaurus(
+        wxr.thesaurus_db_conn,  # type:ignore[arg-type]
+        entry,
+        lang_code,
+        pos,
+        linkage_type,
+    )
@@ -0,0 +1,165 @@
+# Read-only set of the page titles of the database.  The English extractor
+# checks if candidate words are pages of the dictionary in its inner loops
+# (linkages, form-of descriptions, slash separated alternatives), and each
+# `Wtp.page_exists()` call is a database query.
+#
+# The index is written next to the database file at the end of the first
+# phase, and mapped into memory by the workers of the second phase, so the
+# operating system shares one copy of it.  It's an open addressing hash
+# table: the header, the slots with the number of the title (0 for empty
+# slots), the offsets of the titles and the UTF-8 encoded titles.  A lookup
+# hashes the title with CRC-32 and compares the titles of the slots from
+# its hash slot to the first empty slot.  The header has a digest of the
+# titles, the index is written again when the titles of the database
+# change.
+
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from array import array
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from wikitextprocessor import Wtp
+
+from .wxr_context import WiktextractContext
+from .wxr_logging import logger
+
+INDEX_MAGIC = b"WXTITL02"
+# Magic, digest of the titles of the database, number of titles, number
+# of slots; the slots and offsets are in native byte order
+HEADER = struct.Struct("=8s16sQQ")
+INDEX_SUFFIX = ".titles"
+# At most this fraction of the slots is used
+MAX_LOAD = 0.6
+
+
+def encode_title(title: str) -> bytes:
+    return title.encode("utf-8", "surrogatepass")
+
+
+def database_titles(wtp: Wtp) -> Iterator[bytes]:
+    """Yields the encoded titles of the pages of the database, in the
+    order of the primary key so that the table isn't read."""
+    for (title,) in wtp.db_conn.execute(
+        "SELECT title FROM pages ORDER BY title, namespace_id"
+    ):
+        yield encode_title(title)
+
+
+def titles_digest(titles: Iterable[bytes]) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for title in titles:
+        h.update(title)
+        h.update(b"\0")
+    return h.digest()
+
+
+def build_title_index(wtp: Wtp, path: Path) -> None:
+    """Writes the index of the titles of the pages of the database to
+    `path`."""
+    all_titles = list(database_titles(wtp))
+    digest = titles_digest(all_titles)
+    titles = set(all_titles)
+    del all_titles
+    num_slots = 8
+    while num_slots * MAX_LOAD < len(titles):
+        num_slots *= 2
+    mask = num_slots - 1
+    slots = array("I", bytes(4 * num_slots))
+    offsets = array("Q", [0])
+    for number, title in enumerate(titles, 1):
+        slot = zlib.crc32(title) & mask
+        while slots[slot] != 0:
+            slot = (slot + 1) & mask
+        slots[slot] = number
+        offsets.append(offsets[-1] + len(title))
+
+    # Written to a temporary file and renamed, the workers of another run
+    # may be using the previous index
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(HEADER.pack(INDEX_MAGIC, digest, len(titles), num_slots))
+        f.write(slots.tobytes())
+        f.write(offsets.tobytes())
+        for title in titles:
+            f.write(title)
+    os.replace(tmp_path, path)
+    logger.info(f"Wrote the title index of {len(titles)} pages")
+
+
+class TitleIndex:
+    """Memory-mapped index written by `build_title_index()`."""
+
+    def __init__(self, path: str | Path) -> None:
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.digest, num_titles, num_slots = HEADER.unpack_from(self.map)
+        if magic != INDEX_MAGIC:
+            raise ValueError(f"{path} is not a title index")
+        self.mask = num_slots - 1
+        view = memoryview(self.map)
+        start = HEADER.size
+        self.slots = view[start : start + num_slots * 4].cast("I")
+        start += num_slots * 4
+        self.offsets = view[start : start + (num_titles + 1) * 8].cast("Q")
+        self.titles = view[start + (num_titles + 1) * 8 :]
+
+    def __contains__(self, title: str) -> bool:
+        # Like `Wtp.page_exists()`
+        encoded = encode_title(title.removeprefix("Main:"))
+        slots = self.slots
+        offsets = self.offsets
+        slot = zlib.crc32(encoded) & self.mask
+        while True:
+            number = slots[slot]
+            if number == 0:
+                return False
+            if self.titles[offsets[number - 1] : offsets[number]] == encoded:
+                return True
+            slot = (slot + 1) & self.mask
+
+
+def title_index_path(wtp: Wtp) -> Path:
+    return wtp.db_path.with_suffix(INDEX_SUFFIX)  # type: ignore[union-attr]
+
+
+def update_title_index(wtp: Wtp) -> Path:
+    """Returns the path of the title index of the database, the index is
+    written again if it's missing or if the titles have changed."""
+    path = title_index_path(wtp)
+    try:
+        digest = TitleIndex(path).digest
+    except (OSError, ValueError, struct.error):
+        digest = None
+    if digest != titles_digest(database_titles(wtp)):
+        build_title_index(wtp, path)
+    return path
+
+
+def remove_title_index(wtp: Wtp) -> None:
+    """Removes the title index of a temporary database."""
+    path = title_index_path(wtp)
+    if path.parent.samefile(Path(tempfile.gettempdir())):
+        path.unlink(True)
+
+
+def use_title_index(path: str | None) -> None:
+    """Makes `page_exists()` use the index file `path` in this process,
+    None to query the database."""
+    global title_index
+    title_index = TitleIndex(path) if path is not None else None
+
+
+title_index: TitleIndex | None = None
+
+
+def page_exists(wxr: WiktextractContext, title: str) -> bool:
+    """Returns True if a page of the database has this title, like
+    `Wtp.page_exists()`."""
+    if title_index is not None:
+        return title in title_index
+    return wxr.wtp.page_exists(title)
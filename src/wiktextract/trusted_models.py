@@ -0,0 +1,119 @@
+# Trusted mode of the pydantic models of the extractors, selected with
+# `WiktionaryConfig.trusted_models`.  The models validate every attribute
+# assignment (`validate_assignment=True`).  In trusted mode the assignments
+# are not validated, and the dumped data of the pages selected by
+# `--validate` is validated once instead, so invalid data still makes those
+# pages fail.  Validating the data of a page costs about as much as
+# creating its models, so trusted mode only saves time with
+# `--validate=sampled` or `--validate=off`.
+#
+# Validated assignments store copies of the lists and dicts, only the model
+# instances in them are shared.  The trusted assignments copy them the same
+# way, so the extractors that modify a list after assigning it get the same
+# data.  The assignment handlers are installed in pydantic's cache of
+# `__setattr__` handlers (pydantic 2.11 and later).  That cache is private,
+# so a probe model checks that assignments still go through it before the
+# edition's models are changed, otherwise the assignments are validated.
+
+from functools import cache
+from types import ModuleType
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, ValidationError
+
+from .import_utils import import_extractor_module
+from .wxr_context import WiktextractContext
+from .wxr_logging import logger
+
+# Editions whose models are in trusted mode
+trusted_editions: set[str] = set()
+
+
+def copy_containers(value: Any) -> Any:
+    """Copies the lists, dicts and tuples of an assigned value like its
+    validation does."""
+    if isinstance(value, list):
+        return [copy_containers(v) for v in value]
+    if isinstance(value, dict):
+        return {k: copy_containers(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return tuple(copy_containers(v) for v in value)
+    return value
+
+
+def trusted_setattr(model: BaseModel, name: str, value: Any) -> None:
+    model.__dict__[name] = copy_containers(value)
+    model.__pydantic_fields_set__.add(name)
+
+
+def model_classes(models_mod: ModuleType) -> list[type[BaseModel]]:
+    """Returns the pydantic models defined in a models module."""
+    return [
+        cls
+        for cls in vars(models_mod).values()
+        if isinstance(cls, type)
+        and issubclass(cls, BaseModel)
+        and cls.__module__ == models_mod.__name__
+    ]
+
+
+@cache
+def setattr_handlers_used() -> bool:
+    """Returns True if this pydantic version calls the handlers of
+    `__pydantic_setattr_handlers__` on assignment."""
+
+    class Probe(BaseModel):
+        model_config = ConfigDict(validate_assignment=True)
+        value: int = 0
+
+    handlers = getattr(Probe, "__pydantic_setattr_handlers__", None)
+    if not isinstance(handlers, dict):
+        return False
+    handlers["value"] = trusted_setattr
+    probe = Probe()
+    try:
+        probe.value = "not validated"  # type: ignore[assignment]
+    except ValidationError:
+        return False
+    return probe.value == "not validated"
+
+
+def set_trusted_models(models_mod: ModuleType, trusted: bool) -> None:
+    """Turns the validation of the assignments of the models of a models
+    module off or on again."""
+    if trusted and not setattr_handlers_used():
+        logger.warning(
+            "This pydantic version doesn't use the assignment handlers, "
+            "the assignments are validated"
+        )
+        return
+    for cls in model_classes(models_mod):
+        handlers = getattr(cls, "__pydantic_setattr_handlers__", None)
+        if handlers is None:
+            return
+        handlers.clear()
+        if trusted:
+            for name in cls.__pydantic_fields__:
+                handlers[name] = trusted_setattr
+
+
+def use_trusted_models(wxr: WiktextractContext) -> None:
+    """Puts the models of the edition in trusted mode in this process."""
+    lang_code = wxr.wtp.lang_code
+    if lang_code in trusted_editions:
+        return
+    trusted_editions.add(lang_code)
+    models_mod = import_extractor_module(lang_code, "models")
+    if models_mod is not None:
+        set_trusted_models(models_mod, True)
+
+
+def validate_page_data(wxr: WiktextractContext, page_data: list[dict]) -> None:
+    """Validates the dumped entries of a page with the edition's
+    `WordEntry` model, raises `pydantic.ValidationError` if one is
+    invalid."""
+    models_mod = import_extractor_module(wxr.wtp.lang_code, "models")
+    if models_mod is None:
+        return
+    for data in page_data:
+        models_mod.WordEntry.model_validate(data)
@@ -0,0 +1,382 @@
+# Watchdog of the second phase.  A page that hangs, for example in a Lua
+# module, would stall its chunk of pages and eventually the extraction.
+#
+# The workers note the page they are processing in the page registry of the
+# pool, and a thread of the parent process kills the worker that has spent
+# more than the page timeout on one page.  Killing a worker, or a worker
+# crash, breaks the process pool: the pool is restarted and the unfinished
+# chunks are sent again.  The pages that were being processed when the pool
+# broke are retried once alone, and the pages that fail again are written
+# to the quarantine file.  Pages in the quarantine file are skipped.  The
+# chunks that were only queued when the pool broke are sent again as they
+# were.
+#
+# The workers also report their resident memory after each chunk.  When a
+# worker crosses the memory limit, no new chunks are sent, and the pool is
+# restarted once the sent chunks are done.
+
+import json
+import os
+import signal
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any
+
+from wikitextprocessor.core import CollatedErrorReturnData
+
+from .sorted_output import OutputEntry
+from .worker_pool import (
+    PageRegistry,
+    create_worker_pool,
+    worker_count,
+    worker_pool_context,
+)
+from .wxr_context import WiktextractContext
+from .wxr_logging import logger
+
+# (page key, page) pairs processed by a worker task; the page can be
+# anything with a `title`
+ChunkItem = tuple[int, Any]
+PageResult = tuple[int, list[OutputEntry], CollatedErrorReturnData]
+# Key of the return data of the pages that raised an exception or were
+# quarantined
+PAGE_FAILED = "page_failed"
+# Chunks that fail without a suspect page this many times are split
+MAX_CHUNK_ATTEMPTS = 2
+
+
+@dataclass(eq=False)
+class ChunkTask:
+    items: list[ChunkItem]
+    # A page retried alone after it broke the pool, see
+    # `WatchedPool.run_isolated()`
+    isolated: bool = False
+    attempts: int = 0
+    future: Future | None = None
+
+
+def load_quarantine(path: str) -> set[str]:
+    """Returns the titles of the pages in the quarantine file."""
+    titles = set()
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                titles.add(json.loads(line)["title"])
+    except FileNotFoundError:
+        pass
+    if len(titles) > 0:
+        logger.info(f"Skipping {len(titles)} pages in quarantine file {path}")
+    return titles
+
+
+class WatchedPool:
+    """Worker pool of the second phase with a watchdog that kills the
+    workers stuck on a page for more than `page_timeout` seconds (no
+    timeout if None).  Pages that break the pool twice are added to the
+    quarantine file `quarantine_path`.  Workers are replaced after
+    `max_tasks_per_child` tasks, and the pool is restarted when a worker
+    uses more than `max_worker_rss` MiB of memory."""
+
+    def __init__(
+        self,
+        wxr: WiktextractContext,
+        num_processes: int | None,
+        page_timeout: float | None = None,
+        quarantine_path: str | None = None,
+        max_tasks_per_child: int | None = None,
+        max_worker_rss: int | None = None,
+    ) -> None:
+        self.wxr = wxr
+        self.num_processes = num_processes
+        self.num_workers = worker_count(num_processes)
+        self.page_timeout = page_timeout
+        self.quarantine_path = quarantine_path
+        self.max_tasks_per_child = max_tasks_per_child
+        self.max_worker_rss = max_worker_rss
+        self.peak_rss = 0  # KiB
+        self.memory_restarts = 0
+        self.quarantined = (
+            load_quarantine(quarantine_path)
+            if quarantine_path is not None
+            else set()
+        )
+        self.registry = PageRegistry(
+            worker_pool_context(wxr.wtp.lang_code), self.num_workers
+        )
+        self.executor = self.create_pool()
+        self.timed_out: set[int] = set()
+        self.timed_out_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.watchdog = None
+        if page_timeout is not None:
+            self.watchdog = threading.Thread(
+                target=self.watch, name="wiktextract-watchdog", daemon=True
+            )
+            self.watchdog.start()
+
+    def create_pool(self) -> ProcessPoolExecutor:
+        return create_worker_pool(
+            self.wxr,
+            self.num_processes,
+            self.registry,
+            self.max_tasks_per_child,
+        )
+
+    def __enter__(self) -> "WatchedPool":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.stop_event.set()
+        if self.watchdog is not None:
+            self.watchdog.join()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        if self.peak_rss > 0:
+            logger.info(
+                f"Peak worker memory {self.peak_rss / 1024:.0f} MiB, "
+                f"pool restarted {self.memory_restarts} times to free memory"
+            )
+
+    def watch(self) -> None:
+        assert self.page_timeout is not None
+        interval = min(1.0, self.page_timeout / 4)
+        while not self.stop_event.wait(interval):
+            now = time.monotonic()
+            for pid, key, start in self.registry.in_flight():
+                if now - start <= self.page_timeout:
+                    continue
+                with self.timed_out_lock:
+                    if key in self.timed_out:
+                        continue
+                    self.timed_out.add(key)
+                logger.error(
+                    f"Page {key} took more than {self.page_timeout}s, "
+                    f"killing worker process {pid}"
+                )
+                try:
+                    os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+                except ProcessLookupError:
+                    pass
+
+    def results(
+        self,
+        chunks: Iterator[list[ChunkItem]],
+        handler: Callable[[list[ChunkItem]], list[PageResult]],
+        max_pending: int,
+        ordered: bool = True,
+    ) -> Iterator[PageResult]:
+        """Sends the chunks of pages to `handler` in the workers, at most
+        `max_pending` chunks at a time, and returns the page results in the
+        order of the chunks if `ordered` is True, otherwise in the order
+        they are done.  A quarantined page returns an empty result marked
+        with `PAGE_FAILED`."""
+        pending: deque[ChunkTask] = deque()
+        memory_full = False
+        while True:
+            while len(pending) < max_pending and not memory_full:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                pending.append(self.submit(ChunkTask(chunk), handler))
+            if len(pending) == 0:
+                if not memory_full:
+                    return
+                self.restart_for_memory()
+                memory_full = False
+                continue
+            task = self.next_done(pending, ordered)
+            try:
+                done = (
+                    {}
+                    if task.future is None
+                    else {r[0]: r for r in task.future.result()}
+                )
+            except BrokenProcessPool:
+                self.restart(pending, handler)
+                continue
+            pending.remove(task)
+            for key, _ in task.items:
+                yield done.get(key, (key, [], {PAGE_FAILED: True}))  # type: ignore[misc]
+            if not memory_full:
+                memory_full = self.memory_full()
+
+    def memory_full(self) -> bool:
+        rss = self.registry.max_rss()
+        self.peak_rss = max(self.peak_rss, rss)
+        return (
+            self.max_worker_rss is not None
+            and rss > self.max_worker_rss * 1024
+        )
+
+    def restart_for_memory(self) -> None:
+        logger.info(
+            f"Worker memory over {self.max_worker_rss} MiB, restarting "
+            "the pool"
+        )
+        self.memory_restarts += 1
+        self.executor.shutdown(wait=True)
+        self.registry.clear()
+        self.executor = self.create_pool()
+
+    def next_done(self, pending: deque[ChunkTask], ordered: bool) -> ChunkTask:
+        if ordered:
+            task = pending[0]
+            if task.future is not None:
+                wait([task.future])
+            return task
+        for task in pending:
+            if task.future is None or task.future.done():
+                return task
+        done, _ = wait(
+            [t.future for t in pending if t.future is not None],
+            return_when=FIRST_COMPLETED,
+        )
+        return next(t for t in pending if t.future in done)
+
+    def submit(
+        self,
+        task: ChunkTask,
+        handler: Callable[[list[ChunkItem]], list[PageResult]],
+    ) -> ChunkTask:
+        items = [
+            item for item in task.items if item[1].title not in self.quarantined
+        ]
+        if len(items) > 0:
+            task.future = self.executor.submit(handler, items)
+        return task
+
+    def restart(
+        self,
+        pending: deque[ChunkTask],
+        handler: Callable[[list[ChunkItem]], list[PageResult]],
+    ) -> None:
+        """Restarts the broken pool and sends the unfinished chunks again.
+        The pages that timed out, or all the pages being processed if a
+        worker crashed, are first retried alone."""
+        with self.timed_out_lock:
+            timed_out = self.timed_out
+            self.timed_out = set()
+        suspects = timed_out or {
+            key for _, key, _ in self.registry.in_flight()
+        }
+        started = timed_out | self.registry.started_pages()
+        logger.warning("Worker process pool broke, restarting it")
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.registry.clear()
+        tasks = []
+        for task in pending:
+            if task.future is None or task_succeeded(task.future):
+                tasks.append(task)
+            else:
+                tasks.extend(retry_failed_task(task, started, suspects))
+        self.run_isolated([task for task in tasks if task.isolated], handler)
+        self.executor = self.create_pool()
+        pending.clear()
+        for task in tasks:
+            if task.future is None and not task.isolated:
+                self.submit(task, handler)
+            pending.append(task)
+
+    def run_isolated(
+        self,
+        tasks: list[ChunkTask],
+        handler: Callable[[list[ChunkItem]], list[PageResult]],
+    ) -> None:
+        """Processes the pages of `tasks` one at a time in a pool of one
+        worker, so a page that fails again is known for sure and is
+        quarantined."""
+        executor = None
+        try:
+            for task in tasks:
+                if task.future is not None:
+                    continue
+                key, page = task.items[0]
+                if page.title in self.quarantined:
+                    continue
+                logger.warning(f"Retrying page {page.title} alone")
+                if executor is None:
+                    executor = create_worker_pool(self.wxr, 1, self.registry)
+                future = executor.submit(handler, task.items)
+                wait([future])
+                if not isinstance(future.exception(), BrokenProcessPool):
+                    task.future = future
+                    continue
+                with self.timed_out_lock:
+                    reason = "timeout" if key in self.timed_out else "crash"
+                    self.timed_out = set()
+                self.quarantine(page.title, reason)
+                executor.shutdown(wait=True)
+                self.registry.clear()
+                executor = None
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+                self.registry.clear()
+
+    def quarantine(self, title: str, reason: str) -> None:
+        logger.error(f"Page {title} failed again ({reason}), skipping it")
+        self.quarantined.add(title)
+        if self.quarantine_path is not None:
+            with open(self.quarantine_path, "a", encoding="utf-8") as f:
+                f.write(
+                    json.dumps(
+                        {"title": title, "reason": reason}, ensure_ascii=False
+                    )
+                    + "\n"
+                )
+
+
+def retry_failed_task(
+    task: ChunkTask, started: set[int], suspects: set[int]
+) -> list[ChunkTask]:
+    """Returns the tasks that retry a chunk that failed when the pool broke.
+    A chunk without a page in `started` was only queued, it is sent again
+    unchanged."""
+    if all(key not in started for key, _ in task.items):
+        return [ChunkTask(task.items, task.isolated, task.attempts)]
+    return split_failed_task(task, suspects)
+
+
+def split_failed_task(
+    task: ChunkTask, suspects: set[int]
+) -> list[ChunkTask]:
+    """Returns the tasks that retry the pages of a chunk that broke the
+    pool, the `suspects` pages alone."""
+    if all(key not in suspects for key, _ in task.items):
+        if task.attempts + 1 < MAX_CHUNK_ATTEMPTS:
+            return [ChunkTask(task.items, attempts=task.attempts + 1)]
+        # The failing page wasn't found, retry each page alone
+        return [ChunkTask([item], isolated=True) for item in task.items]
+    retry_tasks = []
+    other_items: list[ChunkItem] = []
+    for item in task.items:
+        if item[0] in suspects:
+            if len(other_items) > 0:
+                retry_tasks.append(ChunkTask(other_items))
+                other_items = []
+            retry_tasks.append(ChunkTask([item], isolated=True))
+        else:
+            other_items.append(item)
+    if len(other_items) > 0:
+        retry_tasks.append(ChunkTask(other_items))
+    return retry_tasks
+
+
+def task_succeeded(future: Future) -> bool:
+    return (
+        future.done()
+        and not future.cancelled()
+        and future.exception() is None
+    )
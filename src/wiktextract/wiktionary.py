@@ -4,17 +4,19 @@
 #
 # Copyright (c) 2018-2022, 2024 Tatu Ylonen.  See file LICENSE and https://ylonen.org
 
-import atexit
+import hashlib
 import io
 import json
-import os
 import re
+import shutil
 import tarfile
 import tempfile
 import time
-from concurrent.futures import ProcessPoolExecutor
-from copy import deepcopy
-from multiprocessing import current_process, get_context
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from functools import partial
+from itertools import islice
+from multiprocessing import current_process
 from pathlib import Path
 from traceback import format_exc
 from typing import TextIO
@@ -23,68 +25,357 @@ from wikitextprocessor import Page
 from wikitextprocessor.core import CollatedErrorReturnData, ErrorMessageData
 from wikitextprocessor.dumpparser import process_dump
 
+from .checkpoint import Checkpoint, checkpoint_path
+from .expansion_cache import (
+    ExpansionCache,
+    ExpansionCacheStats,
+    install_expansion_cache,
+)
 from .import_utils import import_extractor_module
+from .incremental import IncrementalRun
 from .page import parse_page
+from .page_stats import (
+    PageStatsCollector,
+    PageStatsWriter,
+    count_wtp_calls,
+)
+from .profiling import WorkerProfiler, merge_worker_profiles
+from .scheduling import (
+    MAX_CHUNK_PAGES,
+    ScheduledPage,
+    chunk_pages,
+    load_page_durations,
+    schedule_pages,
+)
+from .shards import shard_pages, write_emitted_words
+from .sorted_output import OutputEntry, SortedOutput
+from .tags import uppercase_tags, valid_tags
 from .thesaurus import (
     emit_words_in_thesaurus,
     extract_thesaurus_data,
     thesaurus_linkage_number,
 )
+from .thesaurus_index import (
+    build_thesaurus_index,
+    thesaurus_index_path,
+    use_thesaurus_index,
+)
+from .title_index import (
+    build_title_index,
+    title_index_path,
+    update_title_index,
+    use_title_index,
+)
+from .watchdog import PAGE_FAILED, PageResult, WatchedPool
+from .worker_pool import (
+    worker_context,
+    worker_page_done,
+    worker_page_started,
+    worker_report_memory,
+)
 from .wxr_context import WiktextractContext
 from .wxr_logging import logger
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+# `--validate` values
+VALIDATE_FULL = "full"
+VALIDATE_SAMPLED = "sampled"
+VALIDATE_OFF = "off"
+VALIDATE_CHOICES = (VALIDATE_FULL, VALIDATE_SAMPLED, VALIDATE_OFF)
+# One page in this many is checked with `--validate=sampled`
+VALIDATE_SAMPLE_INTERVAL = 100
+
+
+@dataclass
+class WorkerOptions:
+    """Options of the second phase, passed to the worker processes with
+    the pages because the worker pool is shared with the thesaurus
+    extraction."""
+
+    human_readable: bool = False
+    page_stats: bool = False
+    profile_dir: str | None = None
+    profile_interval: int = 1
+    validate: str = VALIDATE_FULL
+    # Template expansions cached in each worker, 0 disables the cache
+    expansion_cache: int = 0
+    expansion_cache_dir: str | None = None
+    # Thesaurus index file, see thesaurus_index.py
+    thesaurus_index: str | None = None
+    # Page title index file, see title_index.py
+    title_index: str | None = None
+    orjson: bool = False
+
+
+@dataclass
+class RunOptions:
+    """Settings of the second phase, see `reprocess_wiktionary()`.
+
+    Statistics: the processing time and resources used for each page are
+    written to `page_stats_path` as JSON lines.  Every `profile_interval`th
+    page is profiled in the worker processes and the merged stats are saved
+    to `profile_path`.
+
+    Checkpoints and shards: with `resume`, progress is saved in a
+    checkpoint file next to the database file, and processing continues
+    from the last checkpoint if the file exists; the output file must be
+    opened in append mode.  With `shard` (zero-based index, number of
+    shards), only the pages of that shard are processed.  The emitted words
+    are saved to `emitted_path` and the words that only occur in the
+    thesaurus are not written, this is done when the shard outputs are
+    merged.
+
+    Output: with `ordered`, the output is sorted by word, language code and
+    part of speech.  `validate` selects the pages whose data is checked
+    with `check_json_data()`: all pages, a sample of the pages or none.
+
+    Scheduling: with `schedule`, the pages are processed from the largest
+    to the smallest, or by their processing time in the page stats file
+    `schedule_stats_path` of a previous run, and written in database order
+    at the end.
+
+    Watchdog and recycling: a worker process that spends more than
+    `page_timeout` seconds on a page is restarted, the page is retried once
+    alone and then added to the quarantine file `quarantine_path`; the
+    pages in that file are skipped.  A worker process is replaced after
+    about `recycle_pages` pages, and all workers are restarted when one of
+    them uses more than `recycle_rss` MiB of memory.
+
+    Incremental runs: the byte range of the output of each page and a
+    digest of everything it depends on are saved to `page_index_path`, and
+    the pages that haven't changed since the run that wrote
+    `previous_output_path` and its page index are copied from that file.
+
+    Expansion cache: each worker caches `expansion_cache` template
+    expansions, the pure ones are also saved in the directory
+    `expansion_cache_dir`, and the hits and time saved by template are
+    written to `expansion_cache_stats_path`.
+
+    `resume` can't be used with `ordered` or `schedule`, and the page index
+    can't be used with `resume`, `ordered`, `schedule` or `shard`."""
+
+    page_stats_path: str | None = None
+    profile_path: str | None = None
+    profile_interval: int = 1
+    resume: bool = False
+    shard: tuple[int, int] | None = None
+    emitted_path: str | None = None
+    ordered: bool = False
+    validate: str = VALIDATE_FULL
+    schedule: bool = False
+    schedule_stats_path: str | None = None
+    page_timeout: float | None = None
+    quarantine_path: str | None = None
+    recycle_pages: int | None = None
+    recycle_rss: int | None = None
+    page_index_path: str | None = None
+    previous_output_path: str | None = None
+    # 0 disables the cache
+    expansion_cache: int = 0
+    expansion_cache_dir: str | None = None
+    expansion_cache_stats_path: str | None = None
+
+
+def configure_worker(options: WorkerOptions) -> None:
+    global worker_options, worker_profiler, worker_expansion_cache
+    if options == worker_options:
+        return
+    worker_options = options
+    worker_profiler = (
+        WorkerProfiler(options.profile_dir, options.profile_interval)
+        if options.profile_dir is not None
+        else None
+    )
+    wtp = worker_context().wtp
+    if options.page_stats:
+        # Before the expansion cache wraps `Wtp.expand()`
+        count_wtp_calls(wtp)
+    worker_expansion_cache = (
+        ExpansionCache(
+            wtp, options.expansion_cache, options.expansion_cache_dir
+        )
+        if options.expansion_cache > 0
+        else None
+    )
+    install_expansion_cache(wtp, worker_expansion_cache)
+    use_thesaurus_index(options.thesaurus_index)
+    use_title_index(options.title_index)
+    use_orjson(options.orjson)
+
+
+worker_options: WorkerOptions | None = None
+worker_profiler: WorkerProfiler | None = None
+worker_expansion_cache: ExpansionCache | None = None
+
 
 def page_handler(
-    page: Page,
-) -> tuple[list[dict[str, str]], CollatedErrorReturnData]:
+    page: Page, options: WorkerOptions
+) -> tuple[list[OutputEntry], CollatedErrorReturnData]:
     # Make sure there are no newlines or other strange characters in the
     # title.  They could cause security problems at several post-processing
     # steps.
     # We've given the page_handler function an extra wxr attribute previously.
     # This should never cause an exception, and if it does, we want it to.
 
-    # Helps debug extraction hangs. This writes the path of each file being
-    # processed into /tmp/wiktextract*/wiktextract-*.  Once a hang
-    # has been observed, these files contain page(s) that hang.  They should
-    # be checked before aborting the process, as an interrupt might delete them.
-    with tempfile.TemporaryDirectory(prefix="wiktextract") as tmpdirname:
-        debug_path = "{}/wiktextract-{}".format(tmpdirname, os.getpid())
-        with open(debug_path, "w", encoding="utf-8") as f:
-            f.write(page.title + "\n")
+    configure_worker(options)
+    worker_wxr = worker_context()
+    worker_wxr.wtp.start_page(page.title)
+    if worker_expansion_cache is not None:
+        worker_expansion_cache.start_page()
+    page_stats = (
+        PageStatsCollector(worker_wxr.wtp, page.title)
+        if options.page_stats
+        else None
+    )
+    if worker_profiler is not None:
+        worker_profiler.start_page()
+    try:
+        title = re.sub(r"[\s\000-\037]+", " ", page.title)
+        title = title.strip()
+        if page.redirect_to is not None:
+            page_data = [
+                {
+                    "title": title,
+                    "redirect": page.redirect_to,
+                    "pos": "hard-redirect",
+                }
+            ]
+        else:
+            # XXX Sign gloss pages?
+            start_t = time.time()
+            page_data = parse_page(
+                worker_wxr,
+                title,
+                page.body,  # type: ignore[arg-type]
+                validate_page(options.validate, title),
+            )
+            dur = time.time() - start_t
+            if dur > 100:
+                logger.warning(
+                    "====== WARNING: PARSING PAGE TOOK {:.1f}s: {}".format(
+                        dur, title
+                    )
+                )
 
-        worker_wxr.wtp.start_page(page.title)
+        # Check and serialize the data here instead of in the parent
+        # process, which would otherwise limit the number of workers
+        entries = encode_page_data(worker_wxr, title, page_data, options)
+        ret = page_return_data(worker_wxr)
+        if page_stats is not None:
+            ret["page_stats"] = page_stats.finish(  # type: ignore[typeddict-unknown-key]
+                sum(len(entry[3]) for entry in entries)
+            )
+        return entries, ret
+    except Exception:
+        worker_wxr.wtp.error(
+            f'=== EXCEPTION while parsing page "{page.title}" '
+            f"in process {current_process().name}",
+            format_exc(),
+            "page_handler_exception",
+        )
+        ret = page_return_data(worker_wxr)
+        ret[PAGE_FAILED] = True  # type: ignore[literal-required]
+        if page_stats is not None:
+            ret["page_stats"] = page_stats.finish(0)  # type: ignore[typeddict-unknown-key]
+        return [], ret
+    finally:
+        if worker_profiler is not None:
+            worker_profiler.end_page()
+
+
+def pages_handler(
+    pages: list[tuple[int, Page | ScheduledPage]], options: WorkerOptions
+) -> list[PageResult]:
+    """Processes a chunk of (page key, page) pairs and notes the page being
+    processed in the page registry of the pool.  Scheduled pages are read
+    from the database in the worker process."""
+    wxr = worker_context()
+    results = []
+    for key, page in pages:
+        worker_page_started(key)
         try:
-            title = re.sub(r"[\s\000-\037]+", " ", page.title)
-            title = title.strip()
-            if page.redirect_to is not None:
-                page_data = [
-                    {
-                        "title": title,
-                        "redirect": page.redirect_to,
-                        "pos": "hard-redirect",
-                    }
-                ]
-            else:
-                # XXX Sign gloss pages?
-                start_t = time.time()
-                page_data = parse_page(worker_wxr, title, page.body)  # type: ignore[arg-type]
-                dur = time.time() - start_t
-                if dur > 100:
-                    logger.warning(
-                        "====== WARNING: PARSING PAGE TOOK {:.1f}s: {}".format(
-                            dur, title
-                        )
-                    )
+            if isinstance(page, ScheduledPage):
+                db_page = wxr.wtp.get_page(page.title, page.namespace_id)
+                if db_page is None:
+                    logger.warning(f"Scheduled page {page.title} not found")
+                    results.append((key, [], {}))
+                    continue
+                page = db_page
+            entries, ret = page_handler(page, options)
+            results.append((key, entries, ret))
+        finally:
+            worker_page_done()
+    if worker_expansion_cache is not None:
+        worker_expansion_cache.flush()
+    worker_report_memory()
+    return results
 
-            return page_data, worker_wxr.wtp.to_return()
-        except Exception:
-            worker_wxr.wtp.error(
-                f'=== EXCEPTION while parsing page "{page.title}" '
-                f"in process {current_process().name}",
-                format_exc(),
-                "page_handler_exception",
+
+def page_chunks(
+    pages: Iterable[tuple[int, Page | ScheduledPage]], size: int
+) -> Iterator[list[tuple[int, Page | ScheduledPage]]]:
+    pages_iter = iter(pages)
+    while chunk := list(islice(pages_iter, size)):
+        yield chunk
+
+
+def encode_page_data(
+    wxr: WiktextractContext,
+    title: str,
+    page_data: list[dict],
+    options: WorkerOptions,
+) -> list[OutputEntry]:
+    """Checks the data of a page if it's selected by `--validate` and
+    encodes each entry as a UTF-8 JSON line."""
+    validate = validate_page(options.validate, title)
+    entries = []
+    for dt in page_data:
+        if validate:
+            check_json_data(wxr, dt)
+        entries.append(
+            (
+                dt.get("word") or dt.get("title") or "",
+                dt.get("lang_code") or "",
+                dt.get("pos") or "",
+                encode_json_data(dt, options.human_readable),
             )
-            return [], worker_wxr.wtp.to_return()
+        )
+    return entries
+
+
+def validate_page(validate: str, title: str) -> bool:
+    """Returns True if the data of the page should be checked.  Sampled
+    pages are selected by a hash of the title, so the same pages are
+    checked in every run.  The hash is not the one used by `--shard`, so
+    every shard gets its share of the checked pages."""
+    if validate == VALIDATE_FULL:
+        return True
+    if validate == VALIDATE_OFF:
+        return False
+    digest = hashlib.md5(title.encode("utf-8")).digest()
+    return (
+        int.from_bytes(digest[:4], "little") % VALIDATE_SAMPLE_INTERVAL == 0
+    )
+
+
+def page_return_data(wxr: WiktextractContext) -> CollatedErrorReturnData:
+    """Returns the messages and counters collected while processing the
+    current page, the counters are reset for the next page."""
+    ret = wxr.wtp.to_return()
+    if len(wxr.config.debugs) > 0:
+        # Messages from `check_json_data()`
+        ret["debugs"] = ret.get("debugs", []) + wxr.config.debugs
+        wxr.config.debugs.clear()
+    if len(wxr.config.counters) > 0:
+        ret["counters"] = dict(wxr.config.counters)  # type: ignore[typeddict-unknown-key]
+        wxr.config.counters.clear()
+    if worker_expansion_cache is not None:
+        ret["expansion_cache"] = worker_expansion_cache.take_stats()  # type: ignore[typeddict-unknown-key]
+    return ret
 
 
 def parse_wiktionary(
@@ -98,10 +389,12 @@ def parse_wiktionary(
     override_folders: list[str] | list[Path] | None = None,
     skip_extract_dump: bool = False,
     save_pages_path: str | Path | None = None,
+    run_options: RunOptions | None = None,
 ) -> None:
     """Parses Wiktionary from the dump file ``path`` (which should point
     to a "enwiktionary-<date>-pages-articles.xml.bz2" file.  This
-    calls `word_cb(data)` for all words defined for languages in `languages`."""
+    calls `word_cb(data)` for all words defined for languages in `languages`.
+    `run_options` are the settings of the second phase."""
     capture_language_codes = wxr.config.capture_language_codes
     if capture_language_codes is not None:
         assert isinstance(capture_language_codes, (list, tuple, set))
@@ -128,20 +421,59 @@ def parse_wiktionary(
         if analyze_template_mod is not None
         else None,
     )
+    # Read by the second phase, also when it runs later on this database
+    build_title_index(wxr.wtp, title_index_path(wxr.wtp))
 
     if not phase1_only:
-        reprocess_wiktionary(wxr, num_processes, out_f, human_readable)
+        reprocess_wiktionary(
+            wxr, num_processes, out_f, human_readable, run_options=run_options
+        )
+
+
+def use_orjson(enabled: bool) -> None:
+    """Makes `encode_json_data()` use orjson in this process.  orjson
+    writes compact lines without spaces after the separators."""
+    global orjson_enabled
+    if enabled and orjson is None:
+        raise RuntimeError("Install orjson to use --orjson")
+    orjson_enabled = enabled
+
+
+orjson_enabled = False
+
+
+def encode_json_data(data: dict, human_readable: bool) -> bytes:
+    """Returns the output line of an entry encoded in UTF-8, with orjson if
+    enabled by `use_orjson()`."""
+    if human_readable:
+        return (
+            json.dumps(data, indent=2, sort_keys=True, ensure_ascii=False)
+            + "\n"
+        ).encode("utf-8")
+    if not orjson_enabled:
+        return (json.dumps(data, ensure_ascii=False) + "\n").encode("utf-8")
+    try:
+        return orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE)
+    except TypeError:  # e.g., integers over 64 bits
+        # Same compact format as the other orjson lines
+        return (
+            json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n"
+        ).encode("utf-8")
 
 
-def write_json_data(data: dict, out_f: TextIO, human_readable: bool) -> None:
+def write_json_data(
+    data: dict, out_f: TextIO | SortedOutput, human_readable: bool
+) -> None:
     if out_f is not None:
-        if human_readable:
-            out_f.write(
-                json.dumps(data, indent=2, sort_keys=True, ensure_ascii=False)
+        if isinstance(out_f, SortedOutput):
+            out_f.add(
+                data.get("word") or data.get("title") or "",
+                data.get("lang_code") or "",
+                data.get("pos") or "",
+                encode_json_data(data, human_readable),
             )
         else:
-            out_f.write(json.dumps(data, ensure_ascii=False))
-        out_f.write("\n")
+            out_f.write(encode_json_data(data, human_readable).decode("utf-8"))
 
 
 def estimate_progress(
@@ -169,6 +501,10 @@ def estimate_progress(
     return last_time
 
 
+# The entry last encoded by `check_error()` and its JSON
+checked_data_json: tuple[dict | None, str] = (None, "")
+
+
 def check_error(
     wxr: WiktextractContext,
     dt: dict,
@@ -179,11 +515,19 @@ def check_error(
     called_from: str | None = None,
 ) -> None:
     """Formats and outputs an error message about data format checks."""
+    global checked_data_json
     if called_from is None:
         called_from = "wiktionary/179/20240425"
     else:
         called_from = "wiktionary/179/20240425" + called_from
-    msg += ": " + json.dumps(dt, sort_keys=True, ensure_ascii=False)
+    # Entries with invalid tags often have many errors, only encode the
+    # entry once
+    if checked_data_json[0] is not dt:
+        checked_data_json = (
+            dt,
+            json.dumps(dt, sort_keys=True, ensure_ascii=False),
+        )
+    msg += ": " + checked_data_json[1]
     prefix = word or ""
     if lang:
         prefix += "/" + lang
@@ -248,8 +592,6 @@ def check_tags(
         # non-English editions).  Tag values should be standardized across
         # editions, except for uppercase tags (e.g., regional variants).
         if wxr.wtp.lang_code in ("en",):  # Check edition
-            from .tags import uppercase_tags, valid_tags
-
             if tag not in valid_tags and tag not in uppercase_tags:
                 if len(tag) > 0 and tag[0].isupper():
                     check_error(
@@ -419,6 +761,8 @@ def check_str_list_fields(
 
 def check_json_data(wxr: WiktextractContext, dt: dict) -> None:
     """Performs some basic checks on the generated data."""
+    global checked_data_json
+    checked_data_json = (None, "")
     word = dt.get("word", dt.get("title"))
     if word is None:
         check_error(
@@ -739,32 +1083,57 @@ def check_json_data(wxr: WiktextractContext, dt: dict) -> None:
         # template checking code above into a function
 
 
-def init_worker(wxr: WiktextractContext) -> None:
-    global worker_wxr
-    worker_wxr = wxr
-    worker_wxr.reconnect_databases()
-    atexit.register(worker_wxr.remove_unpicklable_objects)
-
-
 def reprocess_wiktionary(
     wxr: WiktextractContext,
     num_processes: int | None,
     out_f: TextIO,
     human_readable: bool = False,
     search_pattern: str | None = None,
+    run_options: RunOptions | None = None,
 ) -> None:
-    """Reprocesses the Wiktionary from the sqlite db."""
+    """Reprocesses the Wiktionary from the sqlite db, with the second phase
+    settings of `run_options` (see `RunOptions`)."""
+    if run_options is None:
+        run_options = RunOptions()
     logger.info("Second phase - processing pages")
 
     # Extract thesaurus data. This iterates over thesaurus pages,
-    # but is very fast.
-    if (
+    # but is very fast.  The pages are processed in the same worker
+    # processes as the other pages.
+    extract_thesaurus = (
         wxr.config.extract_thesaurus_pages
         and thesaurus_linkage_number(wxr.thesaurus_db_conn) == 0  # type: ignore[arg-type]
-    ):
-        extract_thesaurus_data(wxr, num_processes)
+    )
+    if extract_thesaurus:
+        if run_options.shard is not None:
+            logger.warning(
+                "Thesaurus database is empty, extracting it in this shard. "
+                "Extract it once with --extract-thesaurus and copy it with "
+                "the database file to avoid this."
+            )
 
-    emitted = set()
+    entry_out_f: TextIO | SortedOutput = out_f
+    if run_options.ordered:
+        assert not run_options.resume, (
+            "resuming sorted output is not supported"
+        )
+        entry_out_f = SortedOutput(out_f)
+    if run_options.page_index_path is not None:
+        assert not (
+            run_options.resume
+            or run_options.ordered
+            or run_options.schedule
+            or run_options.shard
+        ), "the page index requires the output in database order"
+    # Restores the database order of the scheduled pages
+    schedule_out_f = None
+    if run_options.schedule:
+        assert not run_options.resume, (
+            "resuming scheduled pages is not supported"
+        )
+        if not run_options.ordered:
+            schedule_out_f = SortedOutput(out_f)
+    emitted: set[tuple[str, str, str]] = set()
     process_ns_ids: list[int] = list(
         {
             wxr.wtp.NAMESPACE_DATA.get(ns, {}).get("id", 0)  # type: ignore[call-overload]
@@ -776,38 +1145,189 @@ def reprocess_wiktionary(
     all_page_nums = wxr.wtp.saved_page_nums(
         process_ns_ids, True, "wikitext", search_pattern
     )
-    wxr.remove_unpicklable_objects()
-    with ProcessPoolExecutor(
-        max_workers=num_processes,
-        mp_context=get_context("spawn"),
-        initializer=init_worker,
-        initargs=(deepcopy(wxr),),
-    ) as executor:
-        wxr.reconnect_databases()
-        for processed_pages, (page_data, wtp_stats) in enumerate(
-            executor.map(
-                page_handler,
-                wxr.wtp.get_all_pages(
-                    process_ns_ids, True, "wikitext", search_pattern
+    shard_page_nums = all_page_nums
+    if run_options.shard is not None:
+        # Approximate, titles are distributed evenly by their hash
+        shard_page_nums = max(all_page_nums // run_options.shard[1], 1)
+    checkpoint = None
+    skip_pages = 0
+    if run_options.resume:
+        checkpoint = Checkpoint(
+            checkpoint_path(wxr.wtp.db_path, run_options.shard)  # type: ignore[arg-type]
+        )
+        checkpoint.restore_output(out_f)
+        skip_pages = checkpoint.resume(all_page_nums)
+        emitted = checkpoint.emitted()
+    page_stats_writer = (
+        PageStatsWriter(run_options.page_stats_path)
+        if run_options.page_stats_path is not None
+        else None
+    )
+    profile_dir = None
+    if run_options.profile_path is not None:
+        profile_dir = tempfile.mkdtemp(prefix="wiktextract-profile")
+    expansion_cache_stats = (
+        ExpansionCacheStats(run_options.expansion_cache_stats_path)
+        if run_options.expansion_cache > 0
+        else None
+    )
+    options = WorkerOptions(
+        human_readable,
+        page_stats_writer is not None,
+        profile_dir,
+        run_options.profile_interval,
+        run_options.validate,
+        run_options.expansion_cache,
+        run_options.expansion_cache_dir,
+        title_index=str(update_title_index(wxr.wtp)),
+        orjson=orjson_enabled,
+    )
+    # Builds the cached tables of the extractor once, before the worker
+    # processes import it
+    import_extractor_module(wxr.wtp.lang_code, "page")
+    with WatchedPool(
+        wxr,
+        num_processes,
+        run_options.page_timeout,
+        run_options.quarantine_path,
+        # Pages are sent to the workers in chunks
+        max_tasks_per_child=max(
+            run_options.recycle_pages // MAX_CHUNK_PAGES, 1
+        )
+        if run_options.recycle_pages is not None
+        else None,
+        max_worker_rss=run_options.recycle_rss,
+    ) as pool:
+        if extract_thesaurus:
+            extract_thesaurus_data(wxr, num_processes, pool.executor)
+            start_time = time.time()
+            last_time = start_time
+        if wxr.config.extract_thesaurus_pages:
+            # The workers look up the thesaurus terms in a read-only index
+            options.thesaurus_index = str(thesaurus_index_path(wxr))
+            build_thesaurus_index(
+                wxr.thesaurus_db_conn,  # type: ignore[arg-type]
+                Path(options.thesaurus_index),
+            )
+        # Entries are written to the binary buffer of the output file
+        out_f.flush()
+        out_buffer = out_f.buffer  # type: ignore[attr-defined]
+        pages = wxr.wtp.get_all_pages(
+            process_ns_ids, True, "wikitext", search_pattern
+        )
+        if run_options.shard is not None:
+            pages = shard_pages(pages, run_options.shard)
+        incremental = None
+        if run_options.page_index_path is not None:
+            incremental = IncrementalRun(
+                wxr,
+                run_options.page_index_path,
+                run_options.previous_output_path,
+                human_readable,
+                out_buffer,
+            )
+        handler = partial(pages_handler, options=options)
+        results: Iterator[PageResult]
+        if run_options.schedule:
+            scheduled = schedule_pages(
+                pages,
+                load_page_durations(run_options.schedule_stats_path)
+                if run_options.schedule_stats_path is not None
+                else None,
+            )
+            logger.info(f"Scheduled {len(scheduled)} pages")
+            results = pool.results(
+                (
+                    [(page.index, page) for page in chunk]
+                    for chunk in chunk_pages(scheduled, pool.num_workers)
                 ),
-                chunksize=100,  # default is 1 too slow
+                handler,
+                max_pending=pool.num_workers * 2,
+                ordered=False,
+            )
+        else:
+            # The results are written in database order, enough chunks are
+            # sent to keep the workers busy while a chunk with a slow page
+            # is waited for
+            numbered_pages: Iterable[tuple[int, Page]] = enumerate(
+                islice(pages, skip_pages, None), skip_pages
+            )
+            if incremental is not None:
+                numbered_pages = incremental.changed_pages(numbered_pages)
+            results = pool.results(
+                page_chunks(numbered_pages, MAX_CHUNK_PAGES),
+                handler,
+                max_pending=pool.num_workers * 8,
             )
+        for processed_pages, (page_index, entries, wtp_stats) in enumerate(
+            results
         ):
             wxr.config.merge_return(wtp_stats)
-            for dt in page_data:
-                check_json_data(wxr, dt)
-                write_json_data(dt, out_f, human_readable)
-                word = dt.get("word")
-                lang_code = dt.get("lang_code")
-                pos = dt.get("pos")
-                if word and lang_code and pos:
-                    emitted.add((word, lang_code, pos))
+            if page_stats_writer is not None and "page_stats" in wtp_stats:
+                page_stats_writer.add(wtp_stats["page_stats"])  # type: ignore[typeddict-item]
+            if (
+                expansion_cache_stats is not None
+                and "expansion_cache" in wtp_stats
+            ):
+                expansion_cache_stats.add(wtp_stats["expansion_cache"])  # type: ignore[typeddict-item]
+            page_emitted = [
+                (word, lang_code, pos)
+                for word, lang_code, pos, _ in entries
+                if word and lang_code and pos
+            ]
+            if isinstance(entry_out_f, SortedOutput):
+                for entry in entries:
+                    entry_out_f.add(*entry)
+            elif schedule_out_f is not None:
+                for entry_index, entry in enumerate(entries):
+                    schedule_out_f.add_sorted(
+                        (page_index, entry_index), entry[3]
+                    )
+            elif incremental is not None:
+                incremental.write_page(
+                    page_index,
+                    b"".join(entry[3] for entry in entries),
+                    page_emitted,
+                    emitted,
+                    failed=wtp_stats.get(PAGE_FAILED, False),  # type: ignore[call-overload]
+                )
+            else:
+                out_buffer.write(b"".join(entry[3] for entry in entries))
+            emitted.update(page_emitted)
+            if checkpoint is not None:
+                checkpoint.page_done(page_emitted, out_f)
             last_time = estimate_progress(
-                processed_pages, all_page_nums, start_time, last_time
+                processed_pages
+                + (incremental.copied_pages if incremental is not None else 0),
+                shard_page_nums - skip_pages,
+                start_time,
+                last_time,
             )
+        if incremental is not None:
+            incremental.close(emitted)
+
+    if schedule_out_f is not None:
+        logger.info("Writing output in database order")
+        schedule_out_f.close()
+    if page_stats_writer is not None:
+        page_stats_writer.close()
+    if expansion_cache_stats is not None:
+        expansion_cache_stats.close()
+    if profile_dir is not None:
+        merge_worker_profiles(profile_dir, run_options.profile_path)  # type: ignore[arg-type]
+        shutil.rmtree(profile_dir)
 
-    if wxr.config.dump_file_lang_code == "en":
-        emit_words_in_thesaurus(wxr, emitted, out_f, human_readable)
+    if run_options.emitted_path is not None:
+        write_emitted_words(run_options.emitted_path, emitted)
+    elif wxr.config.dump_file_lang_code == "en":
+        emit_words_in_thesaurus(wxr, emitted, entry_out_f, human_readable)
+    if isinstance(entry_out_f, SortedOutput):
+        logger.info("Writing sorted output")
+        entry_out_f.close()
+    if checkpoint is not None:
+        checkpoint.remove()
+    for name, count in sorted(wxr.config.counters.items()):
+        logger.info(f"  {name}: {count}")
     logger.info("Reprocessing wiktionary complete")
 
 
@@ -24,19 +24,30 @@ from wikitextprocessor import Wtp
 from wikitextprocessor.dumpparser import analyze_and_overwrite_pages
 
 from .categories import extract_categories
+from .columnar_output import PARQUET_SUFFIX, open_columnar_output
+from .compressed_output import compressed_suffix, open_output
 from .config import WiktionaryConfig
+from .expansion_cache import DEFAULT_CACHE_ENTRIES
+from .incremental import INDEX_SUFFIX
+from .shards import EMITTED_WORDS_SUFFIX, merge_shards, parse_shard
 from .template_override import template_override_fns
 from .thesaurus import (
     close_thesaurus_db,
     extract_thesaurus_data,
     thesaurus_linkage_number,
 )
+from .title_index import remove_title_index
 from .wiktionary import (
+    VALIDATE_CHOICES,
+    VALIDATE_FULL,
+    VALIDATE_SAMPLE_INTERVAL,
+    RunOptions,
     check_json_data,
     extract_namespace,
     parse_page,
     parse_wiktionary,
     reprocess_wiktionary,
+    use_orjson,
     write_json_data,
 )
 from .wxr_context import WiktextractContext
@@ -99,7 +110,9 @@ def main():
         "--out",
         type=str,
         default=None,
-        help="Path where to write output (- for stdout)",
+        help="Path where to write output (- for stdout), compressed if "
+        "the path ends with .gz, .xz, .bz2 or .zst, in Parquet format if "
+        "it ends with .parquet",
     )
     parser.add_argument(
         "--errors", type=str, help="File in which to save error information"
@@ -247,6 +260,13 @@ def main():
         default=False,
         help="Write output in human-readable JSON",
     )
+    parser.add_argument(
+        "--orjson",
+        action="store_true",
+        default=False,
+        help="Encode the output with orjson, which is faster and writes "
+        "compact JSON lines without spaces after the separators",
+    )
     parser.add_argument(
         "--override",
         type=str,
@@ -263,7 +283,178 @@ def main():
         "--profile",
         action="store_true",
         default=False,
-        help="Enable CPU time profiling",
+        help="Enable CPU time profiling (of the main process only)",
+    )
+    parser.add_argument(
+        "--profile-workers",
+        type=str,
+        default=None,
+        help="Profile the page extraction in the worker processes and save "
+        "the merged stats in this .prof file",
+    )
+    parser.add_argument(
+        "--profile-interval",
+        type=int,
+        default=1,
+        help="Profile only every Nth page in each worker process "
+        "(with --profile-workers)",
+    )
+    parser.add_argument(
+        "--validate",
+        choices=VALIDATE_CHOICES,
+        default=VALIDATE_FULL,
+        help="Check the format of the extracted data of all pages (default), "
+        f"of one page in {VALIDATE_SAMPLE_INTERVAL} or of no pages",
+    )
+    parser.add_argument(
+        "--trusted-models",
+        action="store_true",
+        default=False,
+        help="Don't validate each assignment to the pydantic models of the "
+        "extractors, validate the extracted data of the pages selected by "
+        "--validate once",
+    )
+    parser.add_argument(
+        "--schedule",
+        action="store_true",
+        default=False,
+        help="Process the largest pages first to keep all worker processes "
+        "busy until the end; the output is written in database order at the "
+        "end of the extraction",
+    )
+    parser.add_argument(
+        "--schedule-stats",
+        type=str,
+        default=None,
+        help="With --schedule, process the pages by their processing time in "
+        "this --page-stats file of a previous run",
+    )
+    parser.add_argument(
+        "--page-timeout",
+        type=float,
+        default=None,
+        help="Restart a worker process that spends more than this many "
+        "seconds on a page and retry the page once alone",
+    )
+    parser.add_argument(
+        "--quarantine",
+        type=str,
+        default=None,
+        help="Add the pages that hang or crash twice to this file, and "
+        "skip the pages in the file",
+    )
+    parser.add_argument(
+        "--recycle-pages",
+        type=int,
+        default=None,
+        help="Replace each worker process after about this many pages to "
+        "free the memory it has accumulated (Python 3.11 or later)",
+    )
+    parser.add_argument(
+        "--recycle-rss",
+        type=int,
+        default=None,
+        help="Restart the worker processes when one of them uses more than "
+        "this many MiB of memory",
+    )
+    parser.add_argument(
+        "--page-index",
+        action="store_true",
+        default=False,
+        help="Save the dependencies and output position of each page next to "
+        f"the --out file (with the {INDEX_SUFFIX} suffix), for --incremental",
+    )
+    parser.add_argument(
+        "--incremental",
+        type=str,
+        default=None,
+        metavar="PREVIOUS_OUT",
+        help="Copy the output of the pages whose body, templates and modules "
+        "haven't changed from this output file of a previous run with "
+        "--page-index, implies --page-index",
+    )
+    parser.add_argument(
+        "--expansion-cache",
+        type=int,
+        nargs="?",
+        const=DEFAULT_CACHE_ENTRIES,
+        default=0,
+        metavar="ENTRIES",
+        help="Cache template expansions across pages in each worker process, "
+        f"at most ENTRIES expansions (default {DEFAULT_CACHE_ENTRIES})",
+    )
+    parser.add_argument(
+        "--expansion-cache-dir",
+        type=str,
+        default=None,
+        help="Also save the expansions of the templates that only depend on "
+        "templates and modules in this directory, shared by the workers and "
+        "later runs on the same or newer databases, implies "
+        "--expansion-cache",
+    )
+    parser.add_argument(
+        "--expansion-cache-stats",
+        type=str,
+        default=None,
+        help="Write the template expansion cache hits, misses and time saved "
+        "by template to this JSON file, implies --expansion-cache",
+    )
+    parser.add_argument(
+        "--ordered",
+        action="store_true",
+        default=False,
+        help="Write the output sorted by word, language code and part of "
+        "speech; the output is written at the end of the extraction",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        default=False,
+        help="Save the progress of the extraction in a checkpoint file next "
+        "to the --db-path file, and continue an interrupted extraction from "
+        "its last checkpoint (requires --db-path and --out)",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        metavar="I/N",
+        help="Process only the Ith of N disjoint parts of the pages (I is "
+        "from 1 to N), for running the extraction on several machines with "
+        "copies of the database.  The emitted words are saved next to --out "
+        "for --merge-shards",
+    )
+    parser.add_argument(
+        "--merge-shards",
+        type=str,
+        nargs="+",
+        default=None,
+        metavar="SHARD_OUT",
+        help="Merge the --out files of --shard runs into --out and write the "
+        "words that only occur in the thesaurus",
+    )
+    parser.add_argument(
+        "--merge-errors",
+        type=str,
+        nargs="+",
+        default=None,
+        metavar="SHARD_ERRORS",
+        help="Merge the --errors files of --shard runs into --errors "
+        "(with --merge-shards)",
+    )
+    parser.add_argument(
+        "--extract-thesaurus",
+        action="store_true",
+        default=False,
+        help="Only extract thesaurus pages to the thesaurus database, run "
+        "this once before --shard runs",
+    )
+    parser.add_argument(
+        "--page-stats",
+        type=str,
+        default=None,
+        help="Write the processing time and resource usage of each page to "
+        "this file as JSON lines, and print the slowest pages at the end",
     )
     parser.add_argument(
         "--categories-file",
@@ -362,6 +553,83 @@ def main():
     else:
         logger.info(f"Capturing words for: {', '.join(capture_lang_codes)}")
 
+    if (args.shard or args.merge_shards) and (
+        not args.db_path
+        or not args.out
+        or args.out == "-"
+        or args.out.startswith("/dev/")
+    ):
+        print("--shard and --merge-shards require --db-path and --out.")
+        sys.exit(1)
+    if args.resume and args.ordered:
+        print("--resume can't be used with --ordered.")
+        sys.exit(1)
+    if args.resume and (args.schedule or args.schedule_stats):
+        print("--resume can't be used with --schedule.")
+        sys.exit(1)
+    if args.resume and (
+        not args.db_path
+        or not args.out
+        or args.out == "-"
+        or args.out.startswith("/dev/")
+    ):
+        print("--resume requires --db-path and --out with a file path.")
+        sys.exit(1)
+    if args.resume and compressed_suffix(args.out) is not None:
+        print("--resume can't be used with a compressed --out file.")
+        sys.exit(1)
+    if args.page_index or args.incremental:
+        if (
+            not args.db_path
+            or not args.out
+            or args.out == "-"
+            or args.out.startswith("/dev/")
+            or compressed_suffix(args.out) is not None
+            or args.out.endswith(PARQUET_SUFFIX)
+        ):
+            print(
+                "--page-index and --incremental require --db-path and an "
+                "uncompressed JSONL --out file."
+            )
+            sys.exit(1)
+        if (
+            args.resume
+            or args.ordered
+            or args.shard
+            or args.schedule
+            or args.schedule_stats
+        ):
+            print(
+                "--page-index and --incremental can't be used with --resume, "
+                "--ordered, --shard or --schedule."
+            )
+            sys.exit(1)
+    if args.orjson:
+        try:
+            use_orjson(True)
+        except RuntimeError as e:
+            print(e)
+            sys.exit(1)
+    if (
+        args.expansion_cache_dir or args.expansion_cache_stats
+    ) and args.expansion_cache == 0:
+        args.expansion_cache = DEFAULT_CACHE_ENTRIES
+    if (
+        args.out
+        and args.out.endswith(PARQUET_SUFFIX)
+        and (
+            args.resume
+            or args.shard
+            or args.merge_shards
+            or args.human_readable
+        )
+    ):
+        print(
+            "--resume, --shard, --merge-shards and --human-readable can't "
+            "be used with a Parquet --out file."
+        )
+        sys.exit(1)
+
     # Open output file.
     out_path = args.out
     if not out_path and args.pages_dir:
@@ -371,7 +639,17 @@ def main():
             out_tmp_path = out_path
         else:
             out_tmp_path = out_path + ".tmp"
-        out_f = open(out_tmp_path, "w", buffering=1024 * 1024, encoding="utf-8")
+        # Continue writing the output of an interrupted run when resuming
+        if out_path.endswith(PARQUET_SUFFIX):
+            out_f = open_columnar_output(
+                out_tmp_path, args.dump_file_language_code
+            )
+        else:
+            out_f = open_output(
+                out_tmp_path,
+                compressed_suffix(out_path),
+                "a" if args.resume else "w",
+            )
     else:
         out_tmp_path = out_path
         out_f = sys.stdout
@@ -392,6 +670,7 @@ def main():
         capture_descendants=args.descendants,
         verbose=args.verbose,
         expand_tables=args.inflection_tables_file,
+        trusted_models=args.trusted_models,
     )
 
     if not args.path and not args.db_path:
@@ -437,6 +716,31 @@ def main():
         elif default_override_json_path not in args.override:
             args.override.append(default_override_json_path)
 
+    run_options = RunOptions(
+        page_stats_path=args.page_stats,
+        profile_path=args.profile_workers,
+        profile_interval=args.profile_interval,
+        resume=args.resume,
+        shard=args.shard,
+        emitted_path=args.out + EMITTED_WORDS_SUFFIX
+        if args.shard is not None
+        else None,
+        ordered=args.ordered,
+        validate=args.validate,
+        schedule=args.schedule or args.schedule_stats is not None,
+        schedule_stats_path=args.schedule_stats,
+        page_timeout=args.page_timeout,
+        quarantine_path=args.quarantine,
+        recycle_pages=args.recycle_pages,
+        recycle_rss=args.recycle_rss,
+        page_index_path=out_tmp_path + INDEX_SUFFIX
+        if args.page_index or args.incremental
+        else None,
+        previous_output_path=args.incremental,
+        expansion_cache=args.expansion_cache,
+        expansion_cache_dir=args.expansion_cache_dir,
+        expansion_cache_stats_path=args.expansion_cache_stats,
+    )
     try:
         if args.path is not None:
             namespace_ids = {
@@ -457,6 +761,7 @@ def main():
                 args.override,
                 skip_extract_dump,
                 args.pages_dir,
+                run_options=run_options,
             )
 
         if args.override is not None and args.path is None:
@@ -484,7 +789,21 @@ def main():
             # --errors with single page extraction
             wxr.config.merge_return(wxr.wtp.to_return())
 
-        if not args.path and not args.page and not args.skip_extraction:
+        if args.extract_thesaurus:
+            if (
+                wxr.config.extract_thesaurus_pages
+                and thesaurus_linkage_number(wxr.thesaurus_db_conn) == 0  # type: ignore[arg-type]
+            ):
+                extract_thesaurus_data(wxr, args.num_processes)
+        elif args.merge_shards:
+            merge_shards(
+                wxr,
+                args.merge_shards,
+                out_f,
+                args.human_readable,
+                args.merge_errors,
+            )
+        elif not args.path and not args.page and not args.skip_extraction:
             # Parse again from the db file
             reprocess_wiktionary(
                 wxr,
@@ -492,6 +811,7 @@ def main():
                 out_f,
                 args.human_readable,
                 search_pattern=args.search_pattern,
+                run_options=run_options,
             )
 
     finally:
@@ -508,6 +828,7 @@ def main():
         with open(args.categories_file, "w") as f:
             json.dump(tree, f, indent=2, sort_keys=True)
 
+    remove_title_index(wxr.wtp)
     wxr.wtp.close_db_conn()
     if wxr.config.extract_thesaurus_pages:
         close_thesaurus_db(wxr.thesaurus_db_path, wxr.thesaurus_db_conn)
@@ -518,11 +839,17 @@ def main():
         ps.print_stats()
 
     if out_f is not None and out_path != out_tmp_path:
+        # The page index must not be used with another output file
+        index_path = out_path + INDEX_SUFFIX
+        if os.path.exists(index_path):
+            os.remove(index_path)
         try:
             os.remove(out_path)
         except FileNotFoundError:
             pass
         os.rename(out_tmp_path, out_path)
+        if args.page_index or args.incremental:
+            os.rename(out_tmp_path + INDEX_SUFFIX, index_path)
 
     if args.errors:
         with open(args.errors, "w", encoding="utf-8") as f:
@@ -531,6 +858,7 @@ def main():
                     "errors": wxr.config.errors,
                     "warnings": wxr.config.warnings,
                     "debugs": wxr.config.debugs,
+                    "counters": wxr.config.counters,
                 },
                 f,
                 sort_keys=True,
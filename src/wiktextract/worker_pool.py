@@ -0,0 +1,277 @@
+# Worker processes of the thesaurus extraction and the second phase.
+#
+# The workers are started from a fork server that has imported the
+# extractor modules and their large data tables, so the workers don't
+# import them again and share the memory of the tables with the fork server
+# until they modify it.  The same pool is used for the thesaurus pages and
+# the other pages.  The "spawn" start method is used where fork servers are
+# not supported.
+#
+# Each worker has a slot in the shared memory page registry of the pool,
+# where it notes the page it is processing and when it started the page.
+# The slots are written without locking and are read by the watchdog of the
+# parent process (see watchdog.py).
+#
+# Workers keep growing during a long run: the `lru_cache`s of the
+# extractors fill up and the Lua state accumulates data.  They can be
+# replaced after a number of tasks with `max_tasks_per_child` (Python 3.11+),
+# the new workers are started from the same fork server and initializer
+# arguments.  The workers also report their resident memory in the page
+# registry, so the pool can be restarted when it crosses a threshold.
+
+import multiprocessing
+import os
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from multiprocessing.context import BaseContext
+from multiprocessing.sharedctypes import SynchronizedArray
+from multiprocessing.util import Finalize
+
+from .wxr_context import WiktextractContext
+from .wxr_logging import logger
+
+# Modules imported by the fork server, in addition to the extractor modules
+# of the edition
+PRELOAD_MODULES = [
+    "wiktextract.wiktionary",
+    "wiktextract.thesaurus",
+    "wiktextract.tags",
+    "wiktextract.topics",
+]
+WORKER_STARTUP_TIMEOUT = 300  # seconds
+# Page registry slot: process id, page key, page start time, resident
+# memory in KiB
+SLOT_SIZE = 4
+
+
+class PageRegistry:
+    """Pages being processed by the worker processes, one slot per worker
+    in a shared memory array."""
+
+    def __init__(self, ctx: BaseContext, num_workers: int) -> None:
+        self.slots: SynchronizedArray = ctx.Array(
+            "d", num_workers * SLOT_SIZE
+        )
+
+    def in_flight(self) -> list[tuple[int, int, float]]:
+        """Returns the process id, the page key and the start time of the
+        pages being processed.  The start time is from `time.monotonic()`,
+        which uses the same clock in all processes."""
+        values = self.slots.get_obj()[:]
+        pages = []
+        for slot in range(0, len(values), SLOT_SIZE):
+            pid, key, start, _ = values[slot : slot + SLOT_SIZE]
+            if start > 0:
+                pages.append((int(pid), int(key), start))
+        return pages
+
+    def started_pages(self) -> set[int]:
+        """Returns the key of the last page started by each worker, whether
+        the worker is still processing it or not."""
+        values = self.slots.get_obj()[:]
+        return {
+            int(values[slot + 1])
+            for slot in range(0, len(values), SLOT_SIZE)
+            if values[slot] != 0
+        }
+
+    def max_rss(self) -> int:
+        """Returns the largest resident memory reported by the workers in
+        KiB."""
+        values = self.slots.get_obj()[:]
+        return int(max(values[SLOT_SIZE - 1 :: SLOT_SIZE], default=0))
+
+    def clear(self) -> None:
+        """Clears all slots, after the worker processes have stopped."""
+        with self.slots.get_lock():
+            values = self.slots.get_obj()
+            for i in range(len(values)):
+                values[i] = 0
+
+
+def worker_pool_context(lang_code: str) -> BaseContext:
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    ctx = multiprocessing.get_context("forkserver")
+    # Modules that don't exist are skipped by the fork server
+    ctx.set_forkserver_preload(
+        PRELOAD_MODULES
+        + [
+            f"wiktextract.extractor.{lang_code}.page",
+            f"wiktextract.extractor.{lang_code}.thesaurus",
+        ]
+    )
+    return ctx
+
+
+def worker_count(num_processes: int | None) -> int:
+    return num_processes or os.cpu_count() or 1
+
+
+def create_worker_pool(
+    wxr: WiktextractContext,
+    num_processes: int | None,
+    registry: PageRegistry | None = None,
+    max_tasks_per_child: int | None = None,
+) -> ProcessPoolExecutor:
+    """Starts the worker processes, each gets a copy of `wxr`.  If
+    `registry` is given, the workers note the pages they are processing in
+    it.  If `max_tasks_per_child` is given, a worker is replaced after that
+    many tasks.  The start time and memory use of the workers are
+    logged."""
+    start_t = time.time()
+    ctx = worker_pool_context(wxr.wtp.lang_code)
+    num_workers = worker_count(num_processes)
+    wxr.remove_unpicklable_objects()
+    kwargs = {}
+    if max_tasks_per_child is not None:
+        if sys.version_info >= (3, 11):
+            kwargs["max_tasks_per_child"] = max_tasks_per_child
+        else:
+            logger.warning("Replacing workers requires Python 3.11 or later")
+    executor = ProcessPoolExecutor(
+        max_workers=num_workers,
+        mp_context=ctx,
+        initializer=init_worker,
+        initargs=(deepcopy(wxr), ctx.Barrier(num_workers), registry),
+        **kwargs,
+    )
+    wxr.reconnect_databases()
+    # Each task waits for the other workers, so each worker runs one task
+    memory = list(
+        executor.map(worker_startup_memory, range(num_workers), chunksize=1)
+    )
+    rss = sum(m[0] for m in memory) / len(memory) / 1024
+    private = sum(m[1] for m in memory) / len(memory) / 1024
+    logger.info(
+        f"Started {num_workers} worker processes with "
+        f"{ctx.get_start_method()} in {time.time() - start_t:.1f}s, "
+        f"memory per worker: {rss:.0f} MiB resident, "
+        f"{private:.0f} MiB not shared"
+    )
+    return executor
+
+
+def init_worker(
+    wxr: WiktextractContext,
+    startup_barrier: threading.Barrier,
+    registry: PageRegistry | None,
+) -> None:
+    global worker_wxr, worker_startup_barrier, worker_slots, worker_slot
+    worker_wxr = wxr
+    worker_startup_barrier = startup_barrier
+    worker_wxr.reconnect_databases()
+    # `atexit` functions are not called in processes started by a fork
+    # server, finalizers without an exit priority are not called at exit
+    Finalize(
+        worker_wxr, worker_wxr.remove_unpicklable_objects, exitpriority=10
+    )
+    if registry is not None:
+        worker_slots = registry.slots.get_obj()
+        worker_slot = claim_worker_slot(registry)
+        if worker_slot is not None:
+            Finalize(worker_wxr, release_worker_slot, exitpriority=10)
+
+
+worker_slots = None
+worker_slot: int | None = None
+
+
+def claim_worker_slot(registry: PageRegistry) -> int | None:
+    """Returns the first registry slot that isn't used by a running
+    process."""
+    with registry.slots.get_lock():
+        values = registry.slots.get_obj()
+        for slot in range(0, len(values), SLOT_SIZE):
+            pid = int(values[slot])
+            if pid == 0 or not process_exists(pid):
+                values[slot] = os.getpid()
+                values[slot + 1 : slot + SLOT_SIZE] = [0] * (SLOT_SIZE - 1)
+                return slot
+    logger.warning(f"No page registry slot for process {os.getpid()}")
+    return None
+
+
+def release_worker_slot() -> None:
+    """Clears the registry slot of the worker, including its memory use, so
+    `PageRegistry.max_rss()` only counts running workers."""
+    if worker_slots is not None and worker_slot is not None:
+        worker_slots[worker_slot + 1 : worker_slot + SLOT_SIZE] = [0] * (
+            SLOT_SIZE - 1
+        )
+        worker_slots[worker_slot] = 0
+
+
+def process_exists(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def worker_page_started(key: int) -> None:
+    """Notes in the page registry that the worker started processing the
+    page `key`."""
+    if worker_slots is not None and worker_slot is not None:
+        worker_slots[worker_slot + 1] = key
+        worker_slots[worker_slot + 2] = time.monotonic()
+
+
+def worker_page_done() -> None:
+    if worker_slots is not None and worker_slot is not None:
+        worker_slots[worker_slot + 2] = 0
+
+
+def worker_report_memory() -> None:
+    """Notes the resident memory of the worker in the page registry."""
+    if worker_slots is not None and worker_slot is not None:
+        worker_slots[worker_slot + 3] = process_rss()
+
+
+def worker_context() -> WiktextractContext:
+    """Returns the `WiktextractContext` of the worker process."""
+    return worker_wxr
+
+
+def worker_startup_memory(_: int) -> tuple[int, int]:
+    """Returns the resident and not shared memory of the worker in KiB."""
+    try:
+        worker_startup_barrier.wait(WORKER_STARTUP_TIMEOUT)
+    except threading.BrokenBarrierError:
+        pass
+    return process_memory()
+
+
+def process_memory() -> tuple[int, int]:
+    """Returns the resident and private (not shared with other processes)
+    memory of the current process in KiB."""
+    try:
+        with open("/proc/self/smaps_rollup", encoding="utf-8") as f:
+            fields = {}
+            for line in f:
+                name, _, value = line.partition(":")
+                if value.strip().endswith("kB"):
+                    fields[name] = int(value.split()[0])
+        return fields["Rss"], (
+            fields["Private_Clean"] + fields["Private_Dirty"]
+        )
+    except (OSError, KeyError):
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss, rss
+
+
+def process_rss() -> int:
+    """Returns the current resident memory of the process in KiB."""
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError):
+        # Peak memory where /proc isn't available
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
@@ -0,0 +1,45 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from wiktextract.checkpoint import Checkpoint, checkpoint_path
+
+
+class CheckpointTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = checkpoint_path(Path(self.tmp_dir.name) / "db.db")
+        self.out_path = Path(self.tmp_dir.name) / "out.jsonl"
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_checkpoint_path(self):
+        self.assertEqual(self.path.name, "db_checkpoint.db")
+
+    def test_resume(self):
+        checkpoint = Checkpoint(self.path, interval=2)
+        self.assertEqual(checkpoint.resume(5), 0)
+        with self.out_path.open("a", encoding="utf-8") as out_f:
+            for word in ["a", "b", "c"]:
+                out_f.write(f'{{"word": "{word}"}}\n')
+                checkpoint.page_done([(word, "en", "noun")], out_f)
+        checkpoint.conn.close()
+
+        # The third page was written after the last saved checkpoint
+        checkpoint = Checkpoint(self.path, interval=2)
+        self.assertEqual(checkpoint.resume(5), 2)
+        self.assertEqual(
+            checkpoint.emitted(), {("a", "en", "noun"), ("b", "en", "noun")}
+        )
+        with self.out_path.open("a", encoding="utf-8") as out_f:
+            checkpoint.restore_output(out_f)
+            out_f.write('{"word": "c"}\n')
+        self.assertEqual(
+            self.out_path.read_text(encoding="utf-8"),
+            '{"word": "a"}\n{"word": "b"}\n{"word": "c"}\n',
+        )
+        with self.assertRaises(RuntimeError):
+            checkpoint.resume(6)
+        checkpoint.remove()
+        self.assertFalse(self.path.exists())
@@ -1,4 +1,6 @@
+import json
 import unittest
+from pathlib import Path
 
 from wikitextprocessor import Wtp
 
@@ -411,3 +413,39 @@ class CleanTests(unittest.TestCase):
             clean_value(self.wxr, '<span class="a<nowiki/> b">text</span>'),
             "text",
         )
+
+    def test_cv_corpus(self):
+        # Outputs of the previous implementation of `clean_value()`, which
+        # ran every regexp on every value
+        with open(
+            Path(__file__).parent / "clean_value_corpus.json", encoding="utf-8"
+        ) as f:
+            corpus = json.load(f)
+        for text, no_strip, no_html_strip, expected in corpus:
+            with self.subTest(text=text):
+                self.assertEqual(
+                    clean_value(
+                        self.wxr,
+                        text,
+                        no_strip=no_strip,
+                        no_html_strip=no_html_strip,
+                    ),
+                    expected,
+                )
+
+    def test_clean_node_categories_and_links(self):
+        from wiktextract.page import clean_node
+
+        self.wxr.wtp.start_page("dog")
+        self.wxr.wtp.add_page("Template:cat", 10, "[[Category:Foo bar]]text")
+        tree = self.wxr.wtp.parse("{{cat}} [[dog|doggy]]")
+        data = {}
+        self.assertEqual(clean_node(self.wxr, data, tree), "text doggy")
+        self.assertEqual(data, {"categories": ["Foo bar"]})
+        data = {}
+        self.assertEqual(
+            clean_node(self.wxr, data, tree, collect_links=True), "text doggy"
+        )
+        self.assertEqual(
+            data, {"categories": ["Foo bar"], "links": [("doggy", "dog")]}
+        )
@@ -0,0 +1,97 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from wiktextract.columnar_output import arrow_schema, open_columnar_output
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+@unittest.skipIf(pa is None, "pyarrow is not installed")
+class ColumnarOutputTests(unittest.TestCase):
+    def test_schema(self):
+        schema = arrow_schema("fr")
+        self.assertEqual(schema.field("word").type, pa.string())
+        senses_type = schema.field("senses").type
+        self.assertIsInstance(senses_type, pa.ListType)
+        self.assertEqual(
+            senses_type.value_type.field("glosses").type,
+            pa.list_(pa.string()),
+        )
+        # excluded fields are not in the output
+        self.assertNotIn("pos_id", schema.names)
+
+    def test_redirect_columns(self):
+        # the German model doesn't have the redirect fields
+        schema = arrow_schema("de")
+        self.assertEqual(schema.field("title").type, pa.string())
+        self.assertEqual(schema.field("redirect").type, pa.string())
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = str(Path(tmp_dir) / "de.parquet")
+            with open_columnar_output(path, "de") as f:
+                f.write('{"word": "Hund", "lang_code": "de", "pos": "noun"}\n')
+                f.write(
+                    '{"title": "Hunde", "redirect": "Hund", '
+                    '"pos": "hard-redirect"}\n'
+                )
+            rows = pq.read_table(
+                path, columns=["word", "title", "redirect", "pos"]
+            ).to_pylist()
+            self.assertEqual(
+                rows[1],
+                {
+                    "word": None,
+                    "title": "Hunde",
+                    "redirect": "Hund",
+                    "pos": "hard-redirect",
+                },
+            )
+
+    def test_write(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = str(Path(tmp_dir) / "fr.parquet")
+            with open_columnar_output(path, "fr") as f:
+                f.write(
+                    json.dumps(
+                        {
+                            "word": "chat",
+                            "lang_code": "fr",
+                            "lang": "Français",
+                            "pos": "noun",
+                            "senses": [{"glosses": ["Mammifère"]}],
+                        },
+                        ensure_ascii=False,
+                    )
+                    + "\n"
+                )
+                f.flush()
+                f.buffer.write(
+                    b'{"word": "chien", "lang_code": "fr", "lang": "Fr"}\n'
+                )
+            table = pq.read_table(path, columns=["word", "senses"])
+            self.assertEqual(
+                table.column("word").to_pylist(), ["chat", "chien"]
+            )
+            self.assertEqual(
+                table.column("senses").to_pylist()[0][0]["glosses"],
+                ["Mammifère"],
+            )
+
+    def test_entry_not_matching_schema(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = str(Path(tmp_dir) / "fr.parquet")
+            with self.assertLogs("wiktextract") as cm:
+                with open_columnar_output(path, "fr") as f:
+                    f.write('{"word": "chat", "lang_code": "fr"}\n')
+                    f.write('{"word": "chien", "senses": "not a list"}\n')
+                    f.write('{"word": "cheval", "lang_code": "fr"}\n')
+            self.assertIn("'chien'", cm.output[0])
+            table = pq.read_table(path, columns=["word"])
+            self.assertEqual(
+                table.column("word").to_pylist(), ["chat", "cheval"]
+            )
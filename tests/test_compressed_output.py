@@ -0,0 +1,55 @@
+import bz2
+import gzip
+import lzma
+import tempfile
+import unittest
+from pathlib import Path
+
+from wiktextract.compressed_output import (
+    CompressedWriter,
+    compressed_suffix,
+    open_input,
+    open_output,
+)
+
+
+class CompressedOutputTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dir_path = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_compressed_suffix(self):
+        self.assertEqual(compressed_suffix("out.jsonl.gz"), ".gz")
+        self.assertEqual(compressed_suffix("out.jsonl.zst"), ".zst")
+        self.assertIsNone(compressed_suffix("out.jsonl"))
+        self.assertIsNone(compressed_suffix("-"))
+
+    def test_write_and_read(self):
+        lines = [f'{{"word": "wörd {i}"}}\n' for i in range(10000)]
+        for suffix, module in ((".gz", gzip), (".xz", lzma), (".bz2", bz2)):
+            with self.subTest(suffix=suffix):
+                path = self.dir_path / ("out.jsonl" + suffix)
+                # Written to a temporary file like `--out`
+                tmp_path = str(path) + ".tmp"
+                with open_output(tmp_path, compressed_suffix(str(path))) as f:
+                    for line in lines[:5000]:
+                        f.write(line)
+                    f.flush()
+                    f.buffer.write("".join(lines[5000:]).encode("utf-8"))
+                Path(tmp_path).rename(path)
+                with module.open(path, "rt", encoding="utf-8") as f:
+                    self.assertEqual(f.readlines(), lines)
+                with open_input(str(path)) as f:
+                    self.assertEqual(f.readlines(), lines)
+
+    def test_writer_error(self):
+        raw_f = open(self.dir_path / "out.gz", "wb")
+        writer = CompressedWriter(raw_f, ".gz", chunk_size=1)
+        raw_f.close()  # the writer thread can't write to a closed file
+        with self.assertRaises(OSError):
+            for _ in range(100):
+                writer.write(b"data")
+            writer.close()
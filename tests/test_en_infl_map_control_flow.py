@@ -558,3 +558,30 @@ class InflTests(unittest.TestCase):
                                   base_tags=["indicative"],)
         expected = [("positive",)]
         self.assertEqual(expected, ret)
+
+    def test_memoized_evaluation(self):
+        infl_map = {
+            "foo": {
+                "if": "indicative",
+                "then": "positive",
+            },
+        }
+        with patch.object(self.wxr.wtp, "debug") as debug:
+            for base_tags in (["indicative", "past"], ["indicative"]):
+                ret = self.xexpand_header("foo", infl_map,
+                                          base_tags=base_tags,)
+                self.assertEqual([("positive",)], ret)
+            self.assertEqual(debug.call_count, 0)
+            for base_tags in (["past"], []):
+                ret = self.xexpand_header("foo", infl_map,
+                                          base_tags=base_tags,)
+                self.assertEqual([("error-unrecognized-form",)], ret)
+            # The debug message of the memoized evaluation is repeated
+            self.assertEqual(debug.call_count, 2)
+            self.assertIn("base_tags=[]", debug.call_args.args[0])
+
+    def test_replaced_infl_map(self):
+        ret = self.xexpand_header("foo", {"foo": "positive"})
+        self.assertEqual([("positive",)], ret)
+        ret = self.xexpand_header("foo", {"foo": "negative"})
+        self.assertEqual([("negative",)], ret)
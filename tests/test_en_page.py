@@ -905,3 +905,36 @@ alcance
                 }
             ],
         )
+
+    def test_select_language_sections(self):
+        from wiktextract.extractor.en.page import select_language_sections
+
+        self.wxr.config.capture_language_codes = {"en", "mul"}
+        text = """{{also|Do}}
+==English==
+===Noun===
+# sense
+==Finnish==
+===Verb===
+# sense
+==Translingual==
+===Symbol===
+# sense
+==[[Old English]]==
+"""
+        self.assertEqual(
+            select_language_sections(self.wxr, text),
+            """{{also|Do}}
+==English==
+===Noun===
+# sense
+==Translingual==
+===Symbol===
+# sense
+==[[Old English]]==
+""",
+        )
+        self.assertEqual(
+            self.wxr.config.counters["skipped_language_sections"], 1
+        )
+        self.assertEqual(self.wxr.config.counters["skipped_language_bytes"], 20)
@@ -0,0 +1,150 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+from wikitextprocessor.common import MAGIC_FIRST
+
+from wiktextract.expansion_cache import ExpansionCache, ExpansionCacheStats
+
+
+class FakeWtp:
+    NAMESPACE_DATA = {
+        "Template": {"id": 10, "name": "Template", "aliases": []},
+        "Module": {"id": 828, "name": "Module", "aliases": []},
+    }
+    lang_code = "en"
+
+    def __init__(self, pages: dict[str, str]) -> None:
+        self.pages = pages
+        self.title = "word"
+
+    def get_page(self, title, namespace_id=None):
+        if title not in self.pages:
+            return None
+        return SimpleNamespace(
+            title=title, body=self.pages[title], redirect_to=None
+        )
+
+
+def expand(cache: ExpansionCache, name: str, ht: dict, expansion: str) -> str:
+    """Calls the cache functions like `Wtp.expand()` does."""
+    t = cache.cached_template_fn(name, ht)
+    if t is None:
+        t = expansion
+        cache.save_expansion_fn(name, ht, t)
+    return t
+
+
+class ExpansionCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.wtp = FakeWtp(
+            {
+                "Template:m": "{{#invoke:links|mention}}",
+                "Module:links": 'local u = require("Module:utilities")',
+                "Module:utilities": "return {}",
+                "Template:pagename": "{{PAGENAME}}",
+                "Template:title": "{{#invoke:title|show}}",
+                "Module:title": "return mw.title.getCurrentTitle().text",
+                "Template:exists": "{{#ifexist:{{{1}}}|yes|no}}",
+                "Template:a": "{{b}}",
+                "Template:b": "{{a}}",
+            }
+        )
+        self.cache = ExpansionCache(self.wtp, 3)
+
+    def test_template_info(self):
+        info = self.cache.template_info("Template:m")
+        self.assertFalse(info.page_dependent)
+        self.assertTrue(info.pure)
+        self.assertTrue(
+            self.cache.template_info("Template:title").page_dependent
+        )
+        self.assertTrue(
+            self.cache.template_info("Template:pagename").page_dependent
+        )
+        info = self.cache.template_info("Template:exists")
+        self.assertFalse(info.page_dependent)
+        self.assertFalse(info.pure)
+        # Templates in a call cycle are only cached for the page
+        self.assertTrue(self.cache.template_info("Template:a").page_dependent)
+        self.assertTrue(self.cache.template_info("Template:b").page_dependent)
+        # The digest covers the modules the template uses
+        other_cache = ExpansionCache(
+            FakeWtp(dict(self.wtp.pages, **{"Module:utilities": "return 1"})),
+            3,
+        )
+        self.assertNotEqual(
+            info.digest, other_cache.template_info("Template:m").digest
+        )
+
+    def test_cache_key(self):
+        self.assertEqual(
+            self.cache.cache_key("m", {2: "x", 1: "en", "g": "y"}),
+            ("Template:m", (("1", "en"), ("2", "x"), ("g", "y")), None),
+        )
+        self.assertEqual(
+            self.cache.cache_key("pagename", {}),
+            ("Template:pagename", (), "word"),
+        )
+        self.assertIsNone(self.cache.cache_key("m", {1: chr(MAGIC_FIRST)}))
+
+    def test_hits(self):
+        self.assertEqual(expand(self.cache, "m", {1: "en"}, "en"), "en")
+        self.assertEqual(expand(self.cache, "m", {1: "en"}, "other"), "en")
+        self.assertEqual(
+            expand(self.cache, "pagename", {}, "word"), "word"
+        )
+        self.wtp.title = "other"
+        self.assertEqual(
+            expand(self.cache, "pagename", {}, "other"), "other"
+        )
+        # Expansions with magic cookies aren't cached
+        magic = chr(MAGIC_FIRST)
+        expand(self.cache, "m", {1: "fr"}, magic)
+        self.assertEqual(expand(self.cache, "m", {1: "fr"}, "fr"), "fr")
+        stats = self.cache.take_stats()
+        self.assertEqual(stats["Template:m"][:2], [1, 3])
+        self.assertEqual(stats["Template:pagename"][:2], [0, 2])
+        self.assertEqual(self.cache.take_stats(), {})
+
+    def test_lru(self):
+        for lang in ["en", "fr", "de"]:
+            expand(self.cache, "m", {1: lang}, lang)
+        expand(self.cache, "m", {1: "en"}, "en")
+        expand(self.cache, "m", {1: "es"}, "es")
+        self.assertEqual(
+            [key[1][0][1] for key in self.cache.entries], ["de", "en", "es"]
+        )
+
+    def test_disk_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ExpansionCache(self.wtp, 3, cache_dir)
+            expand(cache, "m", {1: "en"}, "en")
+            expand(cache, "exists", {1: "en"}, "yes")
+            cache.flush()
+            cache.disk.conn.close()
+            cache = ExpansionCache(self.wtp, 3, cache_dir)
+            self.assertEqual(expand(cache, "m", {1: "en"}, "other"), "en")
+            self.assertEqual(
+                expand(cache, "exists", {1: "en"}, "no"), "no"
+            )
+            cache.disk.conn.close()
+
+    def test_stats(self):
+        stats = ExpansionCacheStats()
+        stats.add({"Template:m": [1, 2, 0.5]})
+        stats.add({"Template:m": [3, 0, 1.5], "Template:l": [0, 1, 0.0]})
+        self.assertEqual(
+            stats.stats,
+            {"Template:m": [4, 2, 2.0], "Template:l": [0, 1, 0.0]},
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir, "stats.json")
+            stats.path = str(path)
+            stats.close()
+            data = json.loads(path.read_text())
+        self.assertEqual(
+            data["Template:m"], {"hits": 4, "misses": 2, "saved": 2.0}
+        )
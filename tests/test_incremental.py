@@ -0,0 +1,187 @@
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+from wiktextract.config import WiktionaryConfig
+from wiktextract.incremental import (
+    INDEX_SUFFIX,
+    DependencyGraph,
+    IncrementalRun,
+    component_digests,
+    thesaurus_digest,
+)
+from wiktextract.thesaurus import init_thesaurus_db
+
+
+def page(title: str, body: str, ns_id: int = 0) -> SimpleNamespace:
+    return SimpleNamespace(
+        title=title, namespace_id=ns_id, body=body, redirect_to=None
+    )
+
+
+class FakeWtp:
+    NAMESPACE_DATA = {
+        "Template": {"id": 10, "name": "Template", "aliases": ["T"]},
+        "Module": {"id": 828, "name": "Module", "aliases": []},
+    }
+
+    def __init__(self, templates: dict[str, str]) -> None:
+        self.templates = templates
+
+    def get_all_pages(self, namespace_ids):
+        for title, body in self.templates.items():
+            yield page(title, body, 828 if title.startswith("Module:") else 10)
+
+
+class IncrementalTests(unittest.TestCase):
+    def test_component_digests(self):
+        bodies = {"a": b"a", "b": b"b", "c": b"c", "d": b"d"}
+        calls = {"a": {"b"}, "b": {"a", "c"}, "c": set(), "d": set()}
+        digests = component_digests(bodies, calls)
+        self.assertEqual(digests["a"], digests["b"])
+        self.assertNotEqual(digests["a"], digests["c"])
+        new_digests = component_digests(dict(bodies, c=b"new c"), calls)
+        self.assertNotEqual(digests["a"], new_digests["a"])
+        self.assertEqual(digests["d"], new_digests["d"])
+
+    def test_page_calls(self):
+        graph = DependencyGraph(
+            FakeWtp(
+                {
+                    "Template:head": "{{#invoke:headword|show}}",
+                    "Module:headword": 'local m = require("Module:data")',
+                    "Module:data": "return {}",
+                }
+            )
+        )
+        self.assertEqual(
+            graph.page_calls(
+                page(
+                    "word",
+                    "{{head|en}} {{subst:T:en-noun}} {{{1}}} {{#if:x|y}}",
+                )
+            ),
+            {"Template:head", "Template:en-noun"},
+        )
+        self.assertEqual(
+            graph.page_calls(
+                page(
+                    "Module:headword",
+                    'require("Module:data") require("strict") '
+                    'frame:expandTemplate{ title = "head" }',
+                    828,
+                )
+            ),
+            {"Module:data", "Template:head"},
+        )
+        # The template depends on the modules
+        self.assertIn("Module:data", graph.digests)
+        self.assertNotEqual(
+            graph.digests["Template:head"], graph.digests["Module:data"]
+        )
+
+    def run_pages(
+        self,
+        tmp_dir: str,
+        name: str,
+        templates: dict,
+        previous: str | None,
+        failed: frozenset[str] = frozenset(),
+    ) -> tuple[bytes, list[str]]:
+        wxr = SimpleNamespace(wtp=FakeWtp(templates), config=WiktionaryConfig())
+        out_path = str(Path(tmp_dir) / name)
+        extracted = []
+        with open(out_path, "wb") as out_f:
+            run = IncrementalRun(
+                wxr, out_path + INDEX_SUFFIX, previous, False, out_f
+            )
+            pages = [
+                page("a", "{{x}}"),
+                page("b", "{{y}}"),
+                page("c", "plain"),
+            ]
+            emitted = set()
+            for key, p in run.changed_pages(enumerate(pages)):
+                extracted.append(p.title)
+                if p.title in failed:
+                    run.write_page(key, b"", [], emitted, failed=True)
+                    continue
+                page_emitted = [(p.title, "en", "noun")]
+                run.write_page(
+                    key,
+                    f'{{"word": "{p.title}"}}\n'.encode(),
+                    page_emitted,
+                    emitted,
+                )
+                emitted.update(page_emitted)
+            run.close(emitted)
+        self.assertEqual(
+            emitted,
+            {(t, "en", "noun") for t in ["a", "b", "c"] if t not in failed},
+        )
+        return Path(out_path).read_bytes(), extracted
+
+    def test_incremental_run(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            templates = {"Template:x": "x", "Template:y": "{{z}}"}
+            first, extracted = self.run_pages(
+                tmp_dir, "first.jsonl", templates, None
+            )
+            self.assertEqual(extracted, ["a", "b", "c"])
+            # "b" calls "z" through "y"
+            second, extracted = self.run_pages(
+                tmp_dir,
+                "second.jsonl",
+                dict(templates, **{"Template:z": "new"}),
+                str(Path(tmp_dir) / "first.jsonl"),
+            )
+            self.assertEqual(extracted, ["b"])
+            self.assertEqual(first, second)
+            third, extracted = self.run_pages(
+                tmp_dir,
+                "third.jsonl",
+                dict(templates, **{"Template:z": "new"}),
+                str(Path(tmp_dir) / "second.jsonl"),
+            )
+            self.assertEqual(extracted, [])
+            self.assertEqual(first, third)
+
+    def test_failed_page(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            templates = {"Template:x": "x", "Template:y": "y"}
+            self.run_pages(
+                tmp_dir, "first.jsonl", templates, None, frozenset(["b"])
+            )
+            # The page that failed isn't copied from the empty output
+            _, extracted = self.run_pages(
+                tmp_dir,
+                "second.jsonl",
+                templates,
+                str(Path(tmp_dir) / "first.jsonl"),
+            )
+            self.assertEqual(extracted, ["b"])
+
+    def test_thesaurus_digest(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            digests = []
+            for name, entry_id, linkage in [
+                ("a.db", 1, "synonyms"),
+                ("b.db", 2, "synonyms"),
+                ("c.db", 1, "antonyms"),
+            ]:
+                conn = init_thesaurus_db(Path(tmp_dir) / name)
+                conn.execute(
+                    "INSERT INTO entries VALUES (?, 'word', 'noun', 'en', '')",
+                    (entry_id,),
+                )
+                conn.execute(
+                    "INSERT INTO terms (term, entry_id, linkage) "
+                    "VALUES ('term', ?, ?)",
+                    (entry_id, linkage),
+                )
+                digests.append(thesaurus_digest(conn))
+                conn.close()
+            # The row ids don't change the digest
+            self.assertEqual(digests[0], digests[1])
+            self.assertNotEqual(digests[0], digests[2])
@@ -0,0 +1,47 @@
+import io
+import json
+import unittest
+
+from wiktextract.wiktionary import (
+    encode_json_data,
+    orjson,
+    use_orjson,
+    write_json_data,
+)
+
+
+class JsonOutputTests(unittest.TestCase):
+    def tearDown(self) -> None:
+        use_orjson(False)
+
+    def test_default_format(self):
+        data = {"word": "wörd", "senses": [{"glosses": ["a", "b"]}]}
+        self.assertEqual(
+            encode_json_data(data, False),
+            (json.dumps(data, ensure_ascii=False) + "\n").encode("utf-8"),
+        )
+
+    @unittest.skipIf(orjson is None, "orjson is not installed")
+    def test_orjson(self):
+        use_orjson(True)
+        self.assertEqual(
+            encode_json_data({"word": "wörd", "pos": "noun"}, False),
+            '{"word":"wörd","pos":"noun"}\n'.encode(),
+        )
+        # Integers over 64 bits are encoded with json in the same format
+        self.assertEqual(
+            encode_json_data({"word": "a", "n": 2**64}, False),
+            f'{{"word":"a","n":{2**64}}}\n'.encode(),
+        )
+
+    def test_text_output_matches_worker_lines(self):
+        data = {"word": "a", "pos": "noun"}
+        for enabled in [False, orjson is not None]:
+            use_orjson(enabled)
+            for human_readable in [False, True]:
+                out_f = io.StringIO()
+                write_json_data(data, out_f, human_readable)
+                self.assertEqual(
+                    out_f.getvalue().encode("utf-8"),
+                    encode_json_data(data, human_readable),
+                )
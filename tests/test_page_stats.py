@@ -0,0 +1,85 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from wiktextract.page_stats import (
+    PageStatsCollector,
+    PageStatsWriter,
+    count_lua_calls,
+    count_template_expansions,
+    percentile,
+)
+
+
+class FakeWtp:
+    lua_invoke = None
+
+    def expand(self, text, template_fn=None, post_template_fn=None):
+        # One call expands every template of the text
+        expanded = []
+        for name in text.split():
+            expansion = name.upper()
+            if post_template_fn is not None:
+                expansion = post_template_fn(name, {}, expansion) or expansion
+            expanded.append(expansion)
+        return " ".join(expanded)
+
+
+def initialize_lua(wtp: FakeWtp) -> None:
+    wtp.lua_invoke = lambda *args: "ok"
+
+
+class PageStatsTests(unittest.TestCase):
+    def test_writer(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "page_stats.jsonl"
+            writer = PageStatsWriter(str(path), top_n=2)
+            for i in range(5):
+                writer.add(
+                    {
+                        "title": f"page{i}",
+                        "wall": i / 2,
+                        "cpu": i / 2,
+                        "rss": 0,
+                        "expand": i,
+                        "lua": 0,
+                        "out": 10,
+                    }
+                )
+            with self.assertLogs("wiktextract") as cm:
+                writer.close()
+            with path.open(encoding="utf-8") as f:
+                records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 5)
+        self.assertEqual(records[3]["expand"], 3)
+        self.assertEqual(
+            sorted(writer.slowest, reverse=True),
+            [(2.0, "page4"), (1.5, "page3")],
+        )
+        self.assertIn("page4", cm.output[-2])
+
+    def test_percentile(self):
+        values = [float(i) for i in range(100)]
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 99.9), 99.0)
+
+    def test_count_template_expansions(self):
+        expand = count_template_expansions(FakeWtp.expand)
+        wtp = FakeWtp()
+        start = PageStatsCollector.expand_calls
+        self.assertEqual(expand(wtp, "a b c"), "A B C")
+        self.assertEqual(PageStatsCollector.expand_calls - start, 3)
+        # The post_template_fn of the caller is still called
+        self.assertEqual(
+            expand(wtp, "a b", post_template_fn=lambda n, ht, e: e + "!"),
+            "A! B!",
+        )
+        self.assertEqual(PageStatsCollector.expand_calls - start, 5)
+
+    def test_count_lua_calls_from_first_page(self):
+        wtp = FakeWtp()
+        start = PageStatsCollector.lua_calls
+        count_lua_calls(initialize_lua)(wtp)
+        wtp.lua_invoke("module", "function")
+        self.assertEqual(PageStatsCollector.lua_calls - start, 1)
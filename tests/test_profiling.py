@@ -0,0 +1,51 @@
+import multiprocessing
+import pstats
+import tempfile
+import unittest
+from pathlib import Path
+
+from wiktextract.profiling import WorkerProfiler, merge_worker_profiles
+
+
+def first_worker_call() -> int:
+    return sum(range(100))
+
+
+def second_worker_call() -> int:
+    return sum(range(200))
+
+
+def profile_worker(profile_dir: str, call_name: str) -> None:
+    profiler = WorkerProfiler(profile_dir)
+    profiler.start_page()
+    globals()[call_name]()
+    profiler.end_page()
+    # the stats are written by the finalizer when the process exits
+
+
+class ProfilingTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.profile_dir = Path(self.tmp_dir.name) / "profiles"
+        self.profile_dir.mkdir()
+        self.out_path = Path(self.tmp_dir.name) / "merged.prof"
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_merge_worker_profiles(self):
+        ctx = multiprocessing.get_context("fork")
+        for call_name in ["first_worker_call", "second_worker_call"]:
+            process = ctx.Process(
+                target=profile_worker, args=(str(self.profile_dir), call_name)
+            )
+            process.start()
+            process.join()
+            self.assertEqual(process.exitcode, 0)
+        self.assertEqual(len(list(self.profile_dir.glob("worker-*.prof"))), 2)
+
+        merge_worker_profiles(str(self.profile_dir), str(self.out_path))
+        stats = pstats.Stats(str(self.out_path))
+        function_names = {name for _, _, name in stats.stats}
+        self.assertIn("first_worker_call", function_names)
+        self.assertIn("second_worker_call", function_names)
@@ -0,0 +1,32 @@
+import unittest
+from types import SimpleNamespace
+
+from wiktextract.scheduling import chunk_pages, schedule_pages
+
+
+def page(title: str, length: int) -> SimpleNamespace:
+    return SimpleNamespace(title=title, namespace_id=0, body="x" * length)
+
+
+class SchedulingTests(unittest.TestCase):
+    def test_largest_first(self):
+        scheduled = schedule_pages([page("b", 10), page("a", 1000), page("c", 1)])
+        self.assertEqual([p.title for p in scheduled], ["a", "b", "c"])
+        # Position in database order
+        self.assertEqual([p.index for p in scheduled], [1, 0, 2])
+
+    def test_durations(self):
+        scheduled = schedule_pages(
+            [page("a", 1000), page("b", 10), page("c", 100)],
+            {"a": 0.1, "b": 5.0},
+        )
+        # "c" has no duration, its cost is estimated from the page length
+        self.assertEqual([p.title for p in scheduled], ["b", "c", "a"])
+        self.assertAlmostEqual(scheduled[1].cost, 100 * 5.1 / 1010)
+
+    def test_chunks_get_smaller(self):
+        scheduled = schedule_pages([page(str(i), 100) for i in range(1000)])
+        chunks = list(chunk_pages(scheduled, 4))
+        self.assertEqual(sum(len(chunk) for chunk in chunks), 1000)
+        self.assertGreater(len(chunks[0]), len(chunks[-2]))
+        self.assertLessEqual(max(len(chunk) for chunk in chunks), 100)
@@ -0,0 +1,42 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from wikitextprocessor import Page
+
+from wiktextract.shards import (
+    parse_shard,
+    read_emitted_words,
+    shard_pages,
+    write_emitted_words,
+)
+
+
+class ShardTests(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("1/4"), (0, 4))
+        self.assertEqual(parse_shard("4/4"), (3, 4))
+        for value in ["0/4", "5/4", "1", "a/b"]:
+            with self.assertRaises(ValueError):
+                parse_shard(value)
+
+    def test_shards_are_disjoint(self):
+        pages = [
+            Page(title=f"page {i}", namespace_id=0, body="")
+            for i in range(100)
+        ]
+        titles = []
+        for index in range(3):
+            shard = [page.title for page in shard_pages(pages, (index, 3))]
+            self.assertGreater(len(shard), 0)
+            titles.extend(shard)
+        self.assertEqual(
+            sorted(titles), sorted(page.title for page in pages)
+        )
+
+    def test_emitted_words(self):
+        emitted = {("dog", "en", "noun"), ("ääni", "fi", "noun")}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = str(Path(tmp_dir) / "out.jsonl.emitted")
+            write_emitted_words(path, emitted)
+            self.assertEqual(read_emitted_words(path), emitted)
@@ -1,6 +1,8 @@
+import copy
 import unittest
 
-from wiktextract.extractor.share import split_senseids
+from wiktextract.extractor.fr.models import Sense, Sound, WordEntry
+from wiktextract.extractor.share import deep_copy_data, split_senseids
 
 
 class TestShare(unittest.TestCase):
@@ -22,3 +24,41 @@ class TestShare(unittest.TestCase):
 
         for test_case in test_cases:
             self.assertEqual(split_senseids(test_case[0]), test_case[1])
+
+    def test_deep_copy_model(self):
+        sound = Sound(ipa="ʃjɛ̃", tags=["France"])
+        base_data = WordEntry(
+            word="chien",
+            lang_code="fr",
+            lang="Français",
+            sounds=[sound, sound],
+            categories=["Noms communs en français"],
+        )
+        base_data.senses.append(Sense(glosses=["Mammifère"]))
+        data = deep_copy_data(base_data)
+        self.assertEqual(data, base_data.model_copy(deep=True))
+        self.assertEqual(
+            data.__pydantic_fields_set__, base_data.__pydantic_fields_set__
+        )
+        # Shared objects stay shared in the copy only
+        self.assertIs(data.sounds[0], data.sounds[1])
+        self.assertIsNot(data.sounds[0], sound)
+        data.sounds[0].tags.append("Canada")
+        data.categories.append("Mammifères en français")
+        data.senses[0].glosses.append("Homme méprisable")
+        self.assertEqual(sound.tags, ["France"])
+        self.assertEqual(base_data.categories, ["Noms communs en français"])
+        self.assertEqual(base_data.senses[0].glosses, ["Mammifère"])
+
+    def test_deep_copy_dict(self):
+        tags = ["a"]
+        base_data = {
+            "word": "dog",
+            "senses": [{"tags": tags, "links": [("dog", "dog")]}],
+            "related": [{"tags": tags}],
+            "etymology_number": 1,
+        }
+        data = deep_copy_data(base_data)
+        self.assertEqual(data, copy.deepcopy(base_data))
+        self.assertIs(data["senses"][0]["tags"], data["related"][0]["tags"])
+        self.assertIsNot(data["senses"][0]["tags"], tags)
@@ -0,0 +1,50 @@
+import io
+import json
+import unittest
+
+from wiktextract.sorted_output import SortedOutput
+
+
+class SortedOutputTests(unittest.TestCase):
+    def sorted_lines(self, max_buffer_size: int) -> list[str]:
+        out_f = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+        sorted_out_f = SortedOutput(out_f, max_buffer_size=max_buffer_size)
+        for data in [
+            {"word": "b", "lang_code": "en", "pos": "noun"},
+            {"title": "a", "redirect": "b", "pos": "hard-redirect"},
+            {"word": "b", "lang_code": "en", "pos": "adj"},
+            {"word": "b", "lang_code": "de", "pos": "noun"},
+            {"word": "b", "lang_code": "en", "pos": "noun", "senses": []},
+            {"word": "c", "lang_code": "en", "pos": "verb"},
+        ]:
+            sorted_out_f.add(
+                data.get("word") or data["title"],
+                data.get("lang_code", ""),
+                data["pos"],
+                (json.dumps(data) + "\n").encode("utf-8"),
+            )
+        sorted_out_f.close()
+        return out_f.buffer.getvalue().decode("utf-8").splitlines()
+
+    def test_in_memory(self):
+        lines = self.sorted_lines(1024 * 1024)
+        self.assertEqual(
+            [json.loads(line).get("word", "a") for line in lines],
+            ["a", "b", "b", "b", "b", "c"],
+        )
+        self.assertEqual(
+            [json.loads(line).get("lang_code") for line in lines[1:4]],
+            ["de", "en", "en"],
+        )
+        self.assertEqual(json.loads(lines[2])["pos"], "adj")
+
+    def test_spilled_runs(self):
+        self.assertEqual(self.sorted_lines(100), self.sorted_lines(1024))
+
+    def test_add_sorted(self):
+        out_f = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+        sorted_out_f = SortedOutput(out_f, max_buffer_size=4)
+        for key, line in [((1, 0), b"c\n"), ((0, 1), b"b\n"), ((0, 0), b"z\n")]:
+            sorted_out_f.add_sorted(key, line)
+        sorted_out_f.close()
+        self.assertEqual(out_f.buffer.getvalue(), b"z\nb\nc\n")
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from wiktextract.table_cache import cached_table
+
+
+class TableCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.source_path = Path(self.tmp_dir.name) / "source.py"
+        self.source_path.write_text("TABLE = 1", encoding="utf-8")
+        self.env = patch.dict(
+            os.environ,
+            {"WIKTEXTRACT_CACHE_DIR": str(Path(self.tmp_dir.name) / "cache")},
+        )
+        self.env.start()
+        self.builds = 0
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp_dir.cleanup()
+
+    def build(self):
+        self.builds += 1
+        return ({"a": ("b", True)}, {"c"}, self.builds)
+
+    def test_cached(self):
+        table = cached_table("test", [str(self.source_path)], self.build)
+        self.assertEqual(table, ({"a": ("b", True)}, {"c"}, 1))
+        table = cached_table("test", [str(self.source_path)], self.build)
+        self.assertEqual(table, ({"a": ("b", True)}, {"c"}, 1))
+        self.assertEqual(self.builds, 1)
+
+    def test_source_changed(self):
+        cached_table("test", [str(self.source_path)], self.build)
+        self.source_path.write_text("TABLE = 2", encoding="utf-8")
+        table = cached_table("test", [str(self.source_path)], self.build)
+        self.assertEqual(table[2], 2)
+        # The table of the old source is removed
+        cache_files = list((Path(self.tmp_dir.name) / "cache").iterdir())
+        self.assertEqual(len(cache_files), 1)
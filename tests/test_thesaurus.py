@@ -0,0 +1,157 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from wiktextract.thesaurus import (
+    ThesaurusLoader,
+    ThesaurusTerm,
+    group_terms,
+    init_thesaurus_db,
+    search_thesaurus,
+)
+from wiktextract.thesaurus_index import ThesaurusIndex, build_thesaurus_index
+
+
+class ThesaurusLoaderTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_load_terms(self):
+        pages = [
+            [
+                ThesaurusTerm("dog", "en", "noun", "synonyms", "hound"),
+                ThesaurusTerm(
+                    "dog",
+                    "en",
+                    "noun",
+                    "hyponyms",
+                    "puppy",
+                    tags=["informal", "young"],
+                    sense="animal",
+                ),
+                ThesaurusTerm("cat", "en", "noun", "synonyms", "kitty"),
+            ],
+            [
+                # Same entry on another page, with another sense
+                ThesaurusTerm(
+                    "dog", "en", "noun", "synonyms", "hound", sense="other"
+                ),
+                ThesaurusTerm(
+                    "dog", "en", "noun", "synonyms", "cur", roman="cur"
+                ),
+                ThesaurusTerm("dog", "fr", "noun", "synonyms", "chien"),
+            ],
+        ]
+        conn = init_thesaurus_db(Path(self.tmp_dir.name, "thesaurus.db"))
+        loader = ThesaurusLoader(conn, batch_size=2)
+        for terms in pages:
+            loader.add(group_terms(terms))
+        loader.finish()
+        self.assertEqual(
+            conn.execute("SELECT * FROM entries ORDER BY id").fetchall(),
+            [
+                (1, "dog", "noun", "en", ""),
+                (2, "cat", "noun", "en", ""),
+                (3, "dog", "noun", "fr", ""),
+            ],
+        )
+        self.assertEqual(
+            conn.execute(
+                "SELECT * FROM terms ORDER BY entry_id, term"
+            ).fetchall(),
+            [
+                ("cur", 1, "synonyms", "", "", "", "cur"),
+                ("hound", 1, "synonyms", "", "", "", ""),
+                ("puppy", 1, "hyponyms", "informal|young", "", "", ""),
+                ("kitty", 2, "synonyms", "", "", "", ""),
+                ("chien", 3, "synonyms", "", "", "", ""),
+            ],
+        )
+        self.assertEqual(
+            sorted(
+                (term.term, term.sense, term.tags)
+                for term in search_thesaurus(conn, "dog", "en", "noun")
+            ),
+            [
+                ("cur", "", []),
+                ("hound", "", []),
+                ("puppy", "", ["informal", "young"]),
+            ],
+        )
+        conn.close()
+
+    def test_entry_without_pos(self):
+        conn = init_thesaurus_db(Path(self.tmp_dir.name, "thesaurus.db"))
+        loader = ThesaurusLoader(conn, batch_size=1)
+        loader.add(
+            group_terms(
+                [
+                    ThesaurusTerm("dog", "en", None, "synonyms", "hound"),
+                    ThesaurusTerm("dog", "en", None, "synonyms", "cur"),
+                ]
+            )
+        )
+        loader.add(
+            group_terms([ThesaurusTerm("dog", "en", None, "synonyms", "pup")])
+        )
+        loader.finish()
+        self.assertEqual(
+            conn.execute("SELECT * FROM entries").fetchall(),
+            [(1, "dog", None, "en", "")],
+        )
+        self.assertEqual(
+            conn.execute(
+                "SELECT term, entry_id FROM terms ORDER BY term"
+            ).fetchall(),
+            [("cur", 1), ("hound", 1), ("pup", 1)],
+        )
+        conn.close()
+
+    def test_thesaurus_index(self):
+        conn = init_thesaurus_db(Path(self.tmp_dir.name, "thesaurus.db"))
+        loader = ThesaurusLoader(conn)
+        loader.add(
+            group_terms(
+                [
+                    ThesaurusTerm("dog", "en", "noun", "synonyms", "hound"),
+                    ThesaurusTerm(
+                        "dog",
+                        "en",
+                        "noun",
+                        "hyponyms",
+                        "puppy",
+                        tags=["informal"],
+                        topics=["zoology"],
+                        raw_tags=["raw"],
+                        roman="puppy",
+                        sense="animal",
+                    ),
+                    ThesaurusTerm("dog", "en", "verb", "synonyms", "follow"),
+                    ThesaurusTerm("chien", "fr", "noun", "synonyms", "toutou"),
+                ]
+            )
+        )
+        loader.finish()
+        index_path = Path(self.tmp_dir.name, "thesaurus.index")
+        build_thesaurus_index(conn, index_path)
+        index = ThesaurusIndex(index_path)
+        for key in [
+            ("dog", "en", "noun"),
+            ("dog", "en", "verb"),
+            ("chien", "fr", "noun"),
+            ("cat", "en", "noun"),
+        ]:
+            self.assertEqual(
+                index.search(*key), list(search_thesaurus(conn, *key))
+            )
+        self.assertEqual(
+            [
+                term.term
+                for term in index.search("dog", "en", "noun", "hyponyms")
+            ],
+            ["puppy"],
+        )
+        conn.close()
@@ -0,0 +1,72 @@
+import unittest
+
+from wikitextprocessor import Wtp
+
+from wiktextract.config import WiktionaryConfig
+from wiktextract.thesaurus import close_thesaurus_db
+from wiktextract.title_index import (
+    TitleIndex,
+    build_title_index,
+    page_exists,
+    remove_title_index,
+    title_index_path,
+    update_title_index,
+    use_title_index,
+)
+from wiktextract.wxr_context import WiktextractContext
+
+
+class TitleIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.wxr = WiktextractContext(Wtp(), WiktionaryConfig())
+        for title in ["dog", "cat", "ice cream", "łódź", "Module:x"]:
+            self.wxr.wtp.add_page(title, 0, "body")
+
+    def tearDown(self):
+        use_title_index(None)
+        remove_title_index(self.wxr.wtp)
+        self.wxr.wtp.close_db_conn()
+        close_thesaurus_db(
+            self.wxr.thesaurus_db_path, self.wxr.thesaurus_db_conn
+        )
+
+    def test_contains(self):
+        path = title_index_path(self.wxr.wtp)
+        build_title_index(self.wxr.wtp, path)
+        index = TitleIndex(path)
+        for title in ["dog", "cat", "ice cream", "łódź", "Module:x"]:
+            self.assertIn(title, index)
+        for title in ["", "Dog", "do", "dogs", "ice", "lodz", "x"]:
+            self.assertNotIn(title, index)
+
+    def test_same_as_page_exists(self):
+        titles = ["dog", "cat", "Cat", "ice cream", "łódź", "horse"]
+        expected = [page_exists(self.wxr, title) for title in titles]
+        use_title_index(str(update_title_index(self.wxr.wtp)))
+        self.assertEqual(
+            [page_exists(self.wxr, title) for title in titles], expected
+        )
+
+    def test_update(self):
+        path = update_title_index(self.wxr.wtp)
+        self.assertNotIn("horse", TitleIndex(path))
+        self.wxr.wtp.add_page("horse", 0, "body")
+        self.assertIn("horse", TitleIndex(update_title_index(self.wxr.wtp)))
+
+    def test_update_renamed_page(self):
+        path = update_title_index(self.wxr.wtp)
+        self.wxr.wtp.db_conn.execute(
+            "UPDATE pages SET title = 'horse' WHERE title = 'cat'"
+        )
+        index = TitleIndex(update_title_index(self.wxr.wtp))
+        self.assertIn("horse", index)
+        self.assertNotIn("cat", index)
+        # Not written again if the titles haven't changed
+        inode = path.stat().st_ino
+        update_title_index(self.wxr.wtp)
+        self.assertEqual(path.stat().st_ino, inode)
+
+    def test_main_prefix(self):
+        use_title_index(str(update_title_index(self.wxr.wtp)))
+        self.assertTrue(page_exists(self.wxr, "Main:dog"))
+        self.assertFalse(page_exists(self.wxr, "Main:horse"))
@@ -0,0 +1,94 @@
+import unittest
+from unittest.mock import patch
+
+from pydantic import ValidationError
+from wikitextprocessor import Wtp
+
+from wiktextract.config import WiktionaryConfig
+from wiktextract.extractor.fr import models
+from wiktextract.extractor.fr.models import Sense, WordEntry
+from wiktextract.thesaurus import close_thesaurus_db
+from wiktextract.trusted_models import (
+    set_trusted_models,
+    setattr_handlers_used,
+    trusted_editions,
+    use_trusted_models,
+    validate_page_data,
+)
+from wiktextract.wxr_context import WiktextractContext
+
+
+def build_entry() -> WordEntry:
+    entry = WordEntry(word="chien", lang_code="fr", lang="Français")
+    entry.pos = "noun"
+    tags = ["masculine"]
+    for gloss in ["Mammifère", "Homme méprisable"]:
+        sense = Sense()
+        sense.glosses = [gloss]
+        # Each sense gets a copy of the assigned list
+        sense.tags = tags
+        tags.append("figuratively")
+        entry.senses.append(sense)
+    entry.senses[0].raw_tags = ["Zoologie"]
+    return entry
+
+
+class TrustedModelsTests(unittest.TestCase):
+    def setUp(self):
+        self.wxr = WiktextractContext(
+            Wtp(lang_code="fr"),
+            WiktionaryConfig(dump_file_lang_code="fr", trusted_models=True),
+        )
+
+    def tearDown(self):
+        set_trusted_models(models, False)
+        trusted_editions.clear()
+        self.wxr.wtp.close_db_conn()
+        close_thesaurus_db(
+            self.wxr.thesaurus_db_path, self.wxr.thesaurus_db_conn
+        )
+
+    def test_same_data(self):
+        validated = build_entry().model_dump(exclude_defaults=True)
+        use_trusted_models(self.wxr)
+        trusted = build_entry().model_dump(exclude_defaults=True)
+        self.assertEqual(trusted, validated)
+        self.assertEqual(
+            trusted["senses"][1],
+            {
+                "glosses": ["Homme méprisable"],
+                "tags": ["masculine", "figuratively"],
+            },
+        )
+        validate_page_data(self.wxr, [trusted])
+
+    def test_invalid_assignment(self):
+        entry = build_entry()
+        with self.assertRaises(ValidationError):
+            entry.pos = 1
+        use_trusted_models(self.wxr)
+        entry.pos = 1
+        with self.assertRaises(ValidationError):
+            validate_page_data(
+                self.wxr, [entry.model_dump(exclude_defaults=True)]
+            )
+        # Unknown fields are still rejected
+        with self.assertRaises(ValueError):
+            entry.unknown = ""
+
+    def test_setattr_handlers_used(self):
+        # The private cache of pydantic that trusted mode relies on
+        self.assertTrue(setattr_handlers_used())
+
+    def test_handlers_not_used(self):
+        with (
+            patch(
+                "wiktextract.trusted_models.setattr_handlers_used",
+                return_value=False,
+            ),
+            self.assertLogs("wiktextract") as cm,
+        ):
+            use_trusted_models(self.wxr)
+        self.assertIn("assignments are validated", cm.output[0])
+        with self.assertRaises(ValidationError):
+            build_entry().pos = 1
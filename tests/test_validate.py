@@ -0,0 +1,25 @@
+import unittest
+
+from wiktextract.wiktionary import (
+    VALIDATE_FULL,
+    VALIDATE_OFF,
+    VALIDATE_SAMPLE_INTERVAL,
+    VALIDATE_SAMPLED,
+    validate_page,
+)
+
+
+class ValidateTests(unittest.TestCase):
+    def test_full_and_off(self):
+        self.assertTrue(validate_page(VALIDATE_FULL, "dog"))
+        self.assertFalse(validate_page(VALIDATE_OFF, "dog"))
+
+    def test_sampled(self):
+        titles = [f"page {i}" for i in range(VALIDATE_SAMPLE_INTERVAL * 100)]
+        sampled = [t for t in titles if validate_page(VALIDATE_SAMPLED, t)]
+        self.assertGreater(len(sampled), 50)
+        self.assertLess(len(sampled), 150)
+        # The same pages are selected in every run
+        self.assertEqual(
+            sampled, [t for t in titles if validate_page(VALIDATE_SAMPLED, t)]
+        )
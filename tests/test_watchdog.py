@@ -0,0 +1,62 @@
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+from wiktextract.watchdog import (
+    ChunkTask,
+    load_quarantine,
+    retry_failed_task,
+    split_failed_task,
+)
+
+
+def items(*titles: str) -> list[tuple[int, SimpleNamespace]]:
+    return [(i, SimpleNamespace(title=title)) for i, title in enumerate(titles)]
+
+
+class WatchdogTests(unittest.TestCase):
+    def test_split_suspect(self):
+        tasks = split_failed_task(ChunkTask(items("a", "b", "c", "d")), {1})
+        self.assertEqual(
+            [([key for key, _ in t.items], t.isolated) for t in tasks],
+            [([0], False), ([1], True), ([2, 3], False)],
+        )
+
+    def test_retry_without_suspect(self):
+        task = ChunkTask(items("a", "b"))
+        tasks = split_failed_task(task, set())
+        self.assertEqual(len(tasks), 1)
+        self.assertEqual(tasks[0].attempts, 1)
+        self.assertFalse(tasks[0].isolated)
+        # The page that breaks the pool wasn't found twice
+        tasks = split_failed_task(tasks[0], set())
+        self.assertEqual([t.isolated for t in tasks], [True, True])
+
+    def test_retry_queued_chunk(self):
+        # No worker started the chunk, it is sent again unchanged
+        task = ChunkTask(items("a", "b"), attempts=1)
+        tasks = retry_failed_task(task, {5, 6}, {5})
+        self.assertEqual(len(tasks), 1)
+        self.assertEqual([key for key, _ in tasks[0].items], [0, 1])
+        self.assertEqual(tasks[0].attempts, 1)
+        self.assertFalse(tasks[0].isolated)
+        self.assertIsNone(tasks[0].future)
+
+    def test_retry_started_chunk(self):
+        # The chunk was in flight alongside the page that timed out
+        tasks = retry_failed_task(ChunkTask(items("a", "b")), {1, 5}, {5})
+        self.assertEqual([t.attempts for t in tasks], [1])
+        tasks = retry_failed_task(ChunkTask(items("a", "b")), {1}, {1})
+        self.assertEqual([t.isolated for t in tasks], [False, True])
+
+    def test_load_quarantine(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "quarantine.jsonl"
+            self.assertEqual(load_quarantine(str(path)), set())
+            path.write_text(
+                '{"title": "a", "reason": "timeout"}\n'
+                '{"title": "b", "reason": "crash"}\n',
+                encoding="utf-8",
+            )
+            self.assertEqual(load_quarantine(str(path)), {"a", "b"})
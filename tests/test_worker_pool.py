@@ -0,0 +1,49 @@
+import multiprocessing
+import unittest
+
+from wiktextract.worker_pool import (
+    PageRegistry,
+    init_worker,
+    worker_page_started,
+    worker_report_memory,
+)
+
+
+class WorkerContext:
+    def reconnect_databases(self) -> None:
+        pass
+
+    def remove_unpicklable_objects(self) -> None:
+        pass
+
+
+def run_worker(registry: PageRegistry) -> None:
+    init_worker(WorkerContext(), None, registry)  # type: ignore[arg-type]
+    worker_page_started(5)
+    worker_report_memory()
+
+
+class PageRegistryTests(unittest.TestCase):
+    def test_slots(self):
+        registry = PageRegistry(multiprocessing.get_context("spawn"), 3)
+        values = registry.slots.get_obj()
+        # pid, page key, start time, resident memory
+        values[0:4] = [100, 5, 12.5, 2048]
+        values[4:8] = [101, 6, 0, 4096]
+        self.assertEqual(registry.in_flight(), [(100, 5, 12.5)])
+        self.assertEqual(registry.max_rss(), 4096)
+        self.assertEqual(registry.started_pages(), {5, 6})
+        registry.clear()
+        self.assertEqual(registry.in_flight(), [])
+        self.assertEqual(registry.max_rss(), 0)
+        self.assertEqual(registry.started_pages(), set())
+
+    def test_slot_released_at_exit(self):
+        ctx = multiprocessing.get_context("fork")
+        registry = PageRegistry(ctx, 2)
+        process = ctx.Process(target=run_worker, args=(registry,))
+        process.start()
+        process.join()
+        self.assertEqual(process.exitcode, 0)
+        self.assertEqual(registry.slots.get_obj()[:], [0.0] * 8)
+        self.assertEqual(registry.max_rss(), 0)
@@ -0,0 +1,120 @@
+import argparse
+import copy
+import sys
+import time
+import tracemalloc
+
+from wikitextprocessor import Wtp
+
+from wiktextract.config import WiktionaryConfig
+from wiktextract.extractor.fr.models import Sense, Sound, WordEntry
+from wiktextract.extractor.share import deep_copy_data
+from wiktextract.page import parse_page
+from wiktextract.wxr_context import WiktextractContext
+
+
+def model_copy(value):
+    """The previous way to copy the base data."""
+    if isinstance(value, dict):
+        return copy.deepcopy(value)
+    return value.model_copy(deep=True)
+
+
+def use_copy_function(edition: str, copy_fn) -> None:
+    """Replaces the base data copy function of the edition's modules."""
+    prefix = f"wiktextract.extractor.{edition}."
+    for name, module in list(sys.modules.items()):
+        if name.startswith(prefix) and hasattr(module, "deep_copy_data"):
+            module.deep_copy_data = copy_fn
+
+
+def measure(fn) -> tuple[float, float]:
+    """Returns the time and the peak of allocated memory in MiB, measured
+    in another call because tracing slows the allocations down."""
+    start = time.perf_counter()
+    fn()
+    wall = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return wall, peak / 2**20
+
+
+def synthetic_page(num_sections: int, copy_fn) -> None:
+    """Copies a base entry with many sounds and categories to each section
+    of a page, like the French extractor."""
+    base_data = WordEntry(word="chien", lang_code="fr", lang="Français")
+    for i in range(40):
+        base_data.sounds.append(Sound(ipa=f"ʃjɛ̃ {i}", tags=["France"]))
+    base_data.categories = [f"Catégorie {i}" for i in range(100)]
+    page_data = []
+    for i in range(num_sections):
+        data = copy_fn(base_data)
+        data.pos = "noun"
+        data.senses.append(Sense(glosses=[f"Sens {i}"]))
+        page_data.append(data)
+    [data.model_dump(exclude_defaults=True) for data in page_data]
+
+
+def main() -> None:
+    """
+    Measure the time and the peak memory of copying the base data to each
+    part of speech section with `model_copy(deep=True)` or `copy.deepcopy()`
+    and with `deep_copy_data()`: on a synthetic page with many sections,
+    and on the given pages of an edition database if any.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sections", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--db-path")
+    parser.add_argument("--edition", default="fr")
+    parser.add_argument("pages", nargs="*", help="titles of large pages")
+    args = parser.parse_args()
+
+    print(f"synthetic page with {args.sections} sections:")
+    for name, copy_fn in [
+        ("model_copy", model_copy),
+        ("deep_copy_data", deep_copy_data),
+    ]:
+        wall, peak = measure(
+            lambda: [
+                synthetic_page(args.sections, copy_fn)
+                for _ in range(args.repeat)
+            ]
+        )
+        print(
+            f"  {name:16} {wall / args.repeat * 1e3:8.2f}ms per page, "
+            f"peak {peak:6.1f} MiB"
+        )
+
+    if args.db_path is None:
+        return
+    wxr = WiktextractContext(
+        Wtp(db_path=args.db_path, lang_code=args.edition),
+        WiktionaryConfig(
+            dump_file_lang_code=args.edition, capture_language_codes=None
+        ),
+    )
+    pages = [(title, wxr.wtp.get_page_body(title, 0)) for title in args.pages]
+
+    def extract() -> None:
+        for title, body in pages:
+            wxr.wtp.start_page(title)
+            parse_page(wxr, title, body)
+
+    # Imports the modules and fills the caches
+    extract()
+    print(f"{len(pages)} pages of the {args.edition} edition:")
+    for name, copy_fn in [
+        ("model_copy", model_copy),
+        ("deep_copy_data", deep_copy_data),
+    ]:
+        use_copy_function(args.edition, copy_fn)
+        wall, peak = measure(extract)
+        print(f"  {name:16} {wall:8.2f}s, peak {peak:6.1f} MiB")
+    wxr.wtp.close_db_conn()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import argparse
+import importlib.util
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from wikitextprocessor import Wtp
+
+from wiktextract.clean import MARKUP_RE, clean_value
+from wiktextract.config import WiktionaryConfig
+from wiktextract.wxr_context import WiktextractContext
+
+CORPUS_PATH = Path(__file__).parent.parent / "tests/clean_value_corpus.json"
+
+
+def load_baseline(revision: str):
+    """Imports `wiktextract/clean.py` of a git revision as a module."""
+    source = subprocess.run(
+        ["git", "show", f"{revision}:src/wiktextract/clean.py"],
+        cwd=Path(__file__).parent,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    with tempfile.NamedTemporaryFile(
+        "w", suffix=".py", delete=False, encoding="utf-8"
+    ) as f:
+        f.write(source)
+    # In the package so that its relative imports work
+    spec = importlib.util.spec_from_file_location(
+        "wiktextract._baseline_clean", f.name
+    )
+    module = importlib.util.module_from_spec(spec)  # type: ignore[arg-type]
+    sys.modules[spec.name] = module  # type: ignore[union-attr]
+    spec.loader.exec_module(module)  # type: ignore[union-attr]
+    Path(f.name).unlink()
+    return module
+
+
+def output_strings(path: str, limit: int) -> list[str]:
+    """Returns the string values of a wiktextract JSONL output file."""
+    strings: list[str] = []
+
+    def collect(value) -> None:
+        if isinstance(value, str):
+            strings.append(value)
+        elif isinstance(value, list):
+            for v in value:
+                collect(v)
+        elif isinstance(value, dict):
+            for v in value.values():
+                collect(v)
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            collect(json.loads(line))
+            if len(strings) >= limit:
+                break
+    return strings[:limit]
+
+
+def call_time(fn, wxr: WiktextractContext, strings: list[str]) -> float:
+    """Returns the mean time of a call in microseconds."""
+    start = time.perf_counter()
+    for s in strings:
+        fn(wxr, s)
+    return (time.perf_counter() - start) / len(strings) * 1e6
+
+
+def main() -> None:
+    """
+    Compare the time and the output of `clean_value()` with its
+    implementation in another git revision, on the values of a wiktextract
+    output file or on the inputs of tests/clean_value_corpus.json.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", help="wiktextract JSONL output file")
+    parser.add_argument("--baseline", default="HEAD~1", help="git revision")
+    parser.add_argument("--edition", default="en")
+    parser.add_argument("--limit", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.output is not None:
+        strings = output_strings(args.output, args.limit)
+    else:
+        with open(CORPUS_PATH, encoding="utf-8") as f:
+            strings = [text for text, _, _, _ in json.load(f)]
+    baseline = load_baseline(args.baseline)
+    wxr = WiktextractContext(Wtp(lang_code=args.edition), WiktionaryConfig())
+
+    mismatches = sum(
+        1
+        for s in strings
+        if clean_value(wxr, s) != baseline.clean_value(wxr, s)
+    )
+    baseline_time = min(
+        call_time(baseline.clean_value, wxr, strings)
+        for _ in range(args.repeat)
+    )
+    current_time = min(
+        call_time(clean_value, wxr, strings) for _ in range(args.repeat)
+    )
+    plain = sum(1 for s in strings if MARKUP_RE.search(s) is None)
+    wxr.wtp.close_db_conn()
+
+    print(f"{len(strings)} strings, {plain / len(strings):.0%} without markup")
+    print(f"  {args.baseline}: {baseline_time:8.2f}µs per call")
+    print(f"  current: {current_time:8.2f}µs per call")
+    print(f"different outputs: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
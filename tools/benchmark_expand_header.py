@@ -0,0 +1,119 @@
+import argparse
+import importlib.util
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from wikitextprocessor import Wtp
+
+from wiktextract.config import WiktionaryConfig
+from wiktextract.extractor.en import inflection
+from wiktextract.extractor.en.inflectiondata import infl_map
+from wiktextract.wxr_context import WiktextractContext
+
+LANGUAGES = ["English", "Finnish", "German", "Latin", "Russian", "Swedish"]
+POS = ["noun", "verb", "adj"]
+
+
+def load_baseline(revision: str):
+    """Imports `extractor/en/inflection.py` of a git revision as a module."""
+    source = subprocess.run(
+        [
+            "git",
+            "show",
+            f"{revision}:src/wiktextract/extractor/en/inflection.py",
+        ],
+        cwd=Path(__file__).parent,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    with tempfile.NamedTemporaryFile(
+        "w", suffix=".py", delete=False, encoding="utf-8"
+    ) as f:
+        f.write(source)
+    # In the package so that its relative imports work
+    spec = importlib.util.spec_from_file_location(
+        "wiktextract.extractor.en._baseline_inflection", f.name
+    )
+    module = importlib.util.module_from_spec(spec)  # type: ignore[arg-type]
+    sys.modules[spec.name] = module  # type: ignore[union-attr]
+    spec.loader.exec_module(module)  # type: ignore[union-attr]
+    Path(f.name).unlink()
+    return module
+
+
+def header_calls(num_calls: int) -> list[tuple[str, str, str, list[str]]]:
+    """Returns (lang, pos, text, base_tags) of header cells, a few tables
+    of the same languages repeating the same headers."""
+    rnd = random.Random(0)
+    headers = list(infl_map)
+    tags = sorted(
+        {t for v in infl_map.values() if isinstance(v, str) for t in v.split()}
+    )
+    tables = [
+        (
+            rnd.choice(LANGUAGES),
+            rnd.choice(POS),
+            rnd.sample(headers, 20),
+            rnd.sample(tags, 3),
+        )
+        for _ in range(100)
+    ]
+    calls = []
+    while len(calls) < num_calls:
+        lang, pos, texts, base_tags = rnd.choice(tables)
+        for text in texts:
+            calls.append((lang, pos, text, base_tags))
+    return calls[:num_calls]
+
+
+def run(module, wxr: WiktextractContext, calls) -> tuple[float, list]:
+    """Returns the mean time of a call in microseconds and the results."""
+    tablecontext = module.TableContext("en-conj")
+    results = []
+    start = time.perf_counter()
+    for lang, pos, text, base_tags in calls:
+        results.append(
+            module.expand_header(
+                wxr,
+                tablecontext,
+                "word",
+                lang,
+                pos,
+                text,
+                base_tags,
+                silent=True,
+            )
+        )
+    return (time.perf_counter() - start) / len(calls) * 1e6, results
+
+
+def main() -> None:
+    """
+    Compare the time and the output of `expand_header()` with its
+    implementation in another git revision, on the headers of infl_map.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--baseline", default="HEAD~1", help="git revision")
+    parser.add_argument("--calls", type=int, default=100000)
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    wxr = WiktextractContext(Wtp(lang_code="en"), WiktionaryConfig())
+    calls = header_calls(args.calls)
+    baseline_time, baseline_results = run(baseline, wxr, calls)
+    current_time, current_results = run(inflection, wxr, calls)
+    wxr.wtp.close_db_conn()
+
+    print(f"{len(calls)} header cells")
+    print(f"  {args.baseline}: {baseline_time:8.2f}µs per call")
+    print(f"  current: {current_time:8.2f}µs per call")
+    print(f"same results: {baseline_results == current_results}")
+
+
+if __name__ == "__main__":
+    main()
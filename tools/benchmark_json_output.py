@@ -0,0 +1,83 @@
+import argparse
+import json
+import os
+import time
+from itertools import groupby
+
+from wikitextprocessor import Wtp
+
+from wiktextract.config import WiktionaryConfig
+from wiktextract.wiktionary import (
+    check_json_data,
+    encode_json_data,
+    use_orjson,
+    write_json_data,
+)
+from wiktextract.wxr_context import WiktextractContext
+
+
+def main() -> None:
+    """
+    Measure the CPU time the parent process of the second phase spends per
+    output entry when it checks and serializes the entries itself (before),
+    and when it only writes the lines encoded in the worker processes
+    (after).  The input is a JSONL file from a previous extraction, entries
+    with the same word are grouped into one page.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("jsonl_path")
+    parser.add_argument("--edition", default="en")
+    parser.add_argument("--limit", type=int, default=100_000)
+    parser.add_argument("--orjson", action="store_true", default=False)
+    args = parser.parse_args()
+    use_orjson(args.orjson)
+
+    with open(args.jsonl_path, encoding="utf-8") as f:
+        entries = [json.loads(line) for _, line in zip(range(args.limit), f)]
+    pages = [
+        list(group)
+        for _, group in groupby(entries, key=lambda dt: dt.get("word"))
+    ]
+    wxr = WiktextractContext(
+        Wtp(), WiktionaryConfig(dump_file_lang_code=args.edition)
+    )
+    print(f"{len(entries)} entries, {len(pages)} pages")
+    print(f"orjson: {args.orjson}")
+
+    with open(os.devnull, "w", encoding="utf-8") as out_f:
+        start = time.process_time()
+        for page_data in pages:
+            for dt in page_data:
+                check_json_data(wxr, dt)
+                write_json_data(dt, out_f, False)
+        before = time.process_time() - start
+
+    # Done in the worker processes
+    start = time.process_time()
+    encoded_pages = [
+        [encode_json_data(dt, False) for dt in page_data]
+        for page_data in pages
+    ]
+    worker = time.process_time() - start
+
+    with open(os.devnull, "wb") as out_buffer:
+        start = time.process_time()
+        for lines in encoded_pages:
+            out_buffer.write(b"".join(lines))
+        after = time.process_time() - start
+
+    for name, cpu_time in [
+        ("parent, before", before),
+        ("parent, after", after),
+        ("worker encoding", worker),
+    ]:
+        print(
+            f"{name:16} {cpu_time:8.3f}s CPU "
+            f"{cpu_time / len(entries) * 1e6:8.1f}µs/entry"
+        )
+    print(f"parent CPU time reduced {before / max(after, 1e-9):.0f}x")
+    wxr.wtp.close_db_conn()
+
+
+if __name__ == "__main__":
+    main()
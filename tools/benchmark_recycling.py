@@ -0,0 +1,103 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+PEAK_RE = re.compile(r"Peak worker memory (\d+) MiB, pool restarted (\d+)")
+
+
+def run_wiktwords(db_path: str, extra_args: list[str]) -> tuple[float, str]:
+    """Runs the second phase on the database file and returns the wall
+    time and the peak worker memory line of the log."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        start = time.perf_counter()
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "wiktextract.wiktwords",
+                "--db-path",
+                db_path,
+                "--out",
+                os.path.join(tmp_dir, "out.jsonl"),
+                "--all",
+                "--all-languages",
+            ]
+            + extra_args,
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        wall = time.perf_counter() - start
+    m = PEAK_RE.search(result.stderr)
+    memory = (
+        f"{m.group(1):>6} MiB, {m.group(2)} restarts" if m else "not reported"
+    )
+    return wall, memory
+
+
+def create_db(db_path: str, dump_path: str, edition: str) -> None:
+    """Runs the first phase, so creating the database is not part of the
+    measured times."""
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "wiktextract.wiktwords",
+            "--db-path",
+            db_path,
+            "--edition",
+            edition,
+            "--skip-extraction",
+            dump_path,
+        ],
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def main() -> None:
+    """
+    Measure the wall time of the second phase and the peak memory of the
+    worker processes without worker recycling, with workers replaced after
+    a number of pages (--recycle-pages) and with the pool restarted at a
+    memory limit (--recycle-rss).  The database is created from `--dump`
+    first if it doesn't exist, for example:
+
+    python tools/benchmark_recycling.py test.db --edition en \
+        --dump tests/test-pages-articles.xml.bz2
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("db_path")
+    parser.add_argument("--edition", default="en")
+    parser.add_argument("--dump", help="Dump file to create the database")
+    parser.add_argument("--num-processes", type=int, default=None)
+    parser.add_argument(
+        "--recycle-pages", type=int, nargs="*", default=[1000, 10000]
+    )
+    parser.add_argument("--recycle-rss", type=int, nargs="*", default=[1024])
+    args = parser.parse_args()
+
+    if args.dump is not None and not os.path.exists(args.db_path):
+        create_db(args.db_path, args.dump, args.edition)
+    common_args = ["--edition", args.edition]
+    if args.num_processes is not None:
+        common_args += ["--num-processes", str(args.num_processes)]
+    settings = [("no recycling", [])]
+    for pages in args.recycle_pages:
+        settings.append(
+            (f"--recycle-pages {pages}", ["--recycle-pages", str(pages)])
+        )
+    for rss in args.recycle_rss:
+        settings.append((f"--recycle-rss {rss}", ["--recycle-rss", str(rss)]))
+    for name, extra_args in settings:
+        wall, memory = run_wiktwords(args.db_path, common_args + extra_args)
+        print(f"{name:24} {wall:8.1f}s  peak worker memory: {memory}")
+
+
+if __name__ == "__main__":
+    main()
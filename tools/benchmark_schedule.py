@@ -0,0 +1,103 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def run_wiktwords(db_path: str, out_path: str, extra_args: list[str]) -> float:
+    """Runs the second phase on the database file and returns the wall
+    time."""
+    start = time.perf_counter()
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "wiktextract.wiktwords",
+            "--db-path",
+            db_path,
+            "--out",
+            out_path,
+            "--all",
+            "--all-languages",
+        ]
+        + extra_args,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def create_db(db_path: str, dump_path: str, edition: str) -> None:
+    """Runs the first phase, so creating the database is not part of the
+    measured times."""
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "wiktextract.wiktwords",
+            "--db-path",
+            db_path,
+            "--edition",
+            edition,
+            "--skip-extraction",
+            dump_path,
+        ],
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def main() -> None:
+    """
+    Measure the end-to-end wall time of the second phase with pages in
+    database order and with size-aware scheduling (--schedule).  The
+    database is created from `--dump` first if it doesn't exist, for
+    example:
+
+    python tools/benchmark_schedule.py test.db --edition en \
+        --dump tests/test-pages-articles.xml.bz2
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("db_path")
+    parser.add_argument("--edition", default="en")
+    parser.add_argument("--dump", help="Dump file to create the database")
+    parser.add_argument("--num-processes", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.dump is not None and not os.path.exists(args.db_path):
+        create_db(args.db_path, args.dump, args.edition)
+    common_args = ["--edition", args.edition]
+    if args.num_processes is not None:
+        common_args += ["--num-processes", str(args.num_processes)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        stats_path = os.path.join(tmp_dir, "stats.jsonl")
+        db_order_path = os.path.join(tmp_dir, "db_order.jsonl")
+        scheduled_path = os.path.join(tmp_dir, "scheduled.jsonl")
+        db_order = run_wiktwords(
+            args.db_path,
+            db_order_path,
+            common_args + ["--page-stats", stats_path],
+        )
+        by_size = run_wiktwords(
+            args.db_path, scheduled_path, common_args + ["--schedule"]
+        )
+        by_time = run_wiktwords(
+            args.db_path,
+            scheduled_path,
+            common_args + ["--schedule", "--schedule-stats", stats_path],
+        )
+        with open(db_order_path, "rb") as f:
+            db_order_output = f.read()
+        with open(scheduled_path, "rb") as f:
+            same_output = f.read() == db_order_output
+
+    print(f"database order:               {db_order:8.1f}s")
+    print(f"scheduled by page size:       {by_size:8.1f}s")
+    print(f"scheduled by processing time: {by_time:8.1f}s")
+    print(f"same output: {same_output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import argparse
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from wiktextract.thesaurus import (
+    ThesaurusLoader,
+    ThesaurusTerm,
+    group_terms,
+    init_thesaurus_db,
+)
+
+
+def extract_thesaurus(
+    db_path: str, edition: str, num_args: list[str]
+) -> tuple[float, str]:
+    """Extracts the thesaurus pages of the database file to a new thesaurus
+    database in a temporary directory, and returns the wall time and the
+    path of the thesaurus database."""
+    tmp_dir = tempfile.mkdtemp()
+    # The thesaurus database is created next to the database file
+    link_path = os.path.join(tmp_dir, "wiktionary.db")
+    os.symlink(os.path.abspath(db_path), link_path)
+    start = time.perf_counter()
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "wiktextract.wiktwords",
+            "--db-path",
+            link_path,
+            "--edition",
+            edition,
+            "--extract-thesaurus",
+        ]
+        + num_args,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    wall = time.perf_counter() - start
+    return wall, os.path.join(tmp_dir, "wiktionary_thesaurus.db")
+
+
+def read_pages(thesaurus_db_path: str) -> list[list[ThesaurusTerm]]:
+    """Reads the terms of a thesaurus database back, one list of terms for
+    each entry like the terms of a thesaurus page."""
+    conn = sqlite3.connect(thesaurus_db_path)
+    pages: dict[int, list[ThesaurusTerm]] = {}
+    for row in conn.execute(
+        """
+        SELECT entries.id, entry, language_code, pos, sense, term, linkage,
+        tags, topics, roman, raw_tags
+        FROM terms JOIN entries ON terms.entry_id = entries.id
+        ORDER BY entries.id
+        """
+    ):
+        pages.setdefault(row[0], []).append(
+            ThesaurusTerm(
+                entry=row[1],
+                language_code=row[2],
+                pos=row[3],
+                sense=row[4],
+                term=row[5],
+                linkage=row[6],
+                tags=row[7].split("|") if row[7] else [],
+                topics=row[8].split("|") if row[8] else [],
+                roman=row[9],
+                raw_tags=row[10].split("|") if row[10] else [],
+            )
+        )
+    conn.close()
+    return list(pages.values())
+
+
+def insert_term(db_conn: sqlite3.Connection, term: ThesaurusTerm) -> None:
+    """Inserts a term with up to three statements, like the thesaurus
+    extraction did before `ThesaurusLoader`."""
+    entry_id = None
+    for (new_entry_id,) in db_conn.execute(
+        "INSERT OR IGNORE INTO entries (entry, language_code, pos, sense) "
+        "VALUES(?, ?, ?, ?) RETURNING id",
+        (term.entry, term.language_code, term.pos, term.sense),
+    ):
+        entry_id = new_entry_id
+    if entry_id is None:
+        for (old_entry_id,) in db_conn.execute(
+            "SELECT id FROM entries WHERE entry = ? AND language_code = ? "
+            "AND pos = ?",
+            (term.entry, term.language_code, term.pos),
+        ):
+            entry_id = old_entry_id
+    db_conn.execute(
+        """
+        INSERT OR IGNORE INTO terms
+        (term, entry_id, linkage, tags, topics, roman, raw_tags)
+        VALUES(?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            term.term,
+            entry_id,
+            term.linkage,
+            "|".join(term.tags),
+            "|".join(term.topics),
+            term.roman,
+            "|".join(term.raw_tags),
+        ),
+    )
+
+
+def load_by_term(db_path: Path, pages: list[list[ThesaurusTerm]]) -> float:
+    start = time.perf_counter()
+    conn = init_thesaurus_db(db_path)
+    for terms in pages:
+        for term in terms:
+            insert_term(conn, term)
+    conn.commit()
+    conn.close()
+    return time.perf_counter() - start
+
+
+def load_in_batches(db_path: Path, pages: list[list[ThesaurusTerm]]) -> float:
+    entries = [group_terms(terms) for terms in pages]
+    start = time.perf_counter()
+    conn = init_thesaurus_db(db_path)
+    loader = ThesaurusLoader(conn)
+    for page_entries in entries:
+        loader.add(page_entries)
+    loader.finish()
+    conn.commit()
+    conn.close()
+    return time.perf_counter() - start
+
+
+def table_rows(db_path: Path) -> list:
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(
+        """
+        SELECT entry, language_code, pos, sense, term, linkage, tags, topics,
+        roman, raw_tags
+        FROM terms JOIN entries ON terms.entry_id = entries.id
+        ORDER BY entries.id, term
+        """
+    ).fetchall()
+    conn.close()
+    return rows
+
+
+def main() -> None:
+    """
+    Measure the thesaurus extraction time of a database, then load the
+    extracted terms again term by term with `insert_term()` and in
+    batches with `ThesaurusLoader`.  Create the database first, for
+    example from the English dump:
+
+    wiktwords --db-path en.db --edition en --skip-extraction \
+        enwiktionary-latest-pages-articles.xml.bz2
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("db_path")
+    parser.add_argument("--edition", default="en")
+    parser.add_argument("--num-processes", type=int, default=None)
+    args = parser.parse_args()
+
+    num_args = []
+    if args.num_processes is not None:
+        num_args = ["--num-processes", str(args.num_processes)]
+    extraction, thesaurus_db_path = extract_thesaurus(
+        args.db_path, args.edition, num_args
+    )
+    pages = read_pages(thesaurus_db_path)
+    num_terms = sum(len(terms) for terms in pages)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        by_term_path = Path(tmp_dir, "by_term.db")
+        batched_path = Path(tmp_dir, "batched.db")
+        by_term = load_by_term(by_term_path, pages)
+        batched = load_in_batches(batched_path, pages)
+        same_data = table_rows(by_term_path) == table_rows(batched_path)
+    shutil.rmtree(os.path.dirname(thesaurus_db_path))
+
+    print(f"thesaurus extraction:   {extraction:8.1f}s")
+    print(f"loading {num_terms} terms of {len(pages)} entries:")
+    print(f"  term by term:         {by_term:8.1f}s")
+    print(f"  in batches:           {batched:8.1f}s")
+    print(f"same data: {same_data}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import json
+import random
+import sqlite3
+import tempfile
+import time
+from itertools import groupby
+from pathlib import Path
+
+from wiktextract.thesaurus import search_thesaurus
+from wiktextract.thesaurus_index import ThesaurusIndex, build_thesaurus_index
+
+Key = tuple[str, str, str]
+
+
+def read_pages(output_path: str) -> list[list[Key]]:
+    """Returns the (word, lang_code, pos) keys of the entries of each page
+    of a wiktextract output file, the consecutive entries of a word are
+    assumed to be from the same page."""
+    keys = []
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            data = json.loads(line)
+            if "pos" in data and "lang_code" in data:
+                keys.append((data["word"], data["lang_code"], data["pos"]))
+    return [list(page) for _, page in groupby(keys, key=lambda k: k[0])]
+
+
+def sample_pages(
+    db_conn: sqlite3.Connection, num_pages: int
+) -> list[list[Key]]:
+    """Returns pages of one entry, half of them found in the thesaurus."""
+    keys = db_conn.execute(
+        "SELECT entry, language_code, pos FROM entries "
+        "WHERE entry IS NOT NULL AND language_code IS NOT NULL "
+        "AND pos IS NOT NULL"
+    ).fetchall()
+    random.seed(0)
+    found = random.sample(keys, min(num_pages // 2, len(keys)))
+    missing = [(f"{entry} (missing)", lang, pos) for entry, lang, pos in found]
+    return [[key] for key in found + missing]
+
+
+def page_latency(lookup, pages: list[list[Key]]) -> tuple[float, int]:
+    """Returns the mean lookup time of a page in microseconds and the number
+    of terms found."""
+    num_terms = 0
+    start = time.perf_counter()
+    for keys in pages:
+        for key in keys:
+            num_terms += len(list(lookup(*key)))
+    return (time.perf_counter() - start) / len(pages) * 1e6, num_terms
+
+
+def main() -> None:
+    """
+    Measure the thesaurus lookup time per page with queries on the
+    thesaurus database and with the memory-mapped thesaurus index.  The
+    pages are taken from a wiktextract output file if given, otherwise
+    entries of the thesaurus and as many missing entries are looked up.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("thesaurus_db_path")
+    parser.add_argument("--output", help="wiktextract JSONL output file")
+    parser.add_argument("--num-pages", type=int, default=100000)
+    args = parser.parse_args()
+
+    db_conn = sqlite3.connect(args.thesaurus_db_path)
+    if args.output is not None:
+        pages = read_pages(args.output)[: args.num_pages]
+    else:
+        pages = sample_pages(db_conn, args.num_pages)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index_path = Path(tmp_dir, "thesaurus.index")
+        start = time.perf_counter()
+        build_thesaurus_index(db_conn, index_path)
+        build_time = time.perf_counter() - start
+        index = ThesaurusIndex(index_path)
+        database, db_terms = page_latency(
+            lambda *key: search_thesaurus(db_conn, *key), pages
+        )
+        indexed, index_terms = page_latency(index.search, pages)
+        index_size = index_path.stat().st_size
+
+    print(f"index: {index_size / 2**20:.1f} MiB, built in {build_time:.1f}s")
+    print(f"lookup time per page for {len(pages)} pages:")
+    print(f"  thesaurus database: {database:8.1f}µs")
+    print(f"  thesaurus index:    {indexed:8.1f}µs")
+    print(f"same terms found: {db_terms == index_terms}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from wikitextprocessor import Wtp
+
+from wiktextract.config import WiktionaryConfig
+from wiktextract.extractor.en.linkages import parse_linkage_item_text
+from wiktextract.title_index import (
+    TitleIndex,
+    build_title_index,
+    use_title_index,
+)
+from wiktextract.wxr_context import WiktextractContext
+
+# Linkage items that make `parse_linkage_item_text()` check if words exist
+LINKAGE_ITEMS = [
+    "hot dog, hotdog",
+    "ice cream / icecream",
+    "dog-like, doglike",
+    "(slang) pup, doggo",
+    "cat and dog",
+    "canine (dog-related)",
+    "man's best friend",
+    "hound dog: a hunting dog",
+]
+
+
+def sample_titles(wtp: Wtp, num_titles: int) -> list[str]:
+    """Returns titles of the database and as many missing titles."""
+    titles = [
+        title
+        for (title,) in wtp.db_conn.execute(
+            "SELECT title FROM pages ORDER BY random() LIMIT ?",
+            (num_titles // 2,),
+        )
+    ]
+    return titles + [title + " (missing)" for title in titles]
+
+
+def lookup_time(lookup, titles: list[str]) -> tuple[float, int]:
+    """Returns the mean lookup time in microseconds and the number of
+    titles found."""
+    start = time.perf_counter()
+    found = sum(1 for title in titles if lookup(title))
+    return (time.perf_counter() - start) / len(titles) * 1e6, found
+
+
+def linkage_time(wxr: WiktextractContext, repeat: int) -> float:
+    """Returns the time to parse the sample linkage items `repeat` times."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in LINKAGE_ITEMS:
+            parse_linkage_item_text(
+                wxr, "dog", {}, "synonyms", item, None, [], [], False
+            )
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """
+    Measure the page existence checks of the English extractor with queries
+    on the database and with the memory-mapped title index.  Create the
+    database first, for example:
+
+    wiktwords --db-path en.db --edition en --skip-extraction \
+        enwiktionary-latest-pages-articles.xml.bz2
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("db_path")
+    parser.add_argument("--num-titles", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    wxr = WiktextractContext(
+        Wtp(db_path=args.db_path, lang_code="en"), WiktionaryConfig()
+    )
+    wxr.wtp.start_page("dog")
+    wxr.wtp.start_section("English")
+    random.seed(0)
+    titles = sample_titles(wxr.wtp, args.num_titles)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index_path = Path(tmp_dir, "wiktionary.titles")
+        start = time.perf_counter()
+        build_title_index(wxr.wtp, index_path)
+        build_time = time.perf_counter() - start
+        index = TitleIndex(index_path)
+        index_size = index_path.stat().st_size
+
+        database, db_found = lookup_time(wxr.wtp.page_exists, titles)
+        indexed, index_found = lookup_time(index.__contains__, titles)
+        linkages_database = linkage_time(wxr, args.repeat)
+        use_title_index(str(index_path))
+        linkages_indexed = linkage_time(wxr, args.repeat)
+        use_title_index(None)
+        del index
+    wxr.wtp.close_db_conn()
+
+    print(f"index: {index_size / 2**20:.1f} MiB, built in {build_time:.1f}s")
+    print(f"lookup time for {len(titles)} titles:")
+    print(f"  database:    {database:8.2f}µs")
+    print(f"  title index: {indexed:8.2f}µs")
+    print(f"same titles found: {db_found == index_found}")
+    print(f"{args.repeat * len(LINKAGE_ITEMS)} linkage items:")
+    print(f"  database:    {linkages_database:8.2f}s")
+    print(f"  title index: {linkages_indexed:8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import argparse
+import json
+import time
+from itertools import islice
+
+from wikitextprocessor import Wtp
+
+from wiktextract.config import WiktionaryConfig
+from wiktextract.import_utils import import_extractor_module
+from wiktextract.page import parse_page
+from wiktextract.trusted_models import set_trusted_models, trusted_editions
+from wiktextract.wxr_context import WiktextractContext
+
+
+def extract_pages(
+    wxr: WiktextractContext,
+    pages: list[tuple[str, str]],
+    validate_models: bool = True,
+) -> tuple[float, list[bytes]]:
+    """Returns the extraction time and the JSON lines of the pages."""
+    lines = []
+    start = time.perf_counter()
+    for title, body in pages:
+        wxr.wtp.start_page(title)
+        for data in parse_page(wxr, title, body, validate_models):
+            lines.append(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+    return time.perf_counter() - start, lines
+
+
+def benchmark_edition(edition: str, db_path: str, num_pages: int) -> None:
+    wxr = WiktextractContext(
+        Wtp(db_path=db_path, lang_code=edition),
+        WiktionaryConfig(
+            dump_file_lang_code=edition, capture_language_codes=None
+        ),
+    )
+    pages = [
+        (page.title, page.body)
+        for page in islice(
+            (
+                page
+                for page in wxr.wtp.get_all_pages([0], False)
+                if page.body is not None
+            ),
+            num_pages,
+        )
+    ]
+    # Loads the modules and fills the caches of both runs
+    extract_pages(wxr, pages)
+    validated, validated_lines = extract_pages(wxr, pages)
+    wxr.config.trusted_models = True
+    trusted, trusted_lines = extract_pages(wxr, pages)
+    unchecked, unchecked_lines = extract_pages(wxr, pages, False)
+    wxr.config.trusted_models = False
+    set_trusted_models(import_extractor_module(edition, "models"), False)
+    trusted_editions.discard(edition)
+    wxr.wtp.close_db_conn()
+
+    print(f"{edition}: {len(pages)} pages")
+    print(f"  validated assignments: {validated:8.1f}s")
+    print(f"  trusted models:        {trusted:8.1f}s")
+    print(f"  without page checks:   {unchecked:8.1f}s")
+    print(
+        f"  same output: {validated_lines == trusted_lines == unchecked_lines}"
+    )
+
+
+def main() -> None:
+    """
+    Measure the extraction time of pages of the French, German, Russian
+    and Chinese editions with the validated and the trusted pydantic
+    models, with and without the validation of the data of each page, and
+    check that the output is the same.  The databases are
+    given as EDITION=PATH, for example fr=fr.db, created with:
+
+    wiktwords --db-path fr.db --edition fr --skip-extraction \
+        frwiktionary-latest-pages-articles.xml.bz2
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("databases", nargs="+", metavar="EDITION=PATH")
+    parser.add_argument("--num-pages", type=int, default=2000)
+    args = parser.parse_args()
+
+    for database in args.databases:
+        edition, _, db_path = database.partition("=")
+        benchmark_edition(edition, db_path, args.num_pages)
+
+
+if __name__ == "__main__":
+    main()
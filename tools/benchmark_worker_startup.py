@@ -0,0 +1,58 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+IMPORT_CODE = """
+import time
+start = time.perf_counter()
+import wiktextract.extractor.{}.page
+print(time.perf_counter() - start)
+"""
+
+
+def import_time(lang_code: str, cache_dir: str) -> float:
+    """Imports the page extractor in a new Python process like a spawned
+    worker process and returns the import time."""
+    env = dict(os.environ, WIKTEXTRACT_CACHE_DIR=cache_dir)
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_CODE.format(lang_code)],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return float(result.stdout.split()[-1])
+
+
+def main() -> None:
+    """
+    Measure the time a worker process of the second phase spends importing
+    the page extractor, with an empty table cache (the derived tables are
+    built and saved) and with the tables loaded from the cache.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--edition", default="en")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    cold_times = []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cold_times.append(import_time(args.edition, cache_dir))
+    with tempfile.TemporaryDirectory() as cache_dir:
+        import_time(args.edition, cache_dir)
+        warm_times = [
+            import_time(args.edition, cache_dir) for _ in range(args.runs)
+        ]
+
+    cold = min(cold_times)
+    warm = min(warm_times)
+    print(f"import without cached tables: {cold:.3f}s")
+    print(f"import with cached tables:    {warm:.3f}s")
+    print(f"saved per worker:             {cold - warm:.3f}s")
+
+
+if __name__ == "__main__":
+    main()